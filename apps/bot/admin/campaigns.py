@@ -0,0 +1,49 @@
+from django.contrib import admin
+from django.contrib import messages
+from unfold.admin import ModelAdmin
+
+from apps.bot.models import Campaign
+from apps.bot.services.campaigns import CampaignService
+from apps.bot.tasks.campaigns import queue_campaign
+from apps.bot.tasks.campaigns import retry_campaign_failures
+
+
+@admin.register(Campaign)
+class CampaignAdmin(ModelAdmin):
+    list_display = ('name', 'status', 'scheduled_at', 'total_count', 'sent_count', 'failed_count')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = (
+        'prepared_at',
+        'started_at',
+        'finished_at',
+        'total_count',
+        'sent_count',
+        'failed_count',
+    )
+    actions = ('start_campaigns', 'pause_campaigns', 'retry_failed_deliveries')
+
+    @admin.action(description="Start / resume selected campaigns")
+    def start_campaigns(self, request, queryset) -> None:
+        skipped = [campaign.name for campaign in queryset if not queue_campaign(campaign.pk)]
+        queued = queryset.count() - len(skipped)
+        if queued:
+            self.message_user(request, f"Queued {queued} campaign(s).", messages.SUCCESS)
+        if skipped:
+            self.message_user(
+                request,
+                f"Not queued, still being sent or already finished: {', '.join(skipped)}. "
+                "Try again once the running chunks have stopped.",
+                messages.WARNING,
+            )
+
+    @admin.action(description="Pause selected campaigns")
+    def pause_campaigns(self, request, queryset) -> None:
+        paused = sum(CampaignService.pause(campaign) for campaign in queryset)
+        self.message_user(request, f"Paused {paused} campaign(s).", messages.SUCCESS)
+
+    @admin.action(description="Retry failed deliveries")
+    def retry_failed_deliveries(self, request, queryset) -> None:
+        for campaign in queryset:
+            retry_campaign_failures.delay(campaign.pk)
+        self.message_user(request, f"Queued retries for {queryset.count()} campaign(s).", messages.SUCCESS)
@@ -6,4 +6,4 @@ class BotConfig(AppConfig):
     name = "apps.bot"
 
     def ready(self):
-        pass
+        from apps.bot import signals  # noqa: F401
@@ -1,13 +1,13 @@
 from .start import router as start_router
-from .booking import router as booking_router
-from .stop import router as stop_router
-from .notify import router as notify_router
+from . import booking  # noqa: F401
+from . import stop  # noqa: F401
+from . import notify  # noqa: F401
+
+from apps.bot.utils.routing import text_commands
 
 all_routers = [
     start_router,
-    booking_router,
-    stop_router,
-    notify_router,
+    text_commands.router,
 ]
 
 
@@ -19,6 +19,10 @@ def register_all(dp):
     and includes them into the provided dispatcher instance. It helps organize
     and modularize bot command/event handlers.
 
+    Text commands (menu buttons such as "Booking") are not routers of their
+    own: their modules register them in ``text_commands``, whose single
+    router dispatches them with one dict lookup.
+
     :param dp: Dispatcher instance (usually from aiogram) to which all routers will be attached.
     :type dp: aiogram.Dispatcher
     :return: None
@@ -1,12 +1,9 @@
-from aiogram import F
 from aiogram import types
-from aiogram import Router
 
+from apps.bot.utils.routing import text_commands
 
-router = Router()
 
-
-@router.message(F.text.lower() == "booking")
+@text_commands.command("booking")
 async def booking_handler(message: types.Message) -> None:
     """
     Handle the "booking" text command from a user.
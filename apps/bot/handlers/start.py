@@ -6,7 +6,7 @@ from apps.bot.services.users import UserService
 from apps.bot.keyboards.start import main_menu_keyboard
 
 
-router = Router()
+router = Router(name="start")
 
 
 @router.message(Command("start"))
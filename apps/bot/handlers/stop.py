@@ -1,12 +1,9 @@
-from aiogram import F
 from aiogram import types
-from aiogram import Router
 
+from apps.bot.utils.routing import text_commands
 
-router = Router()
 
-
-@router.message(F.text.lower() == "stop")
+@text_commands.command("stop")
 async def stop_handler(message: types.Message) -> None:
     """
     Handle the "stop" text command from a user.
@@ -1,18 +1,33 @@
 import asyncio
+from contextlib import suppress
+from typing import Any, AsyncIterator
 from urllib.parse import urlparse
 
 from aiogram import Bot, Dispatcher
-from aiogram.client.session.aiohttp import AiohttpSession
-from aiogram.exceptions import TelegramRetryAfter
-from asgiref.sync import sync_to_async
 from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder
 
 from apps.bot.handlers import register_all
+from apps.bot.middlewares.db import DatabaseContextMiddleware
+from apps.bot.middlewares.dedup import register_dedup
+from apps.bot.middlewares.metrics import register_metrics
+from apps.bot.middlewares.tracing import register_tracing
 from apps.bot.models.users import Users
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.broadcast_queue import broadcast_queue
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.services.updates import UpdateQueue
+from apps.bot.services.updates import ChatEventIsolation
+from apps.bot.services.users import user_cache
+from apps.bot.services.users import user_write_buffer
 from apps.bot.utils.logging import logger
+from apps.bot.utils.metrics import StatsGauge
+from apps.bot.utils.metrics import start_metrics_server
 from apps.bot.utils.ngrok import get_ngrok_url
+from apps.bot.utils.telegram import create_session
+from apps.bot.utils.telegram import session_stats
 from src.settings.config.configs import config
 
 
@@ -22,7 +37,18 @@ def build_storage() -> BaseStorage:
         return MemoryStorage()
 
     try:
-        return RedisStorage.from_url(config.REDIS_URL)
+        return RedisStorage.from_url(
+            config.REDIS_URL,
+            connection_kwargs={
+                "max_connections": config.FSM_REDIS_MAX_CONNECTIONS,
+                "socket_timeout": config.FSM_REDIS_TIMEOUT,
+                "socket_connect_timeout": config.FSM_REDIS_TIMEOUT,
+                "health_check_interval": 30,
+            },
+            key_builder=DefaultKeyBuilder(prefix=config.FSM_KEY_PREFIX, with_bot_id=True),
+            state_ttl=config.FSM_STATE_TTL or None,
+            data_ttl=config.FSM_DATA_TTL or None,
+        )
     except Exception as exc:
         logger.warning(
             "Failed to initialize RedisStorage (%s). Falling back to MemoryStorage.",
@@ -31,6 +57,58 @@ def build_storage() -> BaseStorage:
         return MemoryStorage()
 
 
+_storage_fallback = False
+
+
+def fsm_storage_stats() -> dict[str, Any]:
+    """
+    Report which FSM storage backend is actually in use.
+
+    :return: Active backend (``redis`` or ``memory``) and whether it is a
+        fallback from an unreachable Redis.
+    :rtype: dict[str, Any]
+    """
+    return {
+        "backend": "redis" if isinstance(dp.storage, RedisStorage) else "memory",
+        "fallback": _storage_fallback,
+    }
+
+
+async def check_storage() -> None:
+    """
+    Ping the Redis FSM storage once at startup.
+
+    ``RedisStorage`` connects lazily, so an unreachable Redis would otherwise
+    only show up as failing updates. When the ping fails the dispatcher is
+    switched to ``MemoryStorage`` (FSM state is then per process and lost
+    on restart), unless ``FSM_STORAGE_FALLBACK`` is off, in which case the
+    error is raised.
+
+    :return: None
+    :rtype: None
+    """
+    global _storage_fallback
+
+    storage = dp.storage
+    if isinstance(storage, RedisStorage):
+        try:
+            await storage.redis.ping()
+        except Exception as exc:
+            if not config.FSM_STORAGE_FALLBACK:
+                raise
+            logger.error(
+                "FSM Redis storage is unreachable (%s). Falling back to MemoryStorage; "
+                "FSM state is now per process.",
+                exc,
+            )
+            dp.fsm.storage = MemoryStorage()
+            _storage_fallback = True
+            with suppress(Exception):
+                await storage.close()
+
+    logger.info("FSM storage: %s", fsm_storage_stats())
+
+
 async def resolve_webhook_base_url() -> str:
     if config.WEBHOOK_BASE_URL:
         parsed = urlparse(config.WEBHOOK_BASE_URL)
@@ -47,114 +125,176 @@ async def resolve_webhook_base_url() -> str:
     )
 
 
-session = AiohttpSession()
+session = create_session()
 bot = Bot(config.BOT_TOKEN, session=session)
-dp = Dispatcher(storage=build_storage())
+chat_isolation = ChatEventIsolation()
+dp = Dispatcher(storage=build_storage(), events_isolation=chat_isolation)
+update_dedup = register_dedup(dp)
+update_tracing = register_tracing(dp) if config.TRACE_UPDATES else None
+dp.update.outer_middleware(DatabaseContextMiddleware())
+register_metrics(dp)
 
 register_all(dp)
 logger.info("All routers registered")
 
-
-@sync_to_async
-def _fetch_startup_chat_ids() -> list[int]:
-    return list(Users.objects.exclude(chat_id__isnull=True).values_list("chat_id", flat=True))
+update_queue = UpdateQueue(
+    handler=lambda update: dp.feed_update(bot, update),
+    maxsize=config.WEBHOOK_QUEUE_SIZE,
+    workers=config.WEBHOOK_QUEUE_WORKERS,
+    put_timeout=config.WEBHOOK_QUEUE_PUT_TIMEOUT,
+)
+
+StatsGauge(
+    "bot_telegram_session",
+    "Rate limit and 429 retry counters of the bot session.",
+    lambda: session_stats(bot.session),
+)
+StatsGauge(
+    "bot_update_dedup",
+    "Update deduplication counters.",
+    update_dedup.stats,
+)
+StatsGauge(
+    "bot_chat_ordering",
+    "Per-chat ordering lock counters.",
+    chat_isolation.stats,
+)
+StatsGauge(
+    "bot_update_queue",
+    "Webhook update queue counters.",
+    update_queue.stats,
+)
+StatsGauge(
+    "bot_fsm_storage",
+    "Whether FSM storage fell back to memory.",
+    fsm_storage_stats,
+)
+StatsGauge(
+    "bot_user_cache",
+    "Known-user cache counters.",
+    user_cache.stats,
+)
+StatsGauge(
+    "bot_user_write_buffer",
+    "Buffered user upsert counters.",
+    user_write_buffer.stats,
+)
+StatsGauge(
+    "bot_broadcast_queue",
+    "Broadcast jobs run by the bot process.",
+    broadcast_queue.stats,
+)
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _iter_startup_chat_ids(limit: int = 0) -> AsyncIterator[int]:
+    return Users.objects.recipients().astream_chat_ids(limit=limit)
 
 
 async def notify_bot_started() -> None:
     startup_text = "Hi, Bot is Running!"
+    engine = BroadcastEngine(
+        send=lambda chat_id: bot.send_message(chat_id=chat_id, text=startup_text),
+        recorder=DeliveryRecorder(),
+    )
     try:
-        chat_ids = await _fetch_startup_chat_ids()
+        report = await engine.run(_iter_startup_chat_ids(config.STARTUP_NOTIFY_MAX_RECIPIENTS))
     except Exception:
         logger.exception("Failed to fetch startup notification recipients.")
         return
 
-    if not chat_ids:
+    if not report.sent and not report.failed:
         logger.info("No Telegram users found for startup notification.")
         return
 
-    sent = 0
-    failed = 0
-    for chat_id in chat_ids:
-        try:
-            await bot.send_message(chat_id=chat_id, text=startup_text)
-            sent += 1
-        except TelegramRetryAfter as exc:
-            wait_time = getattr(exc, "retry_after", 1)
-            logger.warning(
-                "Rate limited while sending startup notification to chat_id=%s; retrying in %ss.",
-                chat_id,
-                wait_time,
-            )
-            await asyncio.sleep(wait_time)
-            try:
-                await bot.send_message(chat_id=chat_id, text=startup_text)
-                sent += 1
-            except Exception:
-                failed += 1
-                logger.exception(
-                    "Failed to send startup notification after retry to chat_id=%s.",
-                    chat_id,
-                )
-        except Exception:
-            failed += 1
-            logger.exception("Failed to send startup notification to chat_id=%s.", chat_id)
-
-    logger.info("Startup notification completed. sent=%s failed=%s", sent, failed)
+    logger.info(
+        "Startup notification completed. sent=%s failed=%s",
+        report.sent,
+        report.failed,
+    )
+
+
+def schedule_startup_notification() -> None:
+    if not config.STARTUP_NOTIFY_ENABLED:
+        logger.info("Startup notification disabled.")
+        return
+
+    task = asyncio.create_task(notify_bot_started(), name="startup-notification")
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def start_broadcast_queue() -> None:
+    if config.BROADCAST_BACKEND != "bot":
+        return
+
+    task = broadcast_queue.start(bot)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
 async def on_startup() -> None:
+    start_metrics_server(config.METRICS_PORT)
+    await check_storage()
+    start_broadcast_queue()
+
     if config.IS_POLLING:
         logger.info("Polling mode active: webhook setup skipped.")
-        await notify_bot_started()
+        schedule_startup_notification()
         return
 
-    max_retries = 3
-    for attempt in range(1, max_retries + 1):
-        try:
-            webhook_base_url = await resolve_webhook_base_url()
-            webhook_url = f"{webhook_base_url}/bot/webhook/"
-            logger.info("Webhook URL resolved: %s", webhook_url)
-
-            await bot.delete_webhook(drop_pending_updates=True)
-
-            set_webhook_payload = {
-                "url": webhook_url,
-                "allowed_updates": dp.resolve_used_update_types(),
-                "drop_pending_updates": True,
-            }
-            if config.TELEGRAM_WEBHOOK_SECRET:
-                set_webhook_payload["secret_token"] = config.TELEGRAM_WEBHOOK_SECRET
-
-            webhook_set = await bot.set_webhook(**set_webhook_payload)
-            if not webhook_set:
-                raise RuntimeError("Telegram set_webhook returned False.")
-
-            webhook_info = await bot.get_webhook_info()
-            logger.info("Webhook active: %s", webhook_info.url)
-            await notify_bot_started()
-            return
-        except TelegramRetryAfter as exc:
-            wait_time = getattr(exc, "retry_after", 1)
-            logger.warning(
-                "Telegram rate limit on set_webhook (attempt %s/%s). Waiting %ss.",
-                attempt,
-                max_retries,
-                wait_time,
-            )
-            await asyncio.sleep(wait_time)
-        except Exception:
-            logger.exception("Failed to configure webhook.")
-            raise
+    try:
+        webhook_base_url = await resolve_webhook_base_url()
+        webhook_url = f"{webhook_base_url}/bot/webhook/"
+        logger.info("Webhook URL resolved: %s", webhook_url)
+
+        await bot.delete_webhook(drop_pending_updates=True)
+
+        set_webhook_payload = {
+            "url": webhook_url,
+            "allowed_updates": dp.resolve_used_update_types(),
+            "drop_pending_updates": True,
+        }
+        if config.TELEGRAM_WEBHOOK_SECRET:
+            set_webhook_payload["secret_token"] = config.TELEGRAM_WEBHOOK_SECRET
+
+        webhook_set = await bot.set_webhook(**set_webhook_payload)
+        if not webhook_set:
+            raise RuntimeError("Telegram set_webhook returned False.")
+
+        webhook_info = await bot.get_webhook_info()
+        logger.info("Webhook active: %s", webhook_info.url)
+    except Exception:
+        logger.exception("Failed to configure webhook.")
+        raise
 
-    raise RuntimeError(f"Failed to configure webhook after {max_retries} retries.")
+    schedule_startup_notification()
 
 
 async def on_shutdown() -> None:
+    for task in list(_background_tasks):
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+    try:
+        await user_write_buffer.close()
+    except Exception:
+        logger.exception("Failed to write buffered users on shutdown.")
+
     try:
         if not config.IS_POLLING:
             await bot.delete_webhook()
             logger.info("Webhook deleted")
 
+        logger.info("Bot API request stats: %s", session_stats(bot.session))
+        logger.info("Update deduplication stats: %s", update_dedup.stats())
+        logger.info("Chat ordering stats: %s", chat_isolation.stats())
+        if config.BROADCAST_BACKEND == "bot":
+            logger.info("Broadcast queue stats: %s", broadcast_queue.stats())
+        if update_tracing is not None:
+            logger.info("Update tracing stats: %s", update_tracing.stats())
         await bot.session.close()
         logger.info("Bot session closed")
     except Exception:
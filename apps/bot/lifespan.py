@@ -0,0 +1,44 @@
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.bot.instance import check_storage
+from apps.bot.instance import update_queue
+from apps.bot.services.users import user_write_buffer
+from apps.bot.utils.logging import logger
+from src.settings.config.configs import config
+
+
+async def on_web_startup() -> None:
+    """
+    Run when an ASGI worker process starts serving requests.
+
+    Checks that the FSM storage used by the webhook handlers is reachable,
+    and refuses to serve ``/bot/metrics/`` from several workers: each worker
+    has its own registry, so a scrape would read whichever worker answered
+    and counters would jump between scrapes.
+
+    :return: None
+    :rtype: None
+    :raises ImproperlyConfigured: If ``WEB_METRICS`` is on and ``WEB_CONCURRENCY`` is above 1.
+    """
+    if config.WEB_METRICS and config.WEB_CONCURRENCY > 1:
+        raise ImproperlyConfigured(
+            f"WEB_METRICS needs a single web worker, got WEB_CONCURRENCY={config.WEB_CONCURRENCY}; "
+            "set WEB_METRICS=False or scrape the bot and Celery METRICS_PORT endpoints instead."
+        )
+    logger.info("Web worker started (fast-ack=%s).", config.WEBHOOK_FAST_ACK)
+    await check_storage()
+
+
+async def on_web_shutdown() -> None:
+    """
+    Run when an ASGI worker process is shutting down.
+
+    Drains the background update queue so updates that were already
+    acknowledged to Telegram are still processed, then writes buffered
+    user upserts.
+
+    :return: None
+    :rtype: None
+    """
+    await update_queue.drain(timeout=config.WEBHOOK_QUEUE_DRAIN_TIMEOUT)
+    await user_write_buffer.close()
@@ -0,0 +1,5 @@
+from .db import * # noqa
+from .dedup import * # noqa
+from .metrics import * # noqa
+from .ratelimit import * # noqa
+from .tracing import * # noqa
@@ -0,0 +1,158 @@
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from typing import Awaitable
+from contextvars import ContextVar
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from asgiref.sync import SyncToAsync
+from asgiref.sync import sync_to_async
+from asgiref.sync import ThreadSensitiveContext
+from django.db import connections
+
+from apps.bot.utils.tracing import span
+from src.settings.config.configs import config
+
+
+def discard_broken_connections() -> None:
+    """
+    Close database connections of the current thread that errored and are
+    no longer usable, mirroring what Django does at the end of a request.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is None or not connection.errors_occurred:
+            continue
+        if connection.is_usable():
+            connection.errors_occurred = False
+        else:
+            connection.close()
+
+
+_in_request: ContextVar[bool] = ContextVar("orm_in_request", default=False)
+
+
+@contextmanager
+def request_orm_context() -> Iterator[None]:
+    """
+    Mark updates dispatched in the block as processed inside the HTTP
+    request, so :class:`DatabaseContextMiddleware` keeps the request's own
+    thread-sensitive context (and connection) instead of a pooled thread.
+
+    :return: Context manager.
+    :rtype: Iterator[None]
+    """
+    token = _in_request.set(True)
+    try:
+        yield
+    finally:
+        _in_request.reset(token)
+
+
+class PooledThreadSensitiveContext(ThreadSensitiveContext):
+    """
+    :class:`asgiref.sync.ThreadSensitiveContext` that borrows a long-lived
+    single-thread executor instead of creating (and tearing down) one.
+
+    Database connections are thread-local, so a long-lived thread keeps its
+    connection open across updates instead of reconnecting every time.
+
+    Unlike its parent it always takes over, even inside another
+    thread-sensitive context (e.g. one inherited by a background task).
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor) -> None:
+        super().__init__()
+        self.executor = executor
+
+    async def __aenter__(self) -> "PooledThreadSensitiveContext":
+        self.token = SyncToAsync.thread_sensitive_context.set(self)
+        SyncToAsync.context_to_thread_executor[self] = self.executor
+        return self
+
+    async def __aexit__(self, exc, value, tb) -> None:
+        if not self.token:
+            return
+        SyncToAsync.context_to_thread_executor.pop(self, None)
+        SyncToAsync.thread_sensitive_context.reset(self.token)
+
+
+class DatabaseContextMiddleware(BaseMiddleware):
+    """
+    Runs the ORM work of every update on one of ``threads`` dedicated threads.
+
+    Outside of an HTTP request (polling mode, background update consumers)
+    all ``sync_to_async`` calls (including Django's async ORM API such as
+    ``aget_or_create``) share a single thread, so ORM work of concurrent
+    handlers queues up behind each other. This middleware gives each update
+    a thread-sensitive context bound to a thread from a fixed pool: updates
+    run their queries in parallel, each update still sees a single thread
+    (transactions and connection state stay consistent), and the pool size
+    bounds the number of database connections. Updates dispatched by the
+    webhook view inside its request (see :func:`request_orm_context`) keep
+    the request's own context. Waiting for a free thread shows up as an
+    ``orm_wait`` span in traced updates.
+    """
+
+    def __init__(self, threads: int = config.BOT_DB_THREADS) -> None:
+        """
+        :param threads: Number of ORM threads (and database connections).
+        :type threads: int
+        """
+        self.threads = max(1, threads)
+        self._idle = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="bot-orm")
+            for _ in range(self.threads)
+        ]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._available: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._available = asyncio.Semaphore(len(self._idle))
+        return self._available
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """
+        Run the handler inside a pooled thread-sensitive context.
+
+        :param handler: Next handler in the middleware chain.
+        :type handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+        :param event: Incoming update.
+        :type event: aiogram.types.TelegramObject
+        :param data: Handler context data.
+        :type data: Dict[str, Any]
+        :return: Handler result.
+        :rtype: Any
+        """
+        if _in_request.get():
+            return await handler(event, data)
+
+        available = self._semaphore()
+        with span("orm_wait"):
+            await available.acquire()
+        try:
+            executor = self._idle.pop()
+            try:
+                async with PooledThreadSensitiveContext(executor):
+                    try:
+                        return await handler(event, data)
+                    except Exception:
+                        await sync_to_async(discard_broken_connections)()
+                        raise
+            finally:
+                self._idle.append(executor)
+        finally:
+            available.release()
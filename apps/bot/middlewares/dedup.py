@@ -0,0 +1,165 @@
+from typing import Any
+from typing import Dict
+from typing import Callable
+from typing import Optional
+from typing import Awaitable
+
+import redis
+from aiogram import BaseMiddleware
+from aiogram import Dispatcher
+from aiogram.types import Update
+from aiogram.types import TelegramObject
+
+from apps.bot.utils.cache import TTLCache
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import create_async_redis
+from src.settings.config.configs import config
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """
+    Drops updates whose ``update_id`` was already seen.
+
+    Telegram redelivers a webhook update when the previous delivery was not
+    acknowledged in time, so a slow handler can receive the same update
+    twice. Every ``update_id`` is remembered in an in-process
+    :class:`TTLCache` of the last ``window`` updates and, when ``use_redis``
+    is set, in a shared Redis key (``SET NX EX``) so replicas behind a load
+    balancer see each other's updates. Both checks are O(1); the Redis one
+    runs on the event loop through an asyncio client.
+
+    An update whose handlers raise is forgotten again, so Telegram's
+    redelivery after the failed (``500``) answer is processed.
+    """
+
+    def __init__(
+        self,
+        window: int = config.UPDATE_DEDUP_WINDOW,
+        ttl: int = config.UPDATE_DEDUP_TTL,
+        use_redis: bool = config.UPDATE_DEDUP_REDIS,
+        prefix: str = "updates:seen:",
+    ) -> None:
+        """
+        :param window: Number of recent ``update_id`` values kept in-process.
+        :type window: int
+        :param ttl: Seconds an ``update_id`` is remembered.
+        :type ttl: int
+        :param use_redis: Whether to share seen updates through ``config.REDIS_URL``.
+        :type use_redis: bool
+        :param prefix: Redis key prefix.
+        :type prefix: str
+        """
+        self.local = TTLCache(maxsize=window, ttl=ttl)
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.prefix = prefix
+        self.redis: Any = None
+
+        self.processed = 0
+        self.duplicates = 0
+        self.redis_duplicates = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Processed updates and dropped duplicates (total and those
+            only detected through Redis).
+        :rtype: dict[str, int]
+        """
+        return {
+            "processed": self.processed,
+            "duplicates": self.duplicates,
+            "redis_duplicates": self.redis_duplicates,
+        }
+
+    def _key(self, bot_id: Any, update_id: int) -> str:
+        return f"{self.prefix}{bot_id}:{update_id}"
+
+    def _client(self) -> Any:
+        if self.redis is None:
+            self.redis = create_async_redis()
+        return self.redis
+
+    async def _claim_remote(self, key: str) -> bool:
+        try:
+            return bool(await self._client().set(key, 1, nx=True, ex=self.ttl))
+        except redis.RedisError as exc:
+            logger.warning("Redis update deduplication unavailable: %s", exc)
+            return True
+
+    async def _release_remote(self, key: str) -> None:
+        try:
+            await self._client().delete(key)
+        except redis.RedisError as exc:
+            logger.warning("Redis update deduplication unavailable: %s", exc)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """
+        Process the update unless it is a duplicate.
+
+        :param handler: Next handler in the middleware chain.
+        :type handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+        :param event: Incoming update.
+        :type event: aiogram.types.TelegramObject
+        :param data: Handler context data.
+        :type data: Dict[str, Any]
+        :return: Handler result, or ``None`` for a duplicate.
+        :rtype: Any
+        """
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        bot = data.get("bot")
+        key = self._key(bot.id if bot is not None else 0, event.update_id)
+
+        if not self.local.add(key):
+            self.duplicates += 1
+            logger.info("Dropped duplicate update id=%s.", event.update_id)
+            return None
+
+        if self.use_redis:
+            claimed = await self._claim_remote(key)
+            if not claimed:
+                self.duplicates += 1
+                self.redis_duplicates += 1
+                logger.info("Dropped duplicate update id=%s seen by another replica.", event.update_id)
+                return None
+
+        self.processed += 1
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.local.delete(key)
+            if self.use_redis:
+                await self._release_remote(key)
+            raise
+
+
+def register_dedup(
+    dp: Dispatcher,
+    middleware: Optional[UpdateDeduplicationMiddleware] = None,
+) -> UpdateDeduplicationMiddleware:
+    """
+    Register the deduplication middleware on ``dp`` ahead of aiogram's FSM
+    middleware.
+
+    The FSM middleware holds the chat lock (``events_isolation``) around
+    everything after it, so a redelivered update checked behind it would
+    wait for the still-running original before being dropped.
+
+    :param dp: Dispatcher to register the middleware on.
+    :type dp: aiogram.Dispatcher
+    :param middleware: Middleware to register; a default one when omitted.
+    :type middleware: Optional[UpdateDeduplicationMiddleware]
+    :return: The registered middleware.
+    :rtype: UpdateDeduplicationMiddleware
+    """
+    middleware = middleware or UpdateDeduplicationMiddleware()
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(middleware)
+    dp.update.outer_middleware(dp.fsm)
+    return middleware
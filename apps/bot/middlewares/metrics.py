@@ -0,0 +1,156 @@
+import time
+from typing import Any
+from typing import Dict
+from typing import Callable
+from typing import Awaitable
+
+from aiogram import Bot
+from aiogram import Dispatcher
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from aiogram.types import TelegramObject
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+
+from apps.bot.utils.metrics import db_queries
+from apps.bot.utils.metrics import handler_errors
+from apps.bot.utils.metrics import update_queries
+from apps.bot.utils.metrics import update_duration
+from apps.bot.utils.metrics import handler_duration
+from apps.bot.utils.metrics import counting_queries
+from apps.bot.utils.metrics import telegram_duration
+from apps.bot.utils.metrics import telegram_requests
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer update middleware recording how long each update takes, by update
+    type, and how many database queries its handlers run.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """
+        Run the update and record its duration and query count.
+
+        :param handler: Next handler in the middleware chain.
+        :type handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+        :param event: Incoming update.
+        :type event: aiogram.types.TelegramObject
+        :param data: Handler context data.
+        :type data: Dict[str, Any]
+        :return: Handler result.
+        :rtype: Any
+        """
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        with counting_queries() as queries:
+            try:
+                return await handler(event, data)
+            finally:
+                update_duration.labels(event_type).observe(time.perf_counter() - started)
+                update_queries.observe(queries[0])
+                if queries[0]:
+                    db_queries.inc(queries[0])
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware recording handler duration and errors by the name of
+    the router that handled the event.
+
+    Outer update middlewares run before routing, so the router is only known
+    to inner middlewares; :func:`register_metrics` registers one on every
+    event type of the dispatcher, from where it applies to all routers.
+    """
+
+    def __init__(self, event: str) -> None:
+        """
+        :param event: Event type of the observer, e.g. ``message``.
+        :type event: str
+        """
+        self.event = event
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """
+        Run the handler and record its duration.
+
+        :param handler: Handler wrapped by the middleware.
+        :type handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+        :param event: Routed event.
+        :type event: aiogram.types.TelegramObject
+        :param data: Handler context data.
+        :type data: Dict[str, Any]
+        :return: Handler result.
+        :rtype: Any
+        """
+        router = data.get("event_router")
+        name = router.name if router is not None else "unknown"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.labels(name, self.event).inc()
+            raise
+        finally:
+            handler_duration.labels(name, self.event).observe(time.perf_counter() - started)
+
+
+def register_metrics(dp: Dispatcher) -> None:
+    """
+    Register the update and handler metrics middlewares on ``dp``.
+
+    :param dp: Dispatcher to instrument.
+    :type dp: aiogram.Dispatcher
+    :return: None
+    :rtype: None
+    """
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(HandlerMetricsMiddleware(name))
+
+
+class MetricsRequestMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware recording Bot API call latency and results.
+
+    It is the innermost middleware of :func:`apps.bot.utils.telegram.create_session`,
+    so every HTTP round trip is measured on its own: time spent waiting for
+    the rate limiter is excluded and each ``429`` answer is counted, even
+    when the call is then retried.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        result = "ok"
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            result = "retry_after"
+            raise
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            telegram_duration.labels(name).observe(time.perf_counter() - started)
+            telegram_requests.labels(name, result).inc()
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response
+from aiogram.methods import GetUpdates
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+
+from apps.bot.utils.logging import logger
+from apps.bot.utils.ratelimit import RateLimiter
+from apps.bot.utils.ratelimit import get_rate_limiter
+from apps.bot.utils.tracing import span
+from src.settings.config.configs import config
+
+
+class RateLimitRequestMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware pacing outgoing Bot API calls with a :class:`RateLimiter`.
+
+    Every call except ``getUpdates`` waits for the global limit; calls
+    addressed to a chat (any method with a ``chat_id``) also wait for that
+    chat's limit. Registered on every session made by
+    :func:`apps.bot.utils.telegram.create_session`, so handler replies,
+    notifications and broadcasts share one budget across the bot process and
+    all Celery workers.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None) -> None:
+        """
+        :param limiter: Limiter to use. Defaults to :func:`get_rate_limiter`.
+        :type limiter: Optional[RateLimiter]
+        """
+        self.limiter = limiter or get_rate_limiter()
+        self.calls = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, GetUpdates):
+            self.calls += 1
+            with span("rate_limit"):
+                wait = await self.limiter.acquire(getattr(method, "chat_id", None))
+            if wait > 0:
+                self.throttled += 1
+                self.throttled_seconds += wait
+        return await make_request(bot, method)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        :return: Paced calls, calls that had to wait and the total wait.
+        :rtype: dict[str, Any]
+        """
+        return {
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+
+class RetryAfterRequestMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware retrying Bot API calls answered with ``429``.
+
+    On :class:`TelegramRetryAfter` the flood-limited chat (or, for methods
+    without a ``chat_id``, every call) is held back in the shared
+    :class:`RateLimiter` for ``retry_after`` seconds, so other processes back
+    off too, and the call is repeated after that delay. Calls are given up,
+    re-raising the error, after ``max_retries`` retries or when Telegram asks
+    to wait longer than ``max_delay``; callers then see the same exception as
+    without the middleware.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = config.TELEGRAM_RETRY_ATTEMPTS,
+        max_delay: float = config.TELEGRAM_MAX_RETRY_AFTER,
+    ) -> None:
+        """
+        :param limiter: Limiter to hold back. Defaults to :func:`get_rate_limiter`.
+        :type limiter: Optional[RateLimiter]
+        :param max_retries: Retries per call before the error is re-raised.
+        :type max_retries: int
+        :param max_delay: Longest ``retry_after`` in seconds that is waited out.
+        :type max_delay: float
+        """
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        self.max_delay = max_delay
+        self.retried = 0
+        self.gave_up = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        retries = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                if retries >= self.max_retries or exc.retry_after > self.max_delay:
+                    self.gave_up += 1
+                    raise
+
+                retries += 1
+                self.retried += 1
+                logger.warning(
+                    "Telegram flood control on %s for chat_id=%s; retry %s/%s in %ss.",
+                    method.__api_method__,
+                    chat_id,
+                    retries,
+                    self.max_retries,
+                    exc.retry_after,
+                )
+                await self.limiter.penalize(chat_id, exc.retry_after)
+                with span("retry_after", str(exc.retry_after)):
+                    await asyncio.sleep(exc.retry_after)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        :return: Retried calls and calls given up after ``429`` answers.
+        :rtype: dict[str, Any]
+        """
+        return {"retried": self.retried, "gave_up": self.gave_up}
@@ -0,0 +1,223 @@
+import io
+import random
+import pstats
+import cProfile
+from typing import Any
+from typing import Dict
+from typing import Callable
+from typing import Optional
+from typing import Awaitable
+
+from aiogram import Bot
+from aiogram import Dispatcher
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from aiogram.types import TelegramObject
+from aiogram.methods import Response
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+
+from apps.bot.utils.logging import logger
+from apps.bot.utils.tracing import Trace
+from apps.bot.utils.tracing import span
+from apps.bot.utils.tracing import start_trace
+from src.settings.config.configs import config
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """
+    Outer update middleware recording a span tree for every update.
+
+    The tree holds the handlers, the wait for an ORM thread, every database
+    query and every Bot API call (with its rate limit and ``429`` waits).
+    Updates slower than ``slow_threshold`` seconds are logged with the tree
+    and the time per span kind, for a ``slow_sample_rate`` fraction of them.
+
+    A ``profile_rate`` fraction of updates is also profiled and logged with
+    the profile. ``cprofile`` profiles the event loop thread, so the profile
+    includes other updates running meanwhile; ``pyinstrument`` (when
+    installed) attributes time to the awaiting coroutine. One update is
+    profiled at a time.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = config.TRACE_SLOW_THRESHOLD,
+        slow_sample_rate: float = config.TRACE_SLOW_SAMPLE_RATE,
+        profile_rate: float = config.TRACE_PROFILE_RATE,
+        profiler: str = config.TRACE_PROFILER,
+    ) -> None:
+        """
+        :param slow_threshold: Seconds above which an update is logged as slow.
+        :type slow_threshold: float
+        :param slow_sample_rate: Fraction of slow updates that are logged.
+        :type slow_sample_rate: float
+        :param profile_rate: Fraction of updates that are profiled.
+        :type profile_rate: float
+        :param profiler: ``cprofile`` or ``pyinstrument``.
+        :type profiler: str
+        """
+        if profiler == "pyinstrument" and Profiler is None:
+            logger.warning("pyinstrument is not installed; profiling updates with cProfile.")
+            profiler = "cprofile"
+
+        self.slow_threshold = slow_threshold
+        self.slow_sample_rate = slow_sample_rate
+        self.profile_rate = profile_rate
+        self.profiler = profiler
+        self._profiling = False
+
+        self.traced = 0
+        self.slow = 0
+        self.profiled = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Traced, slow and profiled update counts.
+        :rtype: dict[str, int]
+        """
+        return {"traced": self.traced, "slow": self.slow, "profiled": self.profiled}
+
+    def _start_profile(self) -> Optional[Any]:
+        if self._profiling or not self.profile_rate or random.random() >= self.profile_rate:
+            return None
+
+        self._profiling = True
+        if self.profiler == "pyinstrument":
+            profile = Profiler(async_mode="enabled")
+            profile.start()
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+        return profile
+
+    def _stop_profile(self, profile: Optional[Any]) -> Optional[str]:
+        if profile is None:
+            return None
+
+        self._profiling = False
+        self.profiled += 1
+        if self.profiler == "pyinstrument":
+            profile.stop()
+            return profile.output_text()
+
+        profile.disable()
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(25)
+        return output.getvalue()
+
+    def _report(self, trace: Trace, profile: Optional[str]) -> None:
+        elapsed = trace.root.elapsed
+        if elapsed >= self.slow_threshold:
+            self.slow += 1
+            if random.random() < self.slow_sample_rate:
+                logger.warning(
+                    "Slow update %s: %.1f ms, seconds by kind %s\n%s",
+                    trace.root.name,
+                    elapsed * 1000,
+                    trace.breakdown(),
+                    trace.format(),
+                )
+        if profile is not None:
+            logger.info(
+                "Profiled update %s: %.1f ms\n%s\n%s",
+                trace.root.name,
+                elapsed * 1000,
+                trace.format(),
+                profile,
+            )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """
+        Run the update inside a trace.
+
+        :param handler: Next handler in the middleware chain.
+        :type handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+        :param event: Incoming update.
+        :type event: aiogram.types.TelegramObject
+        :param data: Handler context data.
+        :type data: Dict[str, Any]
+        :return: Handler result.
+        :rtype: Any
+        """
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        self.traced += 1
+        profile = self._start_profile()
+        try:
+            with start_trace(f"{event.event_type} id={event.update_id}") as trace:
+                return await handler(event, data)
+        finally:
+            self._report(trace, self._stop_profile(profile))
+
+
+class HandlerSpanMiddleware(BaseMiddleware):
+    """
+    Inner middleware opening a ``handler`` span named after the router.
+    """
+
+    def __init__(self, event: str) -> None:
+        """
+        :param event: Event type of the observer, e.g. ``message``.
+        :type event: str
+        """
+        self.event = event
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = data.get("event_router")
+        with span("handler", f"{router.name if router is not None else 'unknown'}:{self.event}"):
+            return await handler(event, data)
+
+
+def register_tracing(dp: Dispatcher) -> UpdateTracingMiddleware:
+    """
+    Register the update and handler tracing middlewares on ``dp``.
+
+    Call it before the other outer middlewares so the trace covers them.
+
+    :param dp: Dispatcher to instrument.
+    :type dp: aiogram.Dispatcher
+    :return: The registered update middleware.
+    :rtype: UpdateTracingMiddleware
+    """
+    middleware = UpdateTracingMiddleware()
+    dp.update.outer_middleware(middleware)
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(HandlerSpanMiddleware(name))
+    return middleware
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware opening an ``api`` span per Bot API call made while
+    an update is traced. Registered outermost, so the span includes the
+    rate limit and ``429`` retry waits, which show up as its children.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with span("api", method.__api_method__):
+            return await make_request(bot, method)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='users',
+            name='blocked',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='users',
+            name='last_delivered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='users',
+            name='last_error',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='users',
+            index=models.Index(condition=models.Q(('blocked', False)), fields=['id'], name='users_reachable_idx'),
+        ),
+    ]
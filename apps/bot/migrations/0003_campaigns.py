@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0002_users_delivery_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255)),
+                ('text', models.TextField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('running', 'Running'), ('paused', 'Paused'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], db_index=True, default='draft', max_length=16)),
+                ('scheduled_at', models.DateTimeField(blank=True, null=True)),
+                ('prepared_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Campaign',
+                'verbose_name_plural': 'Campaigns',
+                'db_table': 'campaigns',
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Sent'), (2, 'Failed')], default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='bot.campaign')),
+            ],
+            options={
+                'verbose_name': 'Campaign delivery',
+                'verbose_name_plural': 'Campaign deliveries',
+                'db_table': 'campaign_deliveries',
+                'indexes': [models.Index(fields=['campaign', 'status', 'id'], name='campaign_delivery_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'chat_id'), name='campaign_delivery_unique_chat')],
+            },
+        ),
+    ]
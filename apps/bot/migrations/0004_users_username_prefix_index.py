@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def create_username_prefix_index(apps, schema_editor):
+    """
+    Index ``UPPER(username)`` for the admin's ``^username`` search, which
+    PostgreSQL runs as ``UPPER(username::text) LIKE UPPER('prefix%')``.
+
+    ``text_pattern_ops`` lets ``LIKE`` prefix matches use the index under
+    any collation. Built concurrently so the users table stays writable.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "users_username_prefix_idx" '
+        'ON "users" (UPPER("username"::text) text_pattern_ops)'
+    )
+
+
+def drop_username_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "users_username_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('bot', '0003_campaigns'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_prefix_index, drop_username_prefix_index),
+    ]
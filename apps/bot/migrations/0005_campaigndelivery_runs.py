@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_users_username_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='campaigndelivery',
+            old_name='attempts',
+            new_name='runs',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_campaigndelivery_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='recipient_filter',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1 +1,2 @@
 from .users import * # noqa
+from .campaigns import * # noqa
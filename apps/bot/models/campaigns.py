@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from django.db import models
+
+from src.settings.db.postgres.mixins.timestamp import TimestampMixin
+
+
+class Campaign(TimestampMixin):
+    """
+    A message broadcast to every reachable user, or to users selected in the
+    admin.
+
+    Recipients are materialized once into :class:`CampaignDelivery` rows, so
+    a campaign can be paused, resumed and have its failures retried without
+    scanning the users table or messaging anyone twice. A campaign for a
+    filtered admin selection keeps the filter in ``recipient_filter`` until
+    its first run builds the rows.
+    """
+
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        SCHEDULED = "scheduled", "Scheduled"
+        RUNNING = "running", "Running"
+        PAUSED = "paused", "Paused"
+        COMPLETED = "completed", "Completed"
+        CANCELLED = "cancelled", "Cancelled"
+
+    name: str = models.CharField(max_length=255)
+    text: str = models.TextField()
+    status: str = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.DRAFT,
+        db_index=True,
+    )
+    scheduled_at: datetime | None = models.DateTimeField(null=True, blank=True)
+    prepared_at: datetime | None = models.DateTimeField(null=True, blank=True)
+    started_at: datetime | None = models.DateTimeField(null=True, blank=True)
+    finished_at: datetime | None = models.DateTimeField(null=True, blank=True)
+    recipient_filter: dict | None = models.JSONField(null=True, blank=True, editable=False)
+    total_count: int = models.PositiveIntegerField(default=0)
+    sent_count: int = models.PositiveIntegerField(default=0)
+    failed_count: int = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """
+        Django model metadata configuration.
+        """
+
+        db_table = "campaigns"
+        verbose_name = "Campaign"
+        verbose_name_plural = "Campaigns"
+
+    def __str__(self) -> str:
+        """
+        Return a human-readable string representation of the campaign.
+
+        :return: The campaign name.
+        :rtype: str
+        """
+        return self.name
+
+
+class CampaignDelivery(models.Model):
+    """
+    Delivery state of one campaign message to one chat.
+
+    Rows are deliberately small (no timestamps besides ``sent_at``) since a
+    campaign has one per recipient; they are created with bulk inserts and
+    updated in batches by chat_id. ``runs`` counts the campaign runs that
+    sent (or gave up on) the message, not the sends of the engine's retries
+    within a run.
+    """
+
+    class Status(models.IntegerChoices):
+        PENDING = 0, "Pending"
+        SENT = 1, "Sent"
+        FAILED = 2, "Failed"
+
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        db_index=False,
+    )
+    chat_id: int = models.BigIntegerField()
+    status: int = models.PositiveSmallIntegerField(
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    runs: int = models.PositiveSmallIntegerField(default=0)
+    error: str | None = models.CharField(max_length=255, null=True, blank=True)
+    sent_at: datetime | None = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """
+        Django model metadata configuration.
+        """
+
+        db_table = "campaign_deliveries"
+        verbose_name = "Campaign delivery"
+        verbose_name_plural = "Campaign deliveries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["campaign", "chat_id"],
+                name="campaign_delivery_unique_chat",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["campaign", "status", "id"],
+                name="campaign_delivery_status_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Return a human-readable string representation of the delivery.
+
+        :return: Campaign and chat ID.
+        :rtype: str
+        """
+        return f"{self.campaign_id}:{self.chat_id}"
@@ -1,8 +1,165 @@
+import re
+from datetime import datetime
+from typing import Any
+from typing import Iterator
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.utils import prepare_lookup_value
 from django.db import models
 
+from src.settings.config.configs import config
 from src.settings.db.postgres.mixins.timestamp import TimestampMixin
 
 
+CHAT_ID_RE = re.compile(r"-?\d+")
+
+
+class UsersQuerySet(models.QuerySet):
+    """
+    Query helpers for selecting and streaming broadcast recipients.
+    """
+
+    def recipients(self) -> "UsersQuerySet":
+        """
+        Users that can receive messages, i.e. have not blocked the bot.
+
+        Backed by the partial ``users_reachable_idx`` index, so streaming
+        recipients in ``id`` order never scans blocked users.
+
+        :return: Filtered queryset.
+        :rtype: UsersQuerySet
+        """
+        return self.filter(blocked=False).exclude(chat_id__isnull=True)
+
+    def created_after(self, moment: datetime) -> "UsersQuerySet":
+        """
+        Users that first started the bot after ``moment``.
+
+        :param moment: Lower bound (exclusive) of ``created_at``.
+        :type moment: datetime
+        :return: Filtered queryset.
+        :rtype: UsersQuerySet
+        """
+        return self.filter(created_at__gt=moment)
+
+    def active_since(self, moment: datetime) -> "UsersQuerySet":
+        """
+        Users whose record was touched (e.g. by ``/start``) since ``moment``.
+
+        :param moment: Lower bound (inclusive) of ``updated_at``.
+        :type moment: datetime
+        :return: Filtered queryset.
+        :rtype: UsersQuerySet
+        """
+        return self.filter(updated_at__gte=moment)
+
+    def search(self, term: str) -> "UsersQuerySet":
+        """
+        Users matching a Users admin search.
+
+        A numeric term is an exact ``chat_id`` lookup; anything else matches
+        the start of the username, ignoring a leading ``@``.
+
+        :param term: Search term.
+        :type term: str
+        :return: Filtered queryset.
+        :rtype: UsersQuerySet
+        """
+        term = term.strip()
+        if CHAT_ID_RE.fullmatch(term):
+            return self.filter(chat_id=int(term))
+        term = term.lstrip("@")
+        return self.filter(username__istartswith=term) if term else self
+
+    def matching(self, recipient_filter: dict[str, Any]) -> "UsersQuerySet":
+        """
+        Users selected by a filter saved from the Users admin changelist.
+
+        :param recipient_filter: ``lookups`` (changelist filter parameters,
+            a list of values per lookup) and ``search`` (search term).
+        :type recipient_filter: dict[str, Any]
+        :return: Filtered queryset.
+        :rtype: UsersQuerySet
+        """
+        users = self
+        for lookup, values in recipient_filter.get("lookups", {}).items():
+            for value in values:
+                users = users.filter(**{lookup: prepare_lookup_value(lookup, value)})
+        return users.search(recipient_filter.get("search", ""))
+
+    def _chat_id_page(self, after: int | None, page_size: int) -> list[tuple[int, int]]:
+        page = self.order_by("pk")
+        if after is not None:
+            page = page.filter(pk__gt=after)
+        return list(page.values_list("pk", "chat_id")[:page_size])
+
+    def stream_chat_ids(
+        self,
+        page_size: int = config.RECIPIENT_PAGE_SIZE,
+        limit: int = 0,
+    ) -> Iterator[int]:
+        """
+        Yield ``chat_id`` of every user in the queryset, ordered by ``id``.
+
+        Rows are read in keyset pages (``WHERE id > last_id ORDER BY id
+        LIMIT page_size``), so memory stays flat for any table size, every
+        page is a short indexed query, and no cursor is held open between
+        pages.
+
+        :param page_size: Rows fetched per query.
+        :type page_size: int
+        :param limit: Maximum number of chat IDs to yield (``0`` = no limit).
+        :type limit: int
+        :return: Iterator of chat IDs.
+        :rtype: Iterator[int]
+        """
+        yielded = 0
+        after = None
+        while True:
+            size = page_size if not limit else min(page_size, limit - yielded)
+            if size <= 0:
+                return
+
+            page = self._chat_id_page(after, size)
+            for after, chat_id in page:
+                yield chat_id
+            yielded += len(page)
+            if len(page) < size:
+                return
+
+    async def astream_chat_ids(
+        self,
+        page_size: int = config.RECIPIENT_PAGE_SIZE,
+        limit: int = 0,
+    ) -> AsyncIterator[int]:
+        """
+        Async variant of :meth:`stream_chat_ids`; each page is one
+        ``sync_to_async`` call, so consumers await only once per page.
+
+        :param page_size: Rows fetched per query.
+        :type page_size: int
+        :param limit: Maximum number of chat IDs to yield (``0`` = no limit).
+        :type limit: int
+        :return: Async iterator of chat IDs.
+        :rtype: AsyncIterator[int]
+        """
+        fetch_page = sync_to_async(self._chat_id_page)
+        yielded = 0
+        after = None
+        while True:
+            size = page_size if not limit else min(page_size, limit - yielded)
+            if size <= 0:
+                return
+
+            page = await fetch_page(after, size)
+            for after, chat_id in page:
+                yield chat_id
+            yielded += len(page)
+            if len(page) < size:
+                return
+
+
 class Users(TimestampMixin):
     """
     Represents a Telegram user in the system.
@@ -24,6 +181,18 @@ class Users(TimestampMixin):
         null=True,
         blank=True,
     )
+    blocked: bool = models.BooleanField(default=False)
+    last_error: str | None = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+    )
+    last_delivered_at: datetime | None = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+
+    objects = UsersQuerySet.as_manager()
 
     class Meta:
         """
@@ -33,6 +202,23 @@ class Users(TimestampMixin):
         db_table = "users"
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="users_reachable_idx",
+                condition=models.Q(blocked=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db: str, field_names: list[str], values: list) -> "Users":
+        """
+        Remember the loaded ``chat_id``, so a changed ``chat_id`` is noticed
+        on save without reading the row again.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_chat_id = instance.__dict__.get("chat_id")
+        return instance
 
     def __str__(self) -> str:
         """
@@ -1 +1,6 @@
 from .users import * # noqa
+from .updates import * # noqa
+from .delivery import * # noqa
+from .broadcast import * # noqa
+from .campaigns import * # noqa
+from .broadcast_queue import * # noqa
@@ -0,0 +1,364 @@
+import json
+import time
+import asyncio
+from typing import Any
+from typing import Union
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import Awaitable
+from typing import AsyncIterable
+from dataclasses import dataclass
+
+from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError
+
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import get_redis
+from apps.bot.utils.ratelimit import RateLimiter
+from src.settings.config.configs import config
+
+
+SendFunc = Callable[[int], Awaitable[Any]]
+ChatIds = Union[Iterable[int], AsyncIterable[int]]
+Chunk = tuple[Optional[int], Optional[int]]
+
+
+@dataclass
+class BroadcastReport:
+    """
+    Outcome of a broadcast run.
+    """
+
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Delivered messages per second.
+
+        :return: Messages per second over the whole run.
+        :rtype: float
+        """
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Serialize the report, e.g. as a Celery task result.
+
+        :return: Report fields plus throughput.
+        :rtype: dict[str, Any]
+        """
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 2),
+        }
+
+
+class BroadcastEngine:
+    """
+    Sends one message to many chats concurrently within Telegram's limits.
+
+    - ``concurrency`` worker tasks pull chat IDs from a small bounded queue,
+      so memory stays flat for any number of recipients.
+    - Sends made through a :func:`apps.bot.utils.telegram.create_session`
+      bot are paced by its shared rate limiter; any other ``send`` can be
+      paced by passing a :class:`RateLimiter` as ``limiter``.
+    - ``TelegramRetryAfter`` that the session gave up retrying and transient
+      errors reschedule only the affected chat after the requested delay; the
+      worker moves on to the next chat.
+    - Permanent errors (blocked bot, unknown chat) are counted as failed
+      without retrying.
+
+    The actual send is injected as ``send(chat_id)``, so the same engine
+    drives Celery broadcasts and in-process notifications alike. Outcomes are
+    reported to an optional :class:`DeliveryRecorder`, which is flushed
+    whenever a batch is full and at the end of the run.
+    """
+
+    def __init__(
+        self,
+        send: SendFunc,
+        concurrency: int = config.BROADCAST_CONCURRENCY,
+        max_attempts: int = config.BROADCAST_MAX_ATTEMPTS,
+        retry_backoff: float = 1.0,
+        limiter: Optional[RateLimiter] = None,
+        recorder: Optional[DeliveryRecorder] = None,
+    ) -> None:
+        """
+        :param send: Coroutine function delivering the message to one chat.
+        :type send: Callable[[int], Awaitable[Any]]
+        :param concurrency: Number of concurrent sends.
+        :type concurrency: int
+        :param max_attempts: Attempts per chat before it is counted as failed.
+        :type max_attempts: int
+        :param retry_backoff: Seconds per attempt to wait after a transient error.
+        :type retry_backoff: float
+        :param limiter: Limiter to wait for before every send, for ``send``
+            functions that are not rate limited themselves.
+        :type limiter: Optional[RateLimiter]
+        :param recorder: Collector of per-chat delivery outcomes.
+        :type recorder: Optional[DeliveryRecorder]
+        """
+        self.send = send
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.limiter = limiter
+        self.recorder = recorder
+
+        self.report = BroadcastReport()
+        self._retries: set[asyncio.Task] = set()
+        self._flushes: set[asyncio.Task] = set()
+
+    async def run(self, chat_ids: ChatIds) -> BroadcastReport:
+        """
+        Deliver the message to every chat in ``chat_ids``.
+
+        :param chat_ids: Recipients, as a sync or async iterable.
+        :type chat_ids: Iterable[int] | AsyncIterable[int]
+        :return: Sent/failed/retried counters and throughput.
+        :rtype: BroadcastReport
+        """
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            if isinstance(chat_ids, AsyncIterable):
+                async for chat_id in chat_ids:
+                    await queue.put(chat_id)
+            else:
+                for chat_id in chat_ids:
+                    await queue.put(chat_id)
+
+            await queue.join()
+            while self._retries:
+                await asyncio.gather(*list(self._retries))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for task in self._retries:
+                task.cancel()
+            await self._flush_recorder()
+
+        self.report.elapsed = time.monotonic() - started
+        logger.info("Broadcast completed: %s", self.report.as_dict())
+        return self.report
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            chat_id = await queue.get()
+            try:
+                await self._deliver(chat_id, attempt=1)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, chat_id: int, attempt: int) -> None:
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire(chat_id)
+            await self.send(chat_id)
+        except TelegramRetryAfter as exc:
+            self._reschedule(chat_id, attempt, exc.retry_after, exc)
+        except (TelegramForbiddenError, TelegramBadRequest) as exc:
+            self.report.failed += 1
+            self._record(chat_id, exc)
+            logger.warning("Broadcast to chat_id=%s failed permanently: %s", chat_id, exc)
+        except (TelegramAPIError, OSError, asyncio.TimeoutError) as exc:
+            self._reschedule(chat_id, attempt, attempt * self.retry_backoff, exc)
+        except Exception as exc:
+            self.report.failed += 1
+            self._record(chat_id, exc)
+            logger.exception("Unexpected error while broadcasting to chat_id=%s.", chat_id)
+        else:
+            self.report.sent += 1
+            self._record(chat_id)
+
+    def _record(self, chat_id: int, exc: Optional[Exception] = None) -> None:
+        if self.recorder is None:
+            return
+
+        if exc is None:
+            self.recorder.delivered(chat_id)
+        else:
+            self.recorder.failed(chat_id, exc)
+
+        if self.recorder.pending >= self.recorder.batch_size:
+            task = asyncio.create_task(self._flush_recorder())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush_recorder(self) -> None:
+        if self.recorder is None:
+            return
+        try:
+            await self.recorder.flush()
+        except Exception:
+            logger.exception("Failed to record broadcast delivery outcomes.")
+        if self._flushes and asyncio.current_task() not in self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    def _reschedule(self, chat_id: int, attempt: int, delay: float, exc: Exception) -> None:
+        if attempt >= self.max_attempts:
+            self.report.failed += 1
+            self._record(chat_id, exc)
+            logger.warning(
+                "Broadcast to chat_id=%s failed after %s attempts: %s",
+                chat_id,
+                attempt,
+                exc,
+            )
+            return
+
+        self.report.retried += 1
+        logger.info("Retrying broadcast to chat_id=%s in %ss: %s", chat_id, delay, exc)
+        task = asyncio.create_task(self._retry_later(chat_id, attempt + 1, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _retry_later(self, chat_id: int, attempt: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._deliver(chat_id, attempt)
+
+
+def plan_keyset_chunks(queryset: Any, field: str, chunk_size: int) -> list[Chunk]:
+    """
+    Split ``queryset`` into ranges of at most ``chunk_size`` rows by ``field``.
+
+    Each boundary is found with one indexed ``ORDER BY field OFFSET n LIMIT 1``
+    query starting after the previous boundary, so planning never loads the
+    rows themselves.
+
+    :param queryset: Rows to split.
+    :type queryset: django.db.models.QuerySet
+    :param field: Unique, indexed field to split on.
+    :type field: str
+    :param chunk_size: Maximum rows per chunk.
+    :type chunk_size: int
+    :return: ``(lower_exclusive, upper_inclusive)`` ranges; the last upper
+        bound is ``None`` (open-ended).
+    :rtype: list[tuple[Optional[int], Optional[int]]]
+    """
+    values = queryset.order_by(field).values_list(field, flat=True)
+    chunks: list[Chunk] = []
+    lower: Optional[int] = None
+    while True:
+        page = values if lower is None else values.filter(**{f"{field}__gt": lower})
+        boundary = list(page[chunk_size - 1:chunk_size])
+        if not boundary:
+            if page.exists():
+                chunks.append((lower, None))
+            return chunks
+
+        chunks.append((lower, boundary[0]))
+        lower = boundary[0]
+
+
+class BroadcastCheckpoint:
+    """
+    Chunk plan and per-chunk progress of a sharded broadcast, kept in Redis.
+
+    The plan (``chat_id`` ranges) is stored once per ``run_id`` so a restarted
+    coordinator reuses the same boundaries, and every finished chunk records
+    its report. Re-running a broadcast with the same ``run_id`` therefore only
+    dispatches chunks that have not completed yet.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        client: Any = None,
+        ttl: int = config.BROADCAST_CHECKPOINT_TTL,
+    ) -> None:
+        """
+        :param run_id: Identifier of the broadcast run.
+        :type run_id: str
+        :param client: Synchronous Redis client. Defaults to the shared client.
+        :type client: redis.Redis
+        :param ttl: Seconds to keep the checkpoint after the last update.
+        :type ttl: int
+        """
+        self.run_id = run_id
+        self.client = client or get_redis()
+        self.ttl = ttl
+        self.plan_key = f"broadcast:{run_id}:plan"
+        self.done_key = f"broadcast:{run_id}:done"
+
+    def load_plan(self) -> Optional[list[Chunk]]:
+        """
+        Return the stored chunk plan, if any.
+
+        :return: ``(lower_exclusive, upper_inclusive)`` chat_id ranges.
+        :rtype: Optional[list[tuple[Optional[int], Optional[int]]]]
+        """
+        raw = self.client.get(self.plan_key)
+        if raw is None:
+            return None
+        return [tuple(chunk) for chunk in json.loads(raw)]
+
+    def save_plan(self, chunks: list[Chunk]) -> list[Chunk]:
+        """
+        Store the chunk plan unless another coordinator stored one first.
+
+        :param chunks: ``(lower_exclusive, upper_inclusive)`` chat_id ranges.
+        :type chunks: list[tuple[Optional[int], Optional[int]]]
+        :return: The plan that is actually in effect for this run.
+        :rtype: list[tuple[Optional[int], Optional[int]]]
+        """
+        if self.client.set(self.plan_key, json.dumps(chunks), ex=self.ttl, nx=True):
+            return chunks
+        return self.load_plan() or chunks
+
+    def done_chunks(self) -> set[int]:
+        """
+        :return: Indexes of chunks that finished.
+        :rtype: set[int]
+        """
+        return {int(index) for index in self.client.hkeys(self.done_key)}
+
+    def is_done(self, index: int) -> bool:
+        """
+        :param index: Chunk index.
+        :type index: int
+        :return: Whether the chunk already finished.
+        :rtype: bool
+        """
+        return bool(self.client.hexists(self.done_key, index))
+
+    def mark_done(self, index: int, report: dict[str, Any]) -> None:
+        """
+        Record a finished chunk and its report.
+
+        :param index: Chunk index.
+        :type index: int
+        :param report: Chunk report from :meth:`BroadcastReport.as_dict`.
+        :type report: dict[str, Any]
+        :return: None
+        :rtype: None
+        """
+        pipe = self.client.pipeline()
+        pipe.hset(self.done_key, index, json.dumps(report))
+        pipe.expire(self.done_key, self.ttl)
+        pipe.expire(self.plan_key, self.ttl)
+        pipe.execute()
+
+    def reports(self) -> list[dict[str, Any]]:
+        """
+        :return: Reports of all finished chunks.
+        :rtype: list[dict[str, Any]]
+        """
+        return [json.loads(raw) for raw in self.client.hvals(self.done_key)]
@@ -0,0 +1,325 @@
+import json
+import asyncio
+from uuid import uuid4
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Awaitable
+from contextlib import suppress
+
+from aiogram import Bot
+from asgiref.sync import sync_to_async
+from redis.exceptions import RedisError
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.models.users import Users
+from apps.bot.services.broadcast import ChatIds
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.broadcast import BroadcastReport
+from apps.bot.services.campaigns import campaign_lock
+from apps.bot.services.campaigns import CampaignService
+from apps.bot.services.campaigns import CampaignDeliveryRecorder
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.utils.locks import RedisLock
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import get_redis
+from apps.bot.utils.redis import create_async_redis
+from src.settings.config.configs import config
+
+
+class BroadcastQueue:
+    """
+    Broadcasts sent by the bot process itself, on its own event loop.
+
+    Admin actions and Celery tasks push jobs to a Redis list with
+    :meth:`enqueue_campaign` / :meth:`enqueue_text`; :meth:`consume`, started
+    by the bot on startup when ``BROADCAST_BACKEND=bot``, pops them one at a
+    time and sends each through a :class:`BroadcastEngine` on the bot's own
+    session. Concurrency is bounded by the engine's workers and the session's
+    shared rate limiter, and there is no Celery dispatch, per-chunk task or
+    per-thread event loop and HTTP session in between.
+
+    A popped job is moved to ``<key>:processing`` until it is done. Campaign
+    jobs left there by a process that stopped mid-send are queued again on
+    the next start and only send their still-pending deliveries; text jobs
+    keep no delivery log, so they are dropped with a warning rather than
+    sent to everyone again. Jobs take the same Redis locks as the Celery
+    tasks, so both backends never send the same campaign or broadcast at once.
+    A text job with a lock name is only queued when no job of that name is
+    queued or running, so a broadcast slower than its schedule does not
+    pile up jobs that would each message everyone again.
+    """
+
+    def __init__(
+        self,
+        key: str = config.BROADCAST_QUEUE_KEY,
+        concurrency: int = config.BROADCAST_CONCURRENCY,
+        poll_timeout: int = 5,
+    ) -> None:
+        """
+        :param key: Redis list holding the queued jobs.
+        :type key: str
+        :param concurrency: Concurrent sends per job.
+        :type concurrency: int
+        :param poll_timeout: Seconds a blocking pop waits before polling again.
+        :type poll_timeout: int
+        """
+        self.key = key
+        self.processing_key = f"{key}:processing"
+        self.concurrency = concurrency
+        self.poll_timeout = poll_timeout
+
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.sent = 0
+        self.failed = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Jobs run and failed, and messages sent and failed by them.
+        :rtype: dict[str, int]
+        """
+        return {
+            "jobs": self.jobs,
+            "failed_jobs": self.failed_jobs,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    def _push(self, job: dict[str, Any], client: Any = None) -> None:
+        (client or get_redis()).rpush(self.key, json.dumps(job))
+
+    def enqueue_campaign(self, campaign_id: int, client: Any = None) -> None:
+        """
+        Queue a campaign to be started or resumed by the bot process.
+
+        :param campaign_id: Campaign ID.
+        :type campaign_id: int
+        :param client: Synchronous Redis client. Defaults to the shared client.
+        :type client: redis.Redis
+        :return: None
+        :rtype: None
+        """
+        self._push({"kind": "campaign", "campaign_id": campaign_id}, client)
+
+    def _pending(self, lock: str, client: Any = None) -> RedisLock:
+        return RedisLock(f"{self.key}:pending:{lock}", ttl=config.BROADCAST_CHECKPOINT_TTL, client=client)
+
+    def enqueue_text(self, text: str, lock: Optional[str] = None, client: Any = None) -> bool:
+        """
+        Queue a message to every reachable user.
+
+        With ``lock``, nothing is queued while another job of that name is
+        queued or running; the job holds a ``<key>:pending:<lock>`` marker
+        until it finishes or is dropped.
+
+        :param text: HTML message text.
+        :type text: str
+        :param lock: Name of the singleton lock, shared with
+            :func:`apps.bot.tasks.notify.broadcast_to_all_users`.
+        :type lock: Optional[str]
+        :param client: Synchronous Redis client. Defaults to the shared client.
+        :type client: redis.Redis
+        :return: Whether the job was queued.
+        :rtype: bool
+        """
+        job: dict[str, Any] = {"kind": "text", "text": text, "lock": lock}
+        if lock is not None:
+            job["token"] = uuid4().hex
+            if not self._pending(lock, client).acquire(job["token"]):
+                logger.info("Broadcast %r is already queued or running; not queueing.", lock)
+                return False
+        self._push(job, client)
+        return True
+
+    async def _release_pending(self, job: dict[str, Any]) -> None:
+        if job.get("lock") is not None and job.get("token") is not None:
+            pending = self._pending(job["lock"])
+            await sync_to_async(pending.release, thread_sensitive=False)(job["token"])
+
+    async def _keep_lock(self, lock: RedisLock, token: str) -> None:
+        while True:
+            await asyncio.sleep(max(1, lock.ttl // 3))
+            await sync_to_async(lock.extend, thread_sensitive=False)(token)
+
+    async def _send(
+        self,
+        bot: Bot,
+        text: str,
+        chat_ids: ChatIds,
+        recorder: DeliveryRecorder,
+    ) -> BroadcastReport:
+        engine = BroadcastEngine(
+            send=lambda chat_id: bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML"),
+            concurrency=self.concurrency,
+            recorder=recorder,
+        )
+        report = await engine.run(chat_ids)
+        self.sent += report.sent
+        self.failed += report.failed
+        return report
+
+    async def _locked(
+        self,
+        lock: RedisLock,
+        token: str,
+        send: Callable[[], Awaitable[Optional[BroadcastReport]]],
+    ) -> Optional[BroadcastReport]:
+        if not await sync_to_async(lock.acquire, thread_sensitive=False)(token):
+            return None
+
+        keeper = asyncio.create_task(self._keep_lock(lock, token))
+        try:
+            return await send()
+        finally:
+            keeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await keeper
+            await sync_to_async(lock.release, thread_sensitive=False)(token)
+
+    async def run_campaign(self, bot: Bot, campaign_id: int) -> dict[str, Any]:
+        """
+        Start or resume a campaign and send its pending deliveries.
+
+        :param bot: Bot sending the messages.
+        :type bot: aiogram.Bot
+        :param campaign_id: Campaign ID.
+        :type campaign_id: int
+        :return: Broadcast report, or ``skipped`` when the campaign is locked or not startable.
+        :rtype: dict[str, Any]
+        """
+        campaign = await Campaign.objects.aget(pk=campaign_id)
+
+        async def send() -> Optional[BroadcastReport]:
+            if not await sync_to_async(CampaignService.start)(campaign):
+                logger.info("Campaign id=%s is %s; not starting.", campaign_id, campaign.status)
+                return None
+
+            await sync_to_async(CampaignService.prepare)(campaign)
+            report = await self._send(
+                bot,
+                campaign.text,
+                CampaignService.iter_pending_chat_ids(campaign_id),
+                CampaignDeliveryRecorder(campaign_id),
+            )
+            await sync_to_async(CampaignService.refresh_counts)(campaign)
+            logger.info(
+                "Campaign id=%s finished a run in the bot process: status=%s sent=%s failed=%s",
+                campaign_id,
+                campaign.status,
+                campaign.sent_count,
+                campaign.failed_count,
+            )
+            return report
+
+        report = await self._locked(campaign_lock(campaign_id), uuid4().hex, send)
+        if report is None:
+            return {"campaign_id": campaign_id, "skipped": True}
+        return {"campaign_id": campaign_id, **report.as_dict()}
+
+    async def run_text(self, bot: Bot, text: str, lock: Optional[str] = None) -> dict[str, Any]:
+        """
+        Send ``text`` to every reachable user.
+
+        :param bot: Bot sending the messages.
+        :type bot: aiogram.Bot
+        :param text: HTML message text.
+        :type text: str
+        :param lock: Name of the singleton lock; ``None`` sends without one.
+        :type lock: Optional[str]
+        :return: Broadcast report, or ``skipped`` when the lock is held.
+        :rtype: dict[str, Any]
+        """
+        def send() -> Awaitable[BroadcastReport]:
+            return self._send(bot, text, Users.objects.recipients().astream_chat_ids(), DeliveryRecorder())
+
+        if lock is None:
+            return (await send()).as_dict()
+
+        singleton = RedisLock(f"broadcast:{lock}", ttl=config.BROADCAST_LOCK_TTL)
+        report = await self._locked(singleton, uuid4().hex, send)
+        if report is None:
+            logger.info("Broadcast %r is still running; skipping.", lock)
+            return {"lock": lock, "skipped": True}
+        return report.as_dict()
+
+    async def run_job(self, bot: Bot, job: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run one queued job.
+
+        :param bot: Bot sending the messages.
+        :type bot: aiogram.Bot
+        :param job: Decoded job, as pushed by :meth:`enqueue_campaign` or :meth:`enqueue_text`.
+        :type job: dict[str, Any]
+        :return: Result of the job.
+        :rtype: dict[str, Any]
+        """
+        if job["kind"] == "campaign":
+            return await self.run_campaign(bot, job["campaign_id"])
+        if job["kind"] == "text":
+            try:
+                return await self.run_text(bot, job["text"], job.get("lock"))
+            finally:
+                await self._release_pending(job)
+        raise ValueError(f"Unknown broadcast job kind: {job['kind']!r}")
+
+    async def _handle(self, bot: Bot, raw: bytes) -> None:
+        self.jobs += 1
+        try:
+            result = await self.run_job(bot, json.loads(raw))
+            logger.info("Broadcast job done: %s", result)
+        except Exception:
+            self.failed_jobs += 1
+            logger.exception("Broadcast job %r failed.", raw)
+
+    async def _requeue_unfinished(self, client: Any) -> None:
+        while (raw := await client.lmove(self.processing_key, self.key, "RIGHT", "LEFT")) is not None:
+            if json.loads(raw)["kind"] == "campaign":
+                logger.info("Requeued unfinished broadcast job %r.", raw)
+            else:
+                await client.lrem(self.key, 1, raw)
+                await self._release_pending(json.loads(raw))
+                logger.warning("Dropped unfinished broadcast job %r.", raw)
+
+    async def consume(self, bot: Bot) -> None:
+        """
+        Run queued jobs one after another until cancelled.
+
+        :param bot: Bot sending the messages.
+        :type bot: aiogram.Bot
+        :return: None
+        :rtype: None
+        """
+        client = create_async_redis()
+        requeued = False
+        logger.info("Broadcast queue %r: consuming in the bot process.", self.key)
+        try:
+            while True:
+                try:
+                    if not requeued:
+                        await self._requeue_unfinished(client)
+                        requeued = True
+                    raw = await client.blmove(self.key, self.processing_key, self.poll_timeout, "LEFT", "RIGHT")
+                except RedisError:
+                    logger.exception("Broadcast queue %r is unavailable; retrying.", self.key)
+                    await asyncio.sleep(self.poll_timeout)
+                    continue
+                if raw is None:
+                    continue
+
+                await self._handle(bot, raw)
+                await client.lrem(self.processing_key, 1, raw)
+        finally:
+            await client.close()
+
+    def start(self, bot: Bot) -> asyncio.Task:
+        """
+        :param bot: Bot sending the messages.
+        :type bot: aiogram.Bot
+        :return: Task running :meth:`consume`.
+        :rtype: asyncio.Task
+        """
+        return asyncio.create_task(self.consume(bot), name="broadcast-queue")
+
+
+broadcast_queue = BroadcastQueue()
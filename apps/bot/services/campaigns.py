@@ -0,0 +1,339 @@
+from collections import defaultdict
+from typing import Any
+from typing import Optional
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.db.models import F
+from django.utils import timezone
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.models.campaigns import CampaignDelivery
+from apps.bot.models.users import Users
+from apps.bot.models.users import UsersQuerySet
+from apps.bot.services.broadcast import Chunk
+from apps.bot.services.broadcast import plan_keyset_chunks
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.utils.locks import RedisLock
+from apps.bot.utils.logging import logger
+from src.settings.config.configs import config
+
+
+def campaign_lock(campaign_id: int) -> RedisLock:
+    """
+    :param campaign_id: Campaign ID.
+    :type campaign_id: int
+    :return: Lock held while a campaign is being sent, by Celery or the bot process.
+    :rtype: RedisLock
+    """
+    return RedisLock(f"campaign:{campaign_id}", ttl=config.BROADCAST_LOCK_TTL)
+
+
+class CampaignDeliveryRecorder(DeliveryRecorder):
+    """
+    :class:`DeliveryRecorder` that also updates the campaign's delivery log.
+
+    Outcomes are written with the same batched ``UPDATE ... WHERE chat_id IN``
+    statements as the user delivery state, scoped to one campaign.
+    """
+
+    def __init__(self, campaign_id: int, batch_size: int = config.DELIVERY_RECORD_BATCH_SIZE) -> None:
+        """
+        :param campaign_id: Campaign whose deliveries are updated.
+        :type campaign_id: int
+        :param batch_size: Pending outcomes after which the caller should flush.
+        :type batch_size: int
+        """
+        super().__init__(batch_size=batch_size)
+        self.campaign_id = campaign_id
+
+    def _write(self, delivered: set[int], failed: dict[int, tuple[str, bool]]) -> None:
+        super()._write(delivered, failed)
+
+        deliveries = CampaignDelivery.objects.filter(campaign_id=self.campaign_id)
+        now = timezone.now()
+        for batch in self._batches(delivered):
+            deliveries.filter(chat_id__in=batch).update(
+                status=CampaignDelivery.Status.SENT,
+                sent_at=now,
+                error=None,
+                runs=F("runs") + 1,
+            )
+
+        grouped: dict[str, list[int]] = defaultdict(list)
+        for chat_id, (error, _) in failed.items():
+            grouped[error].append(chat_id)
+        for error, chat_ids in grouped.items():
+            for batch in self._batches(chat_ids):
+                deliveries.filter(chat_id__in=batch).update(
+                    status=CampaignDelivery.Status.FAILED,
+                    error=error,
+                    runs=F("runs") + 1,
+                )
+
+
+class CampaignService:
+    """
+    Operations on :class:`Campaign` and its delivery log.
+
+    The log is built once per campaign by :meth:`prepare`; everything after
+    that (chunking, sending, resuming, retrying) only reads and updates
+    delivery rows, never the users table.
+    """
+
+    STARTABLE = (
+        Campaign.Status.DRAFT,
+        Campaign.Status.SCHEDULED,
+        Campaign.Status.PAUSED,
+        Campaign.Status.RUNNING,
+    )
+
+    @staticmethod
+    def prepare(campaign: Campaign, batch_size: int = config.RECIPIENT_PAGE_SIZE) -> int:
+        """
+        Create a pending delivery row for every reachable user, or for those
+        matching the campaign's ``recipient_filter``.
+
+        Rows are bulk-inserted in batches while streaming recipients, and
+        existing rows are skipped, so an interrupted run can call it again.
+
+        :param campaign: Campaign to prepare.
+        :type campaign: Campaign
+        :param batch_size: Rows per ``INSERT``.
+        :type batch_size: int
+        :return: Number of deliveries of the campaign.
+        :rtype: int
+        """
+        if campaign.prepared_at is not None:
+            return campaign.total_count
+
+        users = Users.objects.all()
+        if campaign.recipient_filter is not None:
+            users = users.matching(campaign.recipient_filter)
+        return CampaignService._add_deliveries(campaign, users, batch_size)
+
+    @staticmethod
+    def _add_deliveries(campaign: Campaign, users: UsersQuerySet, batch_size: int) -> int:
+        batch: list[CampaignDelivery] = []
+        for chat_id in users.recipients().stream_chat_ids(page_size=batch_size):
+            batch.append(CampaignDelivery(campaign_id=campaign.pk, chat_id=chat_id))
+            if len(batch) >= batch_size:
+                CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+
+        campaign.total_count = campaign.deliveries.count()
+        campaign.prepared_at = timezone.now()
+        campaign.save(update_fields=["total_count", "prepared_at", "updated_at"])
+        logger.info("Campaign id=%s prepared with %s deliveries.", campaign.pk, campaign.total_count)
+        return campaign.total_count
+
+    @staticmethod
+    def create_for_users(
+        name: str,
+        text: str,
+        users: UsersQuerySet,
+        batch_size: int = config.RECIPIENT_PAGE_SIZE,
+    ) -> Campaign:
+        """
+        Create a draft campaign for the reachable users of ``users``, with its
+        delivery log written right away.
+
+        Meant for the rows selected on one admin changelist page; use
+        :meth:`create_for_filter` for selections that may be large.
+
+        :param name: Campaign name.
+        :type name: str
+        :param text: HTML message text.
+        :type text: str
+        :param users: Users to message; blocked users are skipped.
+        :type users: UsersQuerySet
+        :param batch_size: Rows per ``INSERT``.
+        :type batch_size: int
+        :return: The new campaign.
+        :rtype: Campaign
+        """
+        campaign = Campaign.objects.create(name=name, text=text)
+        CampaignService._add_deliveries(campaign, users, batch_size)
+        return campaign
+
+    @staticmethod
+    def create_for_filter(name: str, text: str, recipient_filter: Optional[dict[str, Any]] = None) -> Campaign:
+        """
+        Create a draft campaign whose recipients are selected on its first run.
+
+        Nothing but the campaign row is written here; :meth:`prepare` builds
+        the delivery log from ``recipient_filter`` (see
+        :meth:`UsersQuerySet.matching`) in the task that starts the campaign.
+
+        :param name: Campaign name.
+        :type name: str
+        :param text: HTML message text.
+        :type text: str
+        :param recipient_filter: Saved admin filter; ``None`` means every reachable user.
+        :type recipient_filter: Optional[dict[str, Any]]
+        :return: The new campaign.
+        :rtype: Campaign
+        """
+        return Campaign.objects.create(name=name, text=text, recipient_filter=recipient_filter)
+
+    @staticmethod
+    def plan_chunks(campaign_id: int, chunk_size: int = config.BROADCAST_CHUNK_SIZE) -> list[Chunk]:
+        """
+        Split the campaign's pending deliveries into ``id`` ranges.
+
+        :param campaign_id: Campaign ID.
+        :type campaign_id: int
+        :param chunk_size: Maximum deliveries per chunk.
+        :type chunk_size: int
+        :return: ``(lower_exclusive, upper_inclusive)`` delivery ``id`` ranges.
+        :rtype: list[tuple[Optional[int], Optional[int]]]
+        """
+        pending = CampaignDelivery.objects.filter(
+            campaign_id=campaign_id,
+            status=CampaignDelivery.Status.PENDING,
+        )
+        return plan_keyset_chunks(pending, "id", chunk_size)
+
+    @staticmethod
+    async def iter_pending_chat_ids(
+        campaign_id: int,
+        lower: Optional[int] = None,
+        upper: Optional[int] = None,
+        page_size: int = config.RECIPIENT_PAGE_SIZE,
+    ) -> AsyncIterator[int]:
+        """
+        Yield chat IDs of pending deliveries in an ``id`` range, page by page.
+
+        Before every page the campaign status is checked, so pausing or
+        cancelling a campaign stops its running chunks before their next page.
+
+        :param campaign_id: Campaign ID.
+        :type campaign_id: int
+        :param lower: Exclusive lower bound of delivery ``id``.
+        :type lower: Optional[int]
+        :param upper: Inclusive upper bound of delivery ``id``.
+        :type upper: Optional[int]
+        :param page_size: Rows fetched per query.
+        :type page_size: int
+        :return: Async iterator of chat IDs.
+        :rtype: AsyncIterator[int]
+        """
+        pending = CampaignDelivery.objects.filter(
+            campaign_id=campaign_id,
+            status=CampaignDelivery.Status.PENDING,
+        )
+        if upper is not None:
+            pending = pending.filter(id__lte=upper)
+
+        def fetch_page(after: Optional[int]) -> list[tuple[int, int]]:
+            page = pending.order_by("id")
+            if after is not None:
+                page = page.filter(id__gt=after)
+            return list(page.values_list("id", "chat_id")[:page_size])
+
+        after = lower
+        while True:
+            running = await Campaign.objects.filter(
+                pk=campaign_id,
+                status=Campaign.Status.RUNNING,
+            ).aexists()
+            if not running:
+                logger.info("Campaign id=%s is no longer running; stopping chunk.", campaign_id)
+                return
+
+            page = await sync_to_async(fetch_page)(after)
+            for after, chat_id in page:
+                yield chat_id
+            if len(page) < page_size:
+                return
+
+    @staticmethod
+    def start(campaign: Campaign) -> bool:
+        """
+        Mark a draft, scheduled or paused campaign as running.
+
+        A running campaign stays running, so a coordinator restarted after a
+        crash resumes it.
+
+        :param campaign: Campaign to start.
+        :type campaign: Campaign
+        :return: Whether the campaign is running now.
+        :rtype: bool
+        """
+        updated = Campaign.objects.filter(pk=campaign.pk, status__in=CampaignService.STARTABLE).update(
+            status=Campaign.Status.RUNNING,
+            started_at=campaign.started_at or timezone.now(),
+            finished_at=None,
+            updated_at=timezone.now(),
+        )
+        campaign.refresh_from_db()
+        return bool(updated)
+
+    @staticmethod
+    def pause(campaign: Campaign) -> bool:
+        """
+        Pause a running campaign; its chunks stop before their next page.
+
+        :param campaign: Campaign to pause.
+        :type campaign: Campaign
+        :return: Whether the campaign was running.
+        :rtype: bool
+        """
+        updated = Campaign.objects.filter(pk=campaign.pk, status=Campaign.Status.RUNNING).update(
+            status=Campaign.Status.PAUSED,
+            updated_at=timezone.now(),
+        )
+        campaign.refresh_from_db()
+        return bool(updated)
+
+    @staticmethod
+    def retry_failures(campaign: Campaign, max_runs: int = config.BROADCAST_MAX_ATTEMPTS) -> int:
+        """
+        Put failed deliveries back to pending, except those to blocked users
+        and those that already failed in ``max_runs`` runs.
+
+        :param campaign: Campaign whose failures are retried.
+        :type campaign: Campaign
+        :param max_runs: Runs after which a delivery stays failed.
+        :type max_runs: int
+        :return: Number of deliveries that will be retried.
+        :rtype: int
+        """
+        blocked = Users.objects.filter(blocked=True).values("chat_id")
+        return (
+            campaign.deliveries.filter(
+                status=CampaignDelivery.Status.FAILED,
+                runs__lt=max_runs,
+            )
+            .exclude(chat_id__in=blocked)
+            .update(status=CampaignDelivery.Status.PENDING)
+        )
+
+    @staticmethod
+    def refresh_counts(campaign: Campaign) -> dict[int, int]:
+        """
+        Update sent/failed counters from the delivery log and complete the
+        campaign when nothing is pending.
+
+        :param campaign: Campaign to update.
+        :type campaign: Campaign
+        :return: Number of deliveries per :class:`CampaignDelivery.Status`.
+        :rtype: dict[int, int]
+        """
+        counts = dict(
+            campaign.deliveries.values_list("status").annotate(total=Count("id")).order_by(),
+        )
+        campaign.sent_count = counts.get(CampaignDelivery.Status.SENT, 0)
+        campaign.failed_count = counts.get(CampaignDelivery.Status.FAILED, 0)
+        update_fields = ["sent_count", "failed_count", "updated_at"]
+
+        if not counts.get(CampaignDelivery.Status.PENDING) and campaign.status == Campaign.Status.RUNNING:
+            campaign.status = Campaign.Status.COMPLETED
+            campaign.finished_at = timezone.now()
+            update_fields += ["status", "finished_at"]
+
+        campaign.save(update_fields=update_fields)
+        return counts
@@ -0,0 +1,158 @@
+from typing import Union
+from typing import Optional
+from collections import defaultdict
+
+from aiogram.exceptions import TelegramForbiddenError
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from apps.bot.models.users import Users
+from apps.bot.services.users import user_cache
+from apps.bot.utils.logging import logger
+from src.settings.config.configs import config
+
+
+UNREACHABLE_MARKERS = (
+    "forbidden:",
+    "bot was blocked by the user",
+    "bot was kicked",
+    "user is deactivated",
+    "chat not found",
+)
+
+
+def is_unreachable(error: Union[Exception, str]) -> bool:
+    """
+    Whether a send error means the chat will never accept messages again.
+
+    :param error: Exception raised by the send or Telegram's error description.
+    :type error: Exception | str
+    :return: ``True`` for blocked bots, deactivated users and unknown chats.
+    :rtype: bool
+    """
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    description = str(error).lower()
+    return any(marker in description for marker in UNREACHABLE_MARKERS)
+
+
+class DeliveryRecorder:
+    """
+    Collects per-chat delivery outcomes and writes them to :class:`Users`
+    in a few bulk ``UPDATE`` statements.
+
+    Successful sends set ``last_delivered_at``; failures set ``last_error``
+    and, when the chat is unreachable (the user blocked the bot, deleted the
+    account, ...), ``blocked``. Blocked users are excluded from
+    ``Users.objects.recipients()`` and thus from every following send.
+    """
+
+    def __init__(self, batch_size: int = config.DELIVERY_RECORD_BATCH_SIZE) -> None:
+        """
+        :param batch_size: Pending outcomes after which the caller should flush;
+            also the size of the ``chat_id IN (...)`` lists.
+        :type batch_size: int
+        """
+        self.batch_size = max(1, batch_size)
+        self._delivered: set[int] = set()
+        self._failed: dict[int, tuple[str, bool]] = {}
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: Number of outcomes not written yet.
+        :rtype: int
+        """
+        return len(self._delivered) + len(self._failed)
+
+    def delivered(self, chat_id: int) -> None:
+        """
+        Record a successful send.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :return: None
+        :rtype: None
+        """
+        self._failed.pop(chat_id, None)
+        self._delivered.add(chat_id)
+
+    def failed(
+        self,
+        chat_id: int,
+        error: Union[Exception, str],
+        unreachable: Optional[bool] = None,
+    ) -> None:
+        """
+        Record a failed send.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :param error: Exception raised by the send or Telegram's error description.
+        :type error: Exception | str
+        :param unreachable: Whether to block the user. Derived from ``error``
+            by :func:`is_unreachable` when omitted.
+        :type unreachable: Optional[bool]
+        :return: None
+        :rtype: None
+        """
+        if unreachable is None:
+            unreachable = is_unreachable(error)
+        self._delivered.discard(chat_id)
+        self._failed[chat_id] = (str(error)[:255], unreachable)
+
+    def _take(self) -> tuple[set[int], dict[int, tuple[str, bool]]]:
+        delivered, self._delivered = self._delivered, set()
+        failed, self._failed = self._failed, {}
+        return delivered, failed
+
+    def _write(self, delivered: set[int], failed: dict[int, tuple[str, bool]]) -> None:
+        now = timezone.now()
+        for batch in self._batches(delivered):
+            Users.objects.filter(chat_id__in=batch).update(last_delivered_at=now, last_error=None)
+
+        grouped: dict[tuple[str, bool], list[int]] = defaultdict(list)
+        for chat_id, outcome in failed.items():
+            grouped[outcome].append(chat_id)
+
+        for (error, unreachable), chat_ids in grouped.items():
+            for batch in self._batches(chat_ids):
+                if unreachable:
+                    Users.objects.filter(chat_id__in=batch).update(blocked=True, last_error=error)
+                else:
+                    Users.objects.filter(chat_id__in=batch).update(last_error=error)
+            if unreachable:
+                user_cache.delete_many(chat_ids)
+                logger.info("Marked %s users as blocked: %s", len(chat_ids), error)
+
+    def _batches(self, chat_ids) -> list[list[int]]:
+        chat_ids = list(chat_ids)
+        return [
+            chat_ids[start:start + self.batch_size]
+            for start in range(0, len(chat_ids), self.batch_size)
+        ]
+
+    def flush_sync(self) -> None:
+        """
+        Write pending outcomes from sync code.
+
+        :return: None
+        :rtype: None
+        """
+        delivered, failed = self._take()
+        if delivered or failed:
+            self._write(delivered, failed)
+
+    async def flush(self) -> None:
+        """
+        Write pending outcomes from async code.
+
+        Outcomes are taken on the event loop, so sends recorded while the
+        write runs go into the next flush.
+
+        :return: None
+        :rtype: None
+        """
+        delivered, failed = self._take()
+        if delivered or failed:
+            await sync_to_async(self._write)(delivered, failed)
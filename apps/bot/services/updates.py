@@ -0,0 +1,386 @@
+import asyncio
+import contextvars
+from collections import deque
+from typing import Any
+from typing import Callable
+from typing import Awaitable
+from typing import Optional
+from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+
+import redis
+from aiogram import types
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.base import BaseEventIsolation
+
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import create_async_redis
+from src.settings.config.configs import config
+
+
+class UpdateQueue:
+    """
+    Bounded in-process queue that decouples webhook acknowledgement from
+    update processing.
+
+    The webhook view puts validated updates on the queue and answers Telegram
+    immediately; a pool of consumer tasks drains the queue and runs the
+    dispatcher. When the queue is full, :meth:`put` waits up to
+    ``put_timeout`` seconds for a free slot and then reports failure so the
+    caller can answer with a non-2xx status and let Telegram redeliver later.
+
+    Consumers are bound to the event loop that enqueued the first update,
+    which is the server loop of the ASGI worker process. They run in a fresh
+    context rather than a copy of that first request's, which would pin
+    their ``sync_to_async`` calls to the request's thread-sensitive
+    executor long after the request has finished.
+
+    Updates of one chat are handled one at a time anyway (the dispatcher
+    holds the chat lock of :class:`ChatEventIsolation`), so a consumer that
+    takes an update of a chat another consumer is already working on parks
+    it in that chat's backlog instead of blocking on the lock. The consumer
+    that owns the chat works through the backlog in order before it goes
+    back to the queue, and a burst from one chat occupies one consumer
+    rather than all of them.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[types.Update], Awaitable[Any]],
+        maxsize: int = 1000,
+        workers: int = 16,
+        put_timeout: float = 1.0,
+    ) -> None:
+        """
+        :param handler: Coroutine function that processes a single update.
+        :type handler: Callable[[aiogram.types.Update], Awaitable[Any]]
+        :param maxsize: Maximum number of queued updates.
+        :type maxsize: int
+        :param workers: Number of consumer tasks.
+        :type workers: int
+        :param put_timeout: Seconds to wait for a free slot before rejecting.
+        :type put_timeout: float
+        """
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.put_timeout = put_timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+        self._chats: dict[int, deque[types.Update]] = {}
+
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.deferred = 0
+        self.high_watermark = 0
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of updates waiting to be processed, including the ones parked
+        behind a busy chat.
+
+        :return: Current queue depth.
+        :rtype: int
+        """
+        if self._queue is None:
+            return 0
+        return self._queue.qsize() + sum(len(backlog) for backlog in self._chats.values())
+
+    def stats(self) -> dict[str, int]:
+        """
+        Snapshot of queue counters.
+
+        :return: Queue depth, capacity and processing counters.
+        :rtype: dict[str, int]
+        """
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "workers": len(self._tasks),
+            "in_flight": self.in_flight,
+            "busy_chats": len(self._chats),
+            "deferred": self.deferred,
+            "high_watermark": self.high_watermark,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        if self._loop is not None:
+            logger.warning(
+                "Update queue was bound to another event loop; "
+                "restarting consumers on the current loop.",
+            )
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            loop.create_task(
+                self._consume(),
+                name=f"update-consumer-{index}",
+                context=contextvars.Context(),
+            )
+            for index in range(self.workers)
+        ]
+        logger.info(
+            "Update queue started with %s consumers (maxsize=%s).",
+            self.workers,
+            self.maxsize,
+        )
+
+    async def put(self, update: types.Update) -> bool:
+        """
+        Enqueue an update for background processing.
+
+        :param update: Validated Telegram update.
+        :type update: aiogram.types.Update
+        :return: ``True`` if the update was queued, ``False`` if the queue is
+            closing or stayed full for ``put_timeout`` seconds.
+        :rtype: bool
+        """
+        if self._closing:
+            self.rejected += 1
+            return False
+
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._queue.put(update), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(
+                "Update queue is full (depth=%s); rejecting update id=%s.",
+                self.depth,
+                update.update_id,
+            )
+            return False
+
+        self.enqueued += 1
+        self.high_watermark = max(self.high_watermark, self.depth)
+        return True
+
+    @staticmethod
+    def _chat_id(update: types.Update) -> Optional[int]:
+        chat = UserContextMiddleware.resolve_event_context(update).chat
+        return chat.id if chat is not None else None
+
+    async def _process(self, queue: asyncio.Queue, update: types.Update) -> None:
+        self.in_flight += 1
+        try:
+            await self.handler(update)
+            self.processed += 1
+        except Exception:
+            self.failed += 1
+            logger.exception("Background processing failed for update id=%s.", update.update_id)
+        finally:
+            self.in_flight -= 1
+            queue.task_done()
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            update = await queue.get()
+            chat_id = self._chat_id(update)
+            if chat_id is None:
+                await self._process(queue, update)
+                continue
+
+            backlog = self._chats.get(chat_id)
+            if backlog is not None:
+                # task_done() is left to the consumer that owns the chat, so
+                # drain() keeps waiting for the parked update.
+                backlog.append(update)
+                self.deferred += 1
+                continue
+
+            backlog = self._chats[chat_id] = deque()
+            try:
+                await self._process(queue, update)
+                while backlog:
+                    await self._process(queue, backlog.popleft())
+            finally:
+                del self._chats[chat_id]
+
+    async def drain(self, timeout: float = 25.0) -> None:
+        """
+        Stop accepting updates, wait for queued ones to finish and stop consumers.
+
+        :param timeout: Seconds to wait for the queue to empty before
+            cancelling the remaining work.
+        :type timeout: float
+        :return: None
+        :rtype: None
+        """
+        self._closing = True
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Update queue drain timed out after %ss with %s updates left.",
+                timeout,
+                self.depth + self.in_flight,
+            )
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Update queue drained: %s", self.stats())
+
+
+class ChatEventIsolation(BaseEventIsolation):
+    """
+    Runs the updates of one chat one after another; different chats run in
+    parallel.
+
+    Used as the dispatcher's ``events_isolation``, so the FSM middleware
+    holds the chat's lock around all handlers of an update. Within a process
+    an ``asyncio.Lock`` per active chat orders updates; it is dropped as soon
+    as no update of the chat is running or waiting. With ``use_redis`` the
+    holder of the local lock also takes a Redis lock for the chat, which
+    orders updates across web workers and replicas.
+
+    A Redis lock expires after ``ttl`` seconds if its holder dies. When it
+    cannot be taken within ``timeout`` seconds, or Redis is unreachable, the
+    update runs anyway (ordered within the process only) and is counted in
+    ``timeouts``.
+    """
+
+    def __init__(
+        self,
+        use_redis: bool = config.CHAT_ORDERING_REDIS,
+        ttl: float = config.CHAT_LOCK_TTL,
+        timeout: float = config.CHAT_LOCK_TIMEOUT,
+        poll_interval: float = 0.02,
+        prefix: str = "chat-order:",
+    ) -> None:
+        """
+        :param use_redis: Whether to order updates across processes through
+            ``config.REDIS_URL``.
+        :type use_redis: bool
+        :param ttl: Seconds until an abandoned Redis lock expires.
+        :type ttl: float
+        :param timeout: Seconds to wait for the Redis lock before running unordered.
+        :type timeout: float
+        :param poll_interval: Seconds between attempts to take a held Redis lock.
+        :type poll_interval: float
+        :param prefix: Redis key prefix.
+        :type prefix: str
+        """
+        self.use_redis = use_redis
+        self.ttl = ttl
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self.redis: Any = None
+
+        self._locks: dict[tuple[int, int], tuple[asyncio.Lock, int]] = {}
+
+        self.locked = 0
+        self.contended = 0
+        self.timeouts = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        :return: Locked updates, updates that waited for their chat, Redis
+            lock timeouts and chats currently locked in this process.
+        :rtype: dict[str, int]
+        """
+        return {
+            "locked": self.locked,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "active_chats": len(self._locks),
+        }
+
+    @asynccontextmanager
+    async def _local_lock(self, chat: tuple[int, int]) -> AsyncGenerator[None, None]:
+        lock, waiters = self._locks.get(chat) or (asyncio.Lock(), 0)
+        if lock.locked():
+            self.contended += 1
+        self._locks[chat] = (lock, waiters + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, waiters = self._locks[chat]
+            if waiters > 1:
+                self._locks[chat] = (lock, waiters - 1)
+            else:
+                del self._locks[chat]
+
+    @asynccontextmanager
+    async def _remote_lock(self, chat: tuple[int, int]) -> AsyncGenerator[None, None]:
+        if self.redis is None:
+            self.redis = create_async_redis()
+        lock = self.redis.lock(
+            f"{self.prefix}{chat[0]}:{chat[1]}",
+            timeout=self.ttl,
+            sleep=self.poll_interval,
+            blocking_timeout=self.timeout,
+            thread_local=False,
+        )
+        try:
+            acquired = await lock.acquire()
+        except redis.RedisError as exc:
+            logger.warning("Redis chat lock unavailable for chat_id=%s: %s", chat[1], exc)
+            acquired = False
+        else:
+            if not acquired:
+                logger.warning("Timed out waiting for the chat lock of chat_id=%s.", chat[1])
+        if not acquired:
+            self.timeouts += 1
+
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except redis.RedisError as exc:
+                    logger.warning("Failed to release the chat lock of chat_id=%s: %s", chat[1], exc)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        """
+        Hold the lock of the chat in ``key`` (the FSM key of the update).
+
+        :param key: FSM storage key of the update.
+        :type key: aiogram.fsm.storage.base.StorageKey
+        :return: Async context manager.
+        :rtype: AsyncGenerator[None, None]
+        """
+        chat = (key.bot_id, key.chat_id)
+        async with self._local_lock(chat):
+            self.locked += 1
+            if not self.use_redis:
+                yield
+                return
+            async with self._remote_lock(chat):
+                yield
+
+    async def close(self) -> None:
+        """
+        Close the Redis client, if one was opened.
+
+        :return: None
+        :rtype: None
+        """
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
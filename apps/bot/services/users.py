@@ -1,9 +1,429 @@
+import json
+import asyncio
+from typing import Any
 from typing import Optional
 
+import redis
 from aiogram.types import Message
 from asgiref.sync import sync_to_async
+from django.utils import timezone
 
 from apps.bot.models.users import Users
+from apps.bot.utils.cache import TTLCache
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import get_redis
+from src.settings.config.configs import config
+
+
+CACHED_FIELDS = ("id", "chat_id", "username", "first_name")
+
+
+class UserCache:
+    """
+    Write-through cache of known users keyed by Telegram ``chat_id``.
+
+    Lookups check an in-process :class:`TTLCache` first and, when enabled,
+    a shared Redis tier next. Values are the user's primary key, username and
+    first name, which is everything the bot needs for a returning user.
+
+    The in-process tier of other processes is not notified about
+    invalidations, so its TTL bounds how long they may serve stale entries;
+    the Redis tier is invalidated immediately. An entry therefore says
+    nothing about ``blocked``: a Celery worker that marks a chat blocked
+    cannot reach the bot's in-process tier, so ``/start`` clears the flag
+    in the database even on a cache hit.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = config.USER_CACHE_MAX_SIZE,
+        ttl: float = config.USER_CACHE_TTL,
+        use_redis: bool = config.USER_CACHE_REDIS,
+        redis_ttl: int = config.USER_CACHE_REDIS_TTL,
+        prefix: str = "users:chat:",
+    ) -> None:
+        """
+        :param maxsize: Maximum entries in the in-process tier.
+        :type maxsize: int
+        :param ttl: Seconds an entry stays in the in-process tier.
+        :type ttl: float
+        :param use_redis: Whether to use the Redis tier at ``config.REDIS_URL``.
+        :type use_redis: bool
+        :param redis_ttl: Seconds an entry stays in the Redis tier.
+        :type redis_ttl: int
+        :param prefix: Redis key prefix.
+        :type prefix: str
+        """
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self.prefix = prefix
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Hit/miss counters of both tiers.
+
+        :return: Counters and current in-process size.
+        :rtype: dict[str, int]
+        """
+        return {
+            "hits": self.local_hits + self.redis_hits,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "local_size": len(self.local),
+        }
+
+    def get_local(self, chat_id: int) -> Optional[dict[str, Any]]:
+        """
+        Look up ``chat_id`` in the in-process tier only.
+
+        Safe to call from the event loop: it never performs I/O. A miss here
+        is not counted, since the caller is expected to fall back to :meth:`get`.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :return: Cached user fields or ``None``.
+        :rtype: Optional[dict[str, Any]]
+        """
+        value = self.local.get(chat_id)
+        if value is not None:
+            self.local_hits += 1
+        return value
+
+    def get(self, chat_id: int) -> Optional[dict[str, Any]]:
+        """
+        Look up ``chat_id`` in the in-process tier, then in Redis.
+
+        Performs blocking Redis I/O; call it from sync code only.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :return: Cached user fields or ``None``.
+        :rtype: Optional[dict[str, Any]]
+        """
+        value = self.get_local(chat_id)
+        if value is not None:
+            return value
+
+        if self.use_redis:
+            try:
+                raw = get_redis().get(f"{self.prefix}{chat_id}")
+            except redis.RedisError as exc:
+                logger.warning("User cache Redis lookup failed: %s", exc)
+                raw = None
+
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(chat_id, value)
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, user: Users) -> None:
+        """
+        Cache ``user`` in every enabled tier.
+
+        Blocked users are not cached. Performs blocking Redis I/O; call it
+        from sync code only.
+
+        :param user: Saved user instance.
+        :type user: Users
+        :return: None
+        :rtype: None
+        """
+        if user.blocked:
+            return
+
+        value = {field: getattr(user, field) for field in CACHED_FIELDS}
+        self.local.set(user.chat_id, value)
+        if self.use_redis:
+            self._set_remote(user.chat_id, value)
+
+    def set_many(self, users: list[Users]) -> None:
+        """
+        Cache several users at once, using a single Redis round-trip.
+
+        Performs blocking Redis I/O; call it from sync code only.
+
+        :param users: Saved user instances.
+        :type users: list[Users]
+        :return: None
+        :rtype: None
+        """
+        values = {
+            user.chat_id: {field: getattr(user, field) for field in CACHED_FIELDS}
+            for user in users
+            if not user.blocked
+        }
+        for chat_id, value in values.items():
+            self.local.set(chat_id, value)
+
+        if self.use_redis and values:
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                for chat_id, value in values.items():
+                    pipe.set(f"{self.prefix}{chat_id}", json.dumps(value), ex=self.redis_ttl)
+                pipe.execute()
+            except redis.RedisError as exc:
+                logger.warning("User cache Redis write failed: %s", exc)
+
+    def _set_remote(self, chat_id: int, value: dict[str, Any]) -> None:
+        try:
+            get_redis().set(f"{self.prefix}{chat_id}", json.dumps(value), ex=self.redis_ttl)
+        except redis.RedisError as exc:
+            logger.warning("User cache Redis write failed: %s", exc)
+
+    async def aget(self, chat_id: int) -> Optional[dict[str, Any]]:
+        """
+        Async variant of :meth:`get`.
+
+        In-process hits are answered on the event loop; Redis lookups run in
+        a non thread-sensitive executor so they never queue behind ORM work.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :return: Cached user fields or ``None``.
+        :rtype: Optional[dict[str, Any]]
+        """
+        value = self.get_local(chat_id)
+        if value is not None:
+            return value
+
+        if not self.use_redis:
+            self.misses += 1
+            return None
+        return await sync_to_async(self.get, thread_sensitive=False)(chat_id)
+
+    async def aset(self, user: Users) -> None:
+        """
+        Async variant of :meth:`set`.
+
+        :param user: Saved user instance.
+        :type user: Users
+        :return: None
+        :rtype: None
+        """
+        if user.blocked:
+            return
+
+        value = {field: getattr(user, field) for field in CACHED_FIELDS}
+        self.local.set(user.chat_id, value)
+        if self.use_redis:
+            await sync_to_async(self._set_remote, thread_sensitive=False)(user.chat_id, value)
+
+    def delete(self, chat_id: int) -> None:
+        """
+        Drop ``chat_id`` from every enabled tier.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :return: None
+        :rtype: None
+        """
+        self.local.delete(chat_id)
+        if self.use_redis:
+            try:
+                get_redis().delete(f"{self.prefix}{chat_id}")
+            except redis.RedisError as exc:
+                logger.warning("User cache Redis invalidation failed: %s", exc)
+
+    def delete_many(self, chat_ids: list[int]) -> None:
+        """
+        Drop several ``chat_id`` from every enabled tier with one Redis call.
+
+        :param chat_ids: Telegram chat IDs.
+        :type chat_ids: list[int]
+        :return: None
+        :rtype: None
+        """
+        for chat_id in chat_ids:
+            self.local.delete(chat_id)
+        if self.use_redis and chat_ids:
+            try:
+                get_redis().delete(*(f"{self.prefix}{chat_id}" for chat_id in chat_ids))
+            except redis.RedisError as exc:
+                logger.warning("User cache Redis invalidation failed: %s", exc)
+
+
+user_cache = UserCache()
+
+
+def _user_from_cache(value: dict[str, Any]) -> Users:
+    field_names = [
+        field.attname for field in Users._meta.concrete_fields if field.attname in value
+    ]
+    user = Users.from_db("default", field_names, [value[name] for name in field_names])
+    user.blocked = False
+    return user
+
+
+def _profile_changed(value: Any, username: Optional[str], first_name: Optional[str]) -> bool:
+    if isinstance(value, dict):
+        return value["username"] != username or value["first_name"] != first_name
+    return value.username != username or value.first_name != first_name
+
+
+class UserWriteBuffer:
+    """
+    Collects user upserts and writes them in batches.
+
+    Instead of one ``get_or_create`` (and one transaction) per ``/start``,
+    callers of :meth:`save` wait while rows accumulate for up to ``interval``
+    seconds or ``max_rows`` users, which are then written with a single
+    ``INSERT ... ON CONFLICT (chat_id) DO UPDATE`` through
+    ``bulk_create(update_conflicts=True)``. Existing users get their
+    ``username`` and ``first_name`` refreshed and are unblocked by the same
+    statement.
+
+    The buffer lives on the event loop that saved the first user; pending
+    rows are written by :meth:`close` on shutdown.
+    """
+
+    UPDATE_FIELDS = ("username", "first_name", "blocked", "updated_at")
+
+    def __init__(
+        self,
+        enabled: bool = config.USER_WRITE_BUFFER,
+        interval: float = config.USER_WRITE_BUFFER_INTERVAL,
+        max_rows: int = config.USER_WRITE_BUFFER_MAX_ROWS,
+    ) -> None:
+        """
+        :param enabled: Whether :class:`UserService` routes writes through the buffer.
+        :type enabled: bool
+        :param interval: Seconds to collect rows before flushing.
+        :type interval: float
+        :param max_rows: Number of pending users that triggers an immediate flush.
+        :type max_rows: int
+        """
+        self.enabled = enabled
+        self.interval = interval
+        self.max_rows = max(1, max_rows)
+
+        self._pending: dict[int, tuple[Optional[str], Optional[str], list[asyncio.Future]]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+
+        self.flushes = 0
+        self.rows_written = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Snapshot of buffer counters.
+
+        :return: Pending rows, number of flushes and rows written.
+        :rtype: dict[str, int]
+        """
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+    async def save(self, chat_id: int, username: Optional[str], first_name: Optional[str]) -> Users:
+        """
+        Queue an upsert of the user and wait until its batch is written.
+
+        Several saves of one ``chat_id`` within a batch collapse into one row
+        with the latest profile.
+
+        :param chat_id: Telegram chat ID.
+        :type chat_id: int
+        :param username: Telegram username.
+        :type username: Optional[str]
+        :param first_name: Telegram first name.
+        :type first_name: Optional[str]
+        :return: The saved `Users` instance.
+        :rtype: Users
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        _, _, waiters = self._pending.get(chat_id, (None, None, []))
+        self._pending[chat_id] = (username, first_name, waiters + [future])
+
+        if len(self._pending) >= self.max_rows:
+            self._start_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.create_task(self._flush_later())
+        return await future
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = loop.create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write all pending users now.
+
+        :return: Number of users written.
+        :rtype: int
+        """
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            users = await sync_to_async(self._write)(batch)
+        except Exception as exc:
+            logger.exception("Buffered upsert of %s users failed.", len(batch))
+            for _, _, waiters in batch.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(exc)
+            return 0
+
+        self.flushes += 1
+        self.rows_written += len(users)
+        for user in users:
+            for waiter in batch[user.chat_id][2]:
+                if not waiter.done():
+                    waiter.set_result(user)
+        return len(users)
+
+    def _write(self, batch: dict[int, tuple]) -> list[Users]:
+        users = Users.objects.bulk_create(
+            [
+                Users(chat_id=chat_id, username=username, first_name=first_name)
+                for chat_id, (username, first_name, _) in batch.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["chat_id"],
+            update_fields=list(self.UPDATE_FIELDS),
+        )
+        user_cache.set_many([user for user in users if user.pk is not None])
+        return users
+
+    async def close(self) -> None:
+        """
+        Write pending users and wait for in-flight flushes.
+
+        :return: None
+        :rtype: None
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+
+user_write_buffer = UserWriteBuffer()
 
 
 class UserService:
@@ -14,33 +434,70 @@ class UserService:
     creating and retrieving user records from the database
     based on Telegram message data.
 
-    Asynchronous methods are wrapped with `@sync_to_async` to make
-    Django ORM operations safe in async contexts (e.g., Aiogram handlers).
+    Lookups go through :data:`user_cache` first, so a known user with an
+    unchanged profile costs no database round-trip; a changed username or
+    first name is written back. Asynchronous methods are native coroutines built on
+    Django's async ORM API (`aget_or_create`, `aget`) for use inside async
+    bot handlers; together with `DatabaseContextMiddleware`, which runs each
+    update on one of a pool of ORM threads, concurrent handlers no longer
+    queue behind a single `sync_to_async` thread.
     """
 
     @staticmethod
-    @sync_to_async
-    def save_user_async(message: Message) -> Users:
+    async def save_user_async(message: Message) -> Users:
         """
         Save or retrieve a user record asynchronously.
 
-        This method wraps `save_user_sync()` in a thread-safe asynchronous call
-        using `sync_to_async`, allowing it to be called inside async bot handlers.
+        Returns the cached user when known and unchanged. Otherwise the user
+        is upserted through :data:`user_write_buffer` when it is enabled, or
+        with `Users.objects.aget_or_create()` (plus an update of a changed
+        profile or blocked flag) and cached. A cache hit still clears
+        ``blocked`` with a conditional ``UPDATE``, since the entry may predate
+        a Celery worker marking the chat blocked.
 
         :param message: Telegram message object containing user information.
         :type message: aiogram.types.Message
         :return: The corresponding `Users` model instance.
         :rtype: Users
         """
-        return UserService.save_user_sync(message)
+        tg_user = message.from_user
+        cached = await user_cache.aget(tg_user.id)
+        if cached is not None and not _profile_changed(cached, tg_user.username, tg_user.first_name):
+            await Users.objects.filter(chat_id=tg_user.id, blocked=True).aupdate(
+                blocked=False, updated_at=timezone.now(),
+            )
+            return _user_from_cache(cached)
+
+        if user_write_buffer.enabled:
+            return await user_write_buffer.save(tg_user.id, tg_user.username, tg_user.first_name)
+
+        user, created = await Users.objects.aget_or_create(
+            chat_id=tg_user.id,
+            defaults={
+                "username": tg_user.username,
+                "first_name": tg_user.first_name,
+            },
+        )
+        if not created and (
+            user.blocked or _profile_changed(user, tg_user.username, tg_user.first_name)
+        ):
+            user.username = tg_user.username
+            user.first_name = tg_user.first_name
+            user.blocked = False
+            await user.asave(update_fields=UserWriteBuffer.UPDATE_FIELDS)
+        await user_cache.aset(user)
+        return user
 
     @staticmethod
     def save_user_sync(message: Message) -> Users:
         """
         Save or retrieve a user record synchronously.
 
-        Checks if a Telegram user already exists in the database by `chat_id`.
-        If not, creates a new record using the user’s username and first name.
+        Checks the user cache and then the database for an existing
+        Telegram user by `chat_id`. If not found, creates a new record
+        using the user’s username and first name; if found with a different
+        username or first name, or blocked, updates and unblocks it. A cache
+        hit still unblocks the stored row.
 
         :param message: Telegram message object containing user information.
         :type message: aiogram.types.Message
@@ -48,13 +505,28 @@ class UserService:
         :rtype: Users
         """
         tg_user = message.from_user
-        user, _ = Users.objects.get_or_create(
+        cached = user_cache.get(tg_user.id)
+        if cached is not None and not _profile_changed(cached, tg_user.username, tg_user.first_name):
+            Users.objects.filter(chat_id=tg_user.id, blocked=True).update(
+                blocked=False, updated_at=timezone.now(),
+            )
+            return _user_from_cache(cached)
+
+        user, created = Users.objects.get_or_create(
             chat_id=tg_user.id,
             defaults={
                 "username": tg_user.username,
                 "first_name": tg_user.first_name,
             },
         )
+        if not created and (
+            user.blocked or _profile_changed(user, tg_user.username, tg_user.first_name)
+        ):
+            user.username = tg_user.username
+            user.first_name = tg_user.first_name
+            user.blocked = False
+            user.save(update_fields=UserWriteBuffer.UPDATE_FIELDS)
+        user_cache.set(user)
         return user
 
     @staticmethod
@@ -67,24 +539,38 @@ class UserService:
         :return: The user’s database ID if found, otherwise ``None``.
         :rtype: Optional[int]
         """
+        cached = user_cache.get(chat_id)
+        if cached is not None:
+            return cached["id"]
+
         try:
             user = Users.objects.get(chat_id=chat_id)
-            return user.id
         except Users.DoesNotExist:
             return None
 
+        user_cache.set(user)
+        return user.id
+
     @staticmethod
-    @sync_to_async
-    def get_user_id_async(chat_id: int) -> Optional[int]:
+    async def get_user_id_async(chat_id: int) -> Optional[int]:
         """
         Retrieve a user’s database ID asynchronously by their Telegram `chat_id`.
 
-        This method wraps `get_user_id_sync()` in a thread-safe asynchronous call
-        using `sync_to_async`.
+        Returns the cached ID when known; otherwise uses `Users.objects.aget()`.
 
         :param chat_id: The Telegram user's chat ID.
         :type chat_id: int
         :return: The user’s database ID if found, otherwise ``None``.
         :rtype: Optional[int]
         """
-        return UserService.get_user_id_sync(chat_id)
+        cached = await user_cache.aget(chat_id)
+        if cached is not None:
+            return cached["id"]
+
+        try:
+            user = await Users.objects.aget(chat_id=chat_id)
+        except Users.DoesNotExist:
+            return None
+
+        await user_cache.aset(user)
+        return user.id
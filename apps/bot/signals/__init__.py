@@ -0,0 +1,3 @@
+from .metrics import * # noqa
+from .tracing import * # noqa
+from .users import * # noqa
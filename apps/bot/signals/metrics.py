@@ -0,0 +1,14 @@
+from django.dispatch import receiver
+from django.db.backends.signals import connection_created
+
+from apps.bot.utils.metrics import count_queries
+
+
+@receiver(connection_created)
+def count_update_queries(sender, connection, **kwargs) -> None:
+    """
+    Count the queries of every new database connection towards the update
+    being processed (see :func:`apps.bot.utils.metrics.count_queries`).
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
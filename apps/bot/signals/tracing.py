@@ -0,0 +1,14 @@
+from django.dispatch import receiver
+from django.db.backends.signals import connection_created
+
+from apps.bot.utils.tracing import trace_queries
+
+
+@receiver(connection_created)
+def trace_update_queries(sender, connection, **kwargs) -> None:
+    """
+    Record the queries of every new database connection in the trace of
+    the update being processed (see :func:`apps.bot.utils.tracing.trace_queries`).
+    """
+    if trace_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_queries)
@@ -0,0 +1,48 @@
+from django.dispatch import receiver
+from django.db.models.signals import pre_save
+from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+
+from apps.bot.models.users import Users
+from apps.bot.services.users import user_cache
+
+
+@receiver(pre_save, sender=Users)
+def invalidate_previous_chat_id(sender, instance: Users, update_fields=None, **kwargs) -> None:
+    """
+    Drop the cache entry of the old ``chat_id`` when an existing user's
+    ``chat_id`` is edited (e.g. in the admin).
+
+    The old value is the one loaded with the instance; the row is only read
+    again for instances that were not loaded with their ``chat_id``. Saves
+    whose ``update_fields`` leave ``chat_id`` out cannot change it and cost
+    nothing.
+    """
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and "chat_id" not in update_fields:
+        return
+
+    previous = getattr(instance, "_loaded_chat_id", None)
+    if previous is None:
+        previous = sender.objects.filter(pk=instance.pk).values_list("chat_id", flat=True).first()
+    if previous is not None and previous != instance.chat_id:
+        user_cache.delete(previous)
+
+
+@receiver(post_save, sender=Users)
+def invalidate_saved_user(sender, instance: Users, created: bool, **kwargs) -> None:
+    """
+    Drop the cache entry of an edited user so the next lookup reloads it.
+    """
+    instance._loaded_chat_id = instance.chat_id
+    if not created:
+        user_cache.delete(instance.chat_id)
+
+
+@receiver(post_delete, sender=Users)
+def invalidate_deleted_user(sender, instance: Users, **kwargs) -> None:
+    """
+    Drop the cache entry of a deleted user.
+    """
+    user_cache.delete(instance.chat_id)
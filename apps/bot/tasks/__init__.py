@@ -1 +1,2 @@
 from .notify import * # noqa
+from .campaigns import * # noqa
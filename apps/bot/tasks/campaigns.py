@@ -0,0 +1,140 @@
+from uuid import uuid4
+from typing import Any
+from typing import Optional
+
+from celery import chord
+from celery import shared_task
+from django.utils import timezone
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.services.broadcast import BroadcastReport
+from apps.bot.services.broadcast_queue import broadcast_queue
+from apps.bot.services.campaigns import CampaignService
+from apps.bot.services.campaigns import campaign_lock
+from apps.bot.services.campaigns import CampaignDeliveryRecorder
+from apps.bot.tasks.notify import broadcast_to
+from apps.bot.utils.logging import logger
+from apps.bot.utils.telegram import run_in_worker_loop
+from src.settings.config.configs import config
+
+
+def queue_campaign(campaign_id: int) -> bool:
+    """
+    Start or resume a campaign on the configured ``BROADCAST_BACKEND``:
+    a :func:`run_campaign` task, or a job for the bot process.
+
+    Nothing is queued while a previous run still holds the campaign lock
+    (e.g. the chunks of a just paused run finishing their page) or when the
+    campaign is completed or cancelled, since the run would skip it.
+
+    :param campaign_id: Campaign ID.
+    :type campaign_id: int
+    :return: Whether a run was queued.
+    :rtype: bool
+    """
+    if campaign_lock(campaign_id).owner() is not None:
+        logger.info("Campaign id=%s is still being sent; not queueing.", campaign_id)
+        return False
+    if not Campaign.objects.filter(pk=campaign_id, status__in=CampaignService.STARTABLE).exists():
+        logger.info("Campaign id=%s cannot be started; not queueing.", campaign_id)
+        return False
+
+    if config.BROADCAST_BACKEND == "bot":
+        broadcast_queue.enqueue_campaign(campaign_id)
+    else:
+        run_campaign.delay(campaign_id)
+    return True
+
+
+@shared_task
+def run_campaign(campaign_id: int, chunk_size: int = config.BROADCAST_CHUNK_SIZE) -> dict[str, Any]:
+    campaign = Campaign.objects.get(pk=campaign_id)
+    token = uuid4().hex
+    lock = campaign_lock(campaign_id)
+    if not lock.acquire(token):
+        logger.info("Campaign id=%s is already being sent; skipping.", campaign_id)
+        return {"campaign_id": campaign_id, "skipped": True}
+
+    if not CampaignService.start(campaign):
+        lock.release(token)
+        logger.info("Campaign id=%s is %s; not starting.", campaign_id, campaign.status)
+        return {"campaign_id": campaign_id, "skipped": True}
+
+    CampaignService.prepare(campaign)
+    chunks = CampaignService.plan_chunks(campaign_id, chunk_size)
+    logger.info("Campaign id=%s: dispatching %s chunks.", campaign_id, len(chunks))
+    if chunks:
+        chord(
+            send_campaign_chunk.s(campaign_id, lower, upper, token)
+            for lower, upper in chunks
+        )(finish_campaign.s(campaign_id, token))
+    else:
+        finish_campaign([], campaign_id, token)
+
+    return {"campaign_id": campaign_id, "chunks": len(chunks)}
+
+
+async def send_campaign_text(
+    campaign: Campaign,
+    lower: Optional[int],
+    upper: Optional[int],
+) -> BroadcastReport:
+    return await broadcast_to(
+        campaign.text,
+        CampaignService.iter_pending_chat_ids(campaign.pk, lower, upper),
+        CampaignDeliveryRecorder(campaign.pk),
+    )
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def send_campaign_chunk(
+    campaign_id: int,
+    lower: Optional[int],
+    upper: Optional[int],
+    token: str,
+) -> dict[str, Any]:
+    campaign = Campaign.objects.get(pk=campaign_id)
+    report = run_in_worker_loop(send_campaign_text(campaign, lower, upper)).as_dict()
+    campaign_lock(campaign_id).extend(token)
+    logger.info("Campaign id=%s chunk (%s, %s] done: %s", campaign_id, lower, upper, report)
+    return report
+
+
+@shared_task
+def finish_campaign(results: list[dict[str, Any]], campaign_id: int, token: str) -> dict[str, Any]:
+    campaign = Campaign.objects.get(pk=campaign_id)
+    counts = CampaignService.refresh_counts(campaign)
+    campaign_lock(campaign_id).release(token)
+    logger.info(
+        "Campaign id=%s finished a run: status=%s sent=%s failed=%s",
+        campaign_id,
+        campaign.status,
+        campaign.sent_count,
+        campaign.failed_count,
+    )
+    return {
+        "campaign_id": campaign_id,
+        "status": campaign.status,
+        "counts": {str(status): total for status, total in counts.items()},
+    }
+
+
+@shared_task
+def dispatch_scheduled_campaigns() -> list[int]:
+    due = Campaign.objects.filter(
+        status=Campaign.Status.SCHEDULED,
+        scheduled_at__lte=timezone.now(),
+    ).values_list("pk", flat=True)
+
+    return [campaign_id for campaign_id in due if queue_campaign(campaign_id)]
+
+
+@shared_task
+def retry_campaign_failures(campaign_id: int) -> int:
+    campaign = Campaign.objects.get(pk=campaign_id)
+    retried = CampaignService.retry_failures(campaign)
+    if retried:
+        if campaign.status == Campaign.Status.COMPLETED:
+            Campaign.objects.filter(pk=campaign_id).update(status=Campaign.Status.PAUSED)
+        queue_campaign(campaign_id)
+    return retried
@@ -1,35 +1,66 @@
-import time
+import asyncio
+from uuid import uuid4
 from typing import Any
+from typing import Optional
+from typing import AsyncIterator
 
-import requests
+from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError
+from celery import chord
 from celery import shared_task
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from celery.signals import worker_init
+from celery.signals import worker_process_shutdown
 
 from apps.bot.models.users import Users
+from apps.bot.services.broadcast import Chunk
+from apps.bot.services.broadcast import ChatIds
+from apps.bot.services.broadcast import plan_keyset_chunks
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.broadcast import BroadcastReport
+from apps.bot.services.broadcast import BroadcastCheckpoint
+from apps.bot.services.broadcast_queue import broadcast_queue
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.utils.locks import RedisLock
 from apps.bot.utils.logging import logger
+from apps.bot.utils.metrics import start_metrics_server
+from apps.bot.utils.telegram import get_worker_bot
+from apps.bot.utils.telegram import run_in_worker_loop
+from apps.bot.utils.telegram import close_worker_client
 from src.settings.config.configs import config
 
 
-def build_telegram_session() -> requests.Session:
-    retry = Retry(
-        total=3,
-        connect=3,
-        read=3,
-        status=3,
-        allowed_methods=frozenset(["POST"]),
-        status_forcelist=[429, 500, 502, 503, 504],
-        backoff_factor=1.0,
-        respect_retry_after_header=True,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-
-    session = requests.Session()
-    session.mount("https://", adapter)
-    return session
+async def send_message(chat_id: int, text: str, max_attempts: int = 3) -> bool:
+    bot = get_worker_bot()
+    recorder = DeliveryRecorder()
+    error: Exception = RuntimeError("no attempt made")
+    try:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+                recorder.delivered(chat_id)
+                return True
+            except (TelegramForbiddenError, TelegramBadRequest) as exc:
+                logger.warning("Telegram API error for chat_id=%s: %s", chat_id, exc)
+                recorder.failed(chat_id, exc)
+                return False
+            except (TelegramAPIError, asyncio.TimeoutError) as exc:
+                logger.warning(
+                    "Error while sending Telegram message to chat_id=%s (attempt %s/%s): %s",
+                    chat_id,
+                    attempt,
+                    max_attempts,
+                    exc,
+                )
+                error = exc
 
+            if attempt < max_attempts:
+                await asyncio.sleep(attempt)
 
-TELEGRAM_SESSION = build_telegram_session()
+        recorder.failed(chat_id, error, unreachable=False)
+        return False
+    finally:
+        await recorder.flush()
 
 
 def safe_send_message(chat_id: int, text: str, max_attempts: int = 3) -> bool:
@@ -37,69 +68,201 @@ def safe_send_message(chat_id: int, text: str, max_attempts: int = 3) -> bool:
         logger.error("BOT_TOKEN is missing; cannot send Telegram notifications.")
         return False
 
-    url = f"https://api.telegram.org/bot{config.BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "HTML",
-    }
-
-    for attempt in range(1, max_attempts + 1):
-        try:
-            response = TELEGRAM_SESSION.post(url, json=payload, timeout=10)
-            if response.status_code == 200:
-                return True
+    return run_in_worker_loop(send_message(chat_id, text, max_attempts))
 
-            if response.status_code == 429:
-                retry_after = 1
-                try:
-                    data: dict[str, Any] = response.json()
-                    retry_after = int(data.get("parameters", {}).get("retry_after", 1))
-                except Exception:
-                    retry_after = 1
 
-                logger.warning(
-                    "Telegram rate-limited message for chat_id=%s. Attempt %s/%s. Retrying in %ss.",
-                    chat_id,
-                    attempt,
-                    max_attempts,
-                    retry_after,
-                )
-                time.sleep(retry_after)
-                continue
-
-            logger.warning(
-                "Telegram API error for chat_id=%s. status=%s body=%s",
-                chat_id,
-                response.status_code,
-                response.text,
-            )
-        except requests.RequestException as exc:
-            logger.warning(
-                "Network error while sending Telegram message to chat_id=%s (attempt %s/%s): %s",
-                chat_id,
-                attempt,
-                max_attempts,
-                exc,
-            )
-
-        if attempt < max_attempts:
-            time.sleep(attempt)
-
-    return False
+def plan_chat_id_chunks(chunk_size: int) -> list[Chunk]:
+    return plan_keyset_chunks(Users.objects.recipients(), "chat_id", chunk_size)
+
+
+def iter_recipient_chat_ids(
+    lower: Optional[int] = None,
+    upper: Optional[int] = None,
+) -> AsyncIterator[int]:
+    chat_ids = Users.objects.recipients()
+    if lower is not None:
+        chat_ids = chat_ids.filter(chat_id__gt=lower)
+    if upper is not None:
+        chat_ids = chat_ids.filter(chat_id__lte=upper)
+    return chat_ids.astream_chat_ids()
+
+
+async def broadcast_to(
+    text: str,
+    chat_ids: ChatIds,
+    recorder: DeliveryRecorder,
+) -> BroadcastReport:
+    bot = get_worker_bot()
+    engine = BroadcastEngine(
+        send=lambda chat_id: bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML"),
+        recorder=recorder,
+    )
+    return await engine.run(chat_ids)
+
+
+async def broadcast_text(
+    text: str,
+    lower: Optional[int] = None,
+    upper: Optional[int] = None,
+) -> BroadcastReport:
+    return await broadcast_to(text, iter_recipient_chat_ids(lower, upper), DeliveryRecorder())
+
+
+def broadcast_lock(lock: str) -> RedisLock:
+    return RedisLock(
+        f"broadcast:{lock}",
+        ttl=config.BROADCAST_LOCK_TTL,
+        owner_ttl=config.BROADCAST_CHECKPOINT_TTL,
+    )
+
+
+def resumable_run(singleton: RedisLock) -> Optional[str]:
+    """
+    Find the run of a singleton broadcast that stopped without finishing.
+
+    The lock's owner token is the ``run_id``. A run that acquired the lock
+    and never released it is resumed when its lock has expired (the
+    coordinator or the chord died) or when all of its chunks are done (only
+    :func:`finish_broadcast` was lost); a run still holding a live lock with
+    chunks left is running and is not touched.
+
+    :param singleton: Lock of the broadcast.
+    :type singleton: RedisLock
+    :return: ``run_id`` to resume, if any.
+    :rtype: Optional[str]
+    """
+    run_id = singleton.last_owner()
+    if run_id is None:
+        return None
+
+    holder = singleton.owner()
+    if holder is None:
+        return run_id
+    if holder == run_id:
+        checkpoint = BroadcastCheckpoint(run_id)
+        chunks = checkpoint.load_plan()
+        if chunks is not None and len(checkpoint.done_chunks()) >= len(chunks):
+            return run_id
+    return None
+
+
+@shared_task
+def broadcast_to_all_users(
+    text: str,
+    run_id: Optional[str] = None,
+    chunk_size: int = config.BROADCAST_CHUNK_SIZE,
+    lock: Optional[str] = None,
+) -> dict[str, Any]:
+    if not config.BOT_TOKEN:
+        logger.error("BOT_TOKEN is missing; cannot send Telegram notifications.")
+        return {"run_id": run_id, "chunks": 0, "pending": 0}
+
+    singleton = None
+    if lock is not None:
+        singleton = broadcast_lock(lock)
+        if run_id is None:
+            run_id = resumable_run(singleton)
+            if run_id is not None:
+                logger.info("Broadcast %r: resuming unfinished run_id=%s.", lock, run_id)
+
+    run_id = run_id or uuid4().hex
+    if singleton is not None and not singleton.acquire(run_id):
+        logger.info(
+            "Broadcast %r is still running (run_id=%s); skipping run_id=%s.",
+            lock,
+            singleton.owner(),
+            run_id,
+        )
+        return {"run_id": run_id, "skipped": True, "running": singleton.owner()}
+
+    checkpoint = BroadcastCheckpoint(run_id)
+    chunks = checkpoint.load_plan()
+    if chunks is None:
+        chunks = checkpoint.save_plan(plan_chat_id_chunks(chunk_size))
+
+    done = checkpoint.done_chunks()
+    pending = [
+        (index, lower, upper)
+        for index, (lower, upper) in enumerate(chunks)
+        if index not in done
+    ]
+    logger.info(
+        "Broadcast run_id=%s: %s chunks, %s already done, dispatching %s.",
+        run_id,
+        len(chunks),
+        len(done),
+        len(pending),
+    )
+    if pending:
+        chord(
+            send_broadcast_chunk.s(run_id, index, lower, upper, text, lock=lock)
+            for index, lower, upper in pending
+        )(finish_broadcast.s(run_id, lock=lock))
+    elif lock is not None:
+        finish_broadcast([], run_id, lock=lock)
+
+    return {"run_id": run_id, "chunks": len(chunks), "pending": len(pending)}
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def send_broadcast_chunk(
+    run_id: str,
+    index: int,
+    lower: Optional[int],
+    upper: Optional[int],
+    text: str,
+    lock: Optional[str] = None,
+) -> dict[str, Any]:
+    checkpoint = BroadcastCheckpoint(run_id)
+    if checkpoint.is_done(index):
+        logger.info("Broadcast run_id=%s chunk %s already done; skipping.", run_id, index)
+        return {"skipped": True}
+
+    report = run_in_worker_loop(broadcast_text(text, lower, upper)).as_dict()
+    checkpoint.mark_done(index, report)
+    if lock is not None:
+        broadcast_lock(lock).extend(run_id)
+    logger.info("Broadcast run_id=%s chunk %s done: %s", run_id, index, report)
+    return report
 
 
 @shared_task
-def send_hi_to_all_users() -> None:
-    sent = 0
-    failed = 0
-
-    chat_ids = Users.objects.exclude(chat_id__isnull=True).values_list("chat_id", flat=True)
-    for chat_id in chat_ids.iterator():
-        if safe_send_message(chat_id, "Hi 👋"):
-            sent += 1
-        else:
-            failed += 1
-        time.sleep(0.05)
-
-    logger.info("Notification task completed. sent=%s failed=%s", sent, failed)
+def finish_broadcast(
+    results: list[dict[str, Any]],
+    run_id: str,
+    lock: Optional[str] = None,
+) -> dict[str, Any]:
+    reports = BroadcastCheckpoint(run_id).reports()
+    sent = sum(report["sent"] for report in reports)
+    failed = sum(report["failed"] for report in reports)
+    retried = sum(report["retried"] for report in reports)
+    logger.info(
+        "Broadcast run_id=%s completed. chunks=%s sent=%s failed=%s retried=%s",
+        run_id,
+        len(reports),
+        sent,
+        failed,
+        retried,
+    )
+    if lock is not None:
+        broadcast_lock(lock).release(run_id)
+    return {"run_id": run_id, "chunks": len(reports), "sent": sent, "failed": failed}
+
+
+@shared_task
+def send_hi_to_all_users() -> dict[str, Any]:
+    if config.BROADCAST_BACKEND == "bot":
+        if not broadcast_queue.enqueue_text("Hi 👋", lock="send_hi"):
+            return {"lock": "send_hi", "skipped": True}
+        return {"queued": broadcast_queue.key}
+    return broadcast_to_all_users("Hi 👋", lock="send_hi")
+
+
+@worker_init.connect
+def serve_metrics(**kwargs: Any) -> None:
+    start_metrics_server(config.METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def close_telegram_client(**kwargs: Any) -> None:
+    close_worker_client()
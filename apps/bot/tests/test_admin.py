@@ -0,0 +1,157 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.models.users import Users
+from apps.bot.services.campaigns import CampaignService
+from apps.bot.utils.pagination import EstimatedCountPaginator
+
+
+class BotUserAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        Users.objects.bulk_create([
+            Users(chat_id=1001, username="alice"),
+            Users(chat_id=1002, username="alicia"),
+            Users(chat_id=2001, username="bob"),
+            Users(chat_id=3001, username="carol", blocked=True),
+        ])
+
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:bot_users_changelist")
+
+    def search(self, term: str) -> list[int]:
+        response = self.client.get(self.url, {"q": term}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return sorted(user.chat_id for user in response.context["cl"].result_list)
+
+    def test_numeric_search_is_an_exact_chat_id_match(self) -> None:
+        self.assertEqual(self.search("1001"), [1001])
+        self.assertEqual(self.search("100"), [])
+
+    def test_text_search_matches_username_prefixes(self) -> None:
+        self.assertEqual(self.search("@ali"), [1001, 1002])
+        self.assertEqual(self.search("lic"), [])
+
+    def test_send_message_creates_a_campaign_for_selected_reachable_users(self) -> None:
+        selected = Users.objects.filter(chat_id__in=[1001, 3001]).values_list("pk", flat=True)
+
+        with patch("apps.bot.admin.users.queue_campaign") as queue_mock:
+            response = self.client.post(
+                self.url,
+                {"action": "send_message", "_selected_action": list(selected), "text": "Hello"},
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 302)
+        campaign = Campaign.objects.get()
+        self.assertEqual(campaign.text, "Hello")
+        self.assertEqual(list(campaign.deliveries.values_list("chat_id", flat=True)), [1001])
+        self.assertIsNotNone(campaign.prepared_at)
+        queue_mock.assert_called_once_with(campaign.pk)
+
+    def test_send_message_to_everyone_leaves_recipients_to_the_campaign_run(self) -> None:
+        with patch("apps.bot.admin.users.queue_campaign") as queue_mock:
+            self.client.post(
+                self.url,
+                {"action": "send_message", "select_across": "1", "_selected_action": ["1"], "text": "Hi"},
+                secure=True,
+            )
+
+        campaign = Campaign.objects.get()
+        self.assertIsNone(campaign.prepared_at)
+        self.assertFalse(campaign.deliveries.exists())
+        queue_mock.assert_called_once_with(campaign.pk)
+
+    def test_send_message_to_a_filtered_selection_builds_recipients_in_the_campaign_run(self) -> None:
+        with patch("apps.bot.admin.users.queue_campaign") as queue_mock:
+            response = self.client.post(
+                f"{self.url}?q=@ali&blocked__exact=0",
+                {"action": "send_message", "select_across": "1", "_selected_action": ["1"], "text": "Hi"},
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 302)
+        campaign = Campaign.objects.get()
+        self.assertEqual(campaign.recipient_filter, {"lookups": {"blocked__exact": ["0"]}, "search": "@ali"})
+        self.assertFalse(campaign.deliveries.exists())
+        queue_mock.assert_called_once_with(campaign.pk)
+
+        CampaignService.prepare(campaign)
+        self.assertEqual(sorted(campaign.deliveries.values_list("chat_id", flat=True)), [1001, 1002])
+
+    def test_send_message_requires_text(self) -> None:
+        with patch("apps.bot.admin.users.queue_campaign") as queue_mock:
+            self.client.post(
+                self.url,
+                {"action": "send_message", "_selected_action": ["1"], "text": " "},
+                secure=True,
+            )
+
+        self.assertFalse(Campaign.objects.exists())
+        queue_mock.assert_not_called()
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in range(1, 4))
+
+    def paginator(self, estimate: int) -> EstimatedCountPaginator:
+        paginator = EstimatedCountPaginator(Users.objects.order_by("pk"), 2, exact_limit=1000)
+        postgresql = MagicMock(vendor="postgresql")
+        patcher = patch("apps.bot.utils.pagination.connections", {"default": postgresql})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        estimated = patch.object(EstimatedCountPaginator, "estimate", return_value=estimate)
+        estimated.start()
+        self.addCleanup(estimated.stop)
+        return paginator
+
+    def test_counts_exactly_on_other_databases(self) -> None:
+        paginator = EstimatedCountPaginator(Users.objects.order_by("pk"), 2, exact_limit=0)
+
+        self.assertEqual(paginator.count, 3)
+
+    def test_uses_the_planner_estimate_for_large_querysets(self) -> None:
+        paginator = self.paginator(estimate=2_500_000)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 2_500_000)
+        self.assertEqual(paginator.num_pages, 1_250_000)
+
+    def test_counts_exactly_below_the_limit(self) -> None:
+        self.assertEqual(self.paginator(estimate=10).count, 3)
+
+
+class CampaignAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        cls.paused = Campaign.objects.create(name="Spring", text="Hello", status=Campaign.Status.PAUSED)
+        cls.finished = Campaign.objects.create(name="Autumn", text="Hello", status=Campaign.Status.COMPLETED)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+
+    def test_start_warns_about_campaigns_that_were_not_queued(self) -> None:
+        with patch(
+            "apps.bot.admin.campaigns.queue_campaign",
+            side_effect=lambda campaign_id: campaign_id == self.paused.pk,
+        ):
+            response = self.client.post(
+                reverse("admin:bot_campaign_changelist"),
+                {"action": "start_campaigns", "_selected_action": [self.paused.pk, self.finished.pk]},
+                secure=True,
+                follow=True,
+            )
+
+        sent = [(message.level_tag, message.message) for message in response.context["messages"]]
+        self.assertIn(("success", "Queued 1 campaign(s)."), sent)
+        self.assertTrue(any(level == "warning" and "Autumn" in text for level, text in sent))
@@ -0,0 +1,287 @@
+import time
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from django.test import TestCase
+
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.broadcast import BroadcastReport
+from apps.bot.models.users import Users
+from apps.bot.tasks.notify import broadcast_to_all_users
+from apps.bot.tasks.notify import finish_broadcast
+from apps.bot.tasks.notify import plan_chat_id_chunks
+from apps.bot.tasks.notify import send_broadcast_chunk
+from apps.bot.tasks.notify import send_hi_to_all_users
+from src.settings.config.configs import config
+
+
+METHOD = SendMessage(chat_id=1, text="Hi")
+
+
+class BroadcastEngineTests(IsolatedAsyncioTestCase):
+    async def test_sends_to_every_chat(self) -> None:
+        sent: list[int] = []
+
+        async def send(chat_id: int) -> None:
+            sent.append(chat_id)
+
+        report = await BroadcastEngine(send, concurrency=4).run(range(10))
+
+        self.assertEqual(sorted(sent), list(range(10)))
+        self.assertEqual(report.sent, 10)
+        self.assertEqual(report.failed, 0)
+
+    async def test_accepts_async_iterables(self) -> None:
+        async def chat_ids():
+            for chat_id in (1, 2, 3):
+                yield chat_id
+
+        report = await BroadcastEngine(AsyncMock()).run(chat_ids())
+
+        self.assertEqual(report.sent, 3)
+
+    async def test_retry_after_reschedules_only_the_limited_chat(self) -> None:
+        attempts: dict[int, int] = {}
+        delivered_at: dict[int, float] = {}
+
+        async def send(chat_id: int) -> None:
+            attempts[chat_id] = attempts.get(chat_id, 0) + 1
+            if chat_id == 1 and attempts[chat_id] == 1:
+                raise TelegramRetryAfter(method=METHOD, message="Flood", retry_after=0.2)
+            delivered_at[chat_id] = time.monotonic()
+
+        started = time.monotonic()
+        report = await BroadcastEngine(send, concurrency=1).run([1, 2, 3])
+
+        self.assertEqual(report.sent, 3)
+        self.assertEqual(report.retried, 1)
+        self.assertLess(delivered_at[3] - started, 0.2)
+        self.assertGreaterEqual(delivered_at[1] - started, 0.2)
+
+    async def test_forbidden_is_failed_without_retry(self) -> None:
+        send = AsyncMock(side_effect=TelegramForbiddenError(method=METHOD, message="blocked"))
+
+        report = await BroadcastEngine(send).run([1])
+
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(send.await_count, 1)
+
+    async def test_transient_errors_give_up_after_max_attempts(self) -> None:
+        send = AsyncMock(side_effect=OSError("connection reset"))
+
+        report = await BroadcastEngine(
+            send,
+            max_attempts=3,
+            retry_backoff=0,
+        ).run([1])
+
+        self.assertEqual(send.await_count, 3)
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(report.retried, 2)
+
+    async def test_limiter_error_fails_the_chat_instead_of_hanging_the_run(self) -> None:
+        async def acquire(chat_id: int) -> None:
+            if chat_id == 2:
+                raise RuntimeError("limiter unavailable")
+
+        send = AsyncMock()
+        engine = BroadcastEngine(send, limiter=MagicMock(acquire=acquire))
+
+        report = await asyncio.wait_for(engine.run([1, 2, 3]), timeout=1)
+
+        self.assertEqual(report.sent, 2)
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(send.await_count, 2)
+
+
+class BroadcastFanOutTests(TestCase):
+    def test_plan_splits_chat_ids_into_keyset_chunks(self) -> None:
+        for chat_id in (50, 10, 40, 20, 30):
+            Users.objects.create(chat_id=chat_id)
+
+        self.assertEqual(plan_chat_id_chunks(2), [(None, 20), (20, 40), (40, None)])
+        self.assertEqual(plan_chat_id_chunks(5), [(None, 50)])
+
+    def test_plan_is_empty_without_users(self) -> None:
+        self.assertEqual(plan_chat_id_chunks(100), [])
+
+    def test_coordinator_dispatches_only_unfinished_chunks(self) -> None:
+        checkpoint = MagicMock()
+        checkpoint.load_plan.return_value = [(None, 20), (20, 40), (40, None)]
+        checkpoint.done_chunks.return_value = {0}
+
+        with patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch("apps.bot.tasks.notify.chord") as chord_mock:
+            result = broadcast_to_all_users("Hi", run_id="run-1")
+
+        header = list(chord_mock.call_args.args[0])
+        self.assertEqual([signature.args[1] for signature in header], [1, 2])
+        self.assertEqual(header[0].args, ("run-1", 1, 20, 40, "Hi"))
+        self.assertEqual(result, {"run_id": "run-1", "chunks": 3, "pending": 2})
+
+    def test_finished_chunk_is_not_sent_again(self) -> None:
+        checkpoint = MagicMock()
+        checkpoint.is_done.return_value = True
+
+        with patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch("apps.bot.tasks.notify.broadcast_text", AsyncMock()) as broadcast_mock:
+            result = send_broadcast_chunk("run-1", 0, None, 20, "Hi")
+
+        self.assertEqual(result, {"skipped": True})
+        broadcast_mock.assert_not_awaited()
+        checkpoint.mark_done.assert_not_called()
+
+    def test_chunk_records_its_report(self) -> None:
+        checkpoint = MagicMock()
+        checkpoint.is_done.return_value = False
+        report = BroadcastReport(sent=2, failed=1, elapsed=1.0)
+
+        with patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch(
+            "apps.bot.tasks.notify.broadcast_text",
+            AsyncMock(return_value=report),
+        ) as broadcast_mock:
+            result = send_broadcast_chunk("run-1", 3, 20, 40, "Hi")
+
+        broadcast_mock.assert_awaited_once_with("Hi", 20, 40)
+        checkpoint.mark_done.assert_called_once_with(3, report.as_dict())
+        self.assertEqual(result["sent"], 2)
+
+
+class BroadcastSingletonTests(TestCase):
+    def test_overlapping_run_is_skipped(self) -> None:
+        singleton = MagicMock()
+        singleton.acquire.return_value = False
+        singleton.owner.return_value = "run-1"
+
+        with patch("apps.bot.tasks.notify.RedisLock", return_value=singleton), patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+        ) as checkpoint_mock, patch("apps.bot.tasks.notify.chord") as chord_mock:
+            result = broadcast_to_all_users("Hi", run_id="run-2", lock="send_hi")
+
+        self.assertEqual(result, {"run_id": "run-2", "skipped": True, "running": "run-1"})
+        checkpoint_mock.assert_not_called()
+        chord_mock.assert_not_called()
+
+    def test_lock_is_passed_through_the_chord_and_released_at_the_end(self) -> None:
+        singleton = MagicMock()
+        singleton.acquire.return_value = True
+        checkpoint = MagicMock()
+        checkpoint.load_plan.return_value = [(None, None)]
+        checkpoint.done_chunks.return_value = set()
+        checkpoint.reports.return_value = []
+
+        with patch("apps.bot.tasks.notify.RedisLock", return_value=singleton), patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch("apps.bot.tasks.notify.chord") as chord_mock:
+            broadcast_to_all_users("Hi", run_id="run-1", lock="send_hi")
+            finish_broadcast([], "run-1", lock="send_hi")
+
+        header = list(chord_mock.call_args.args[0])
+        self.assertEqual(header[0].kwargs, {"lock": "send_hi"})
+        self.assertEqual(chord_mock.return_value.call_args.args[0].kwargs, {"lock": "send_hi"})
+        singleton.acquire.assert_called_once_with("run-1")
+        singleton.release.assert_called_once_with("run-1")
+
+    def test_empty_run_releases_the_lock_immediately(self) -> None:
+        singleton = MagicMock()
+        singleton.acquire.return_value = True
+        checkpoint = MagicMock()
+        checkpoint.load_plan.return_value = []
+        checkpoint.done_chunks.return_value = set()
+
+        with patch("apps.bot.tasks.notify.RedisLock", return_value=singleton), patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch("apps.bot.tasks.notify.chord") as chord_mock:
+            broadcast_to_all_users("Hi", run_id="run-1", lock="send_hi")
+
+        chord_mock.assert_not_called()
+        singleton.release.assert_called_once_with("run-1")
+
+    def test_restarted_coordinator_resumes_the_crashed_run(self) -> None:
+        singleton = MagicMock()
+        singleton.acquire.return_value = True
+        singleton.last_owner.return_value = None
+        checkpoint = MagicMock()
+        checkpoint.load_plan.return_value = None
+        checkpoint.save_plan.side_effect = lambda chunks: chunks
+        checkpoint.done_chunks.return_value = set()
+        plan = [(None, 20), (20, 40), (40, None)]
+
+        with patch("apps.bot.tasks.notify.RedisLock", return_value=singleton), patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ) as checkpoint_mock, patch(
+            "apps.bot.tasks.notify.plan_chat_id_chunks",
+            return_value=plan,
+        ), patch("apps.bot.tasks.notify.chord") as chord_mock:
+            chord_mock.return_value.side_effect = RuntimeError("worker lost")
+            with self.assertRaises(RuntimeError):
+                broadcast_to_all_users("Hi", lock="send_hi")
+            crashed = singleton.acquire.call_args.args[0]
+            singleton.release.assert_not_called()
+
+            singleton.owner.return_value = None
+            singleton.last_owner.return_value = crashed
+            checkpoint.load_plan.return_value = plan
+            checkpoint.done_chunks.return_value = {0}
+            chord_mock.reset_mock(return_value=True, side_effect=True)
+            result = broadcast_to_all_users("Hi", lock="send_hi")
+
+        self.assertEqual(result, {"run_id": crashed, "chunks": 3, "pending": 2})
+        checkpoint_mock.assert_called_with(crashed)
+        header = list(chord_mock.call_args.args[0])
+        self.assertEqual([signature.args[:2] for signature in header], [(crashed, 1), (crashed, 2)])
+
+    def test_run_with_a_live_lock_is_not_resumed(self) -> None:
+        singleton = MagicMock()
+        singleton.owner.return_value = "run-1"
+        singleton.last_owner.return_value = "run-1"
+        singleton.acquire.side_effect = lambda token: token == "run-1"
+        checkpoint = MagicMock()
+        checkpoint.load_plan.return_value = [(None, 20), (20, None)]
+        checkpoint.done_chunks.return_value = {0}
+
+        with patch("apps.bot.tasks.notify.RedisLock", return_value=singleton), patch(
+            "apps.bot.tasks.notify.BroadcastCheckpoint",
+            return_value=checkpoint,
+        ), patch("apps.bot.tasks.notify.chord") as chord_mock:
+            result = broadcast_to_all_users("Hi", lock="send_hi")
+
+        self.assertTrue(result["skipped"])
+        self.assertEqual(result["running"], "run-1")
+        chord_mock.assert_not_called()
+
+    def test_broadcast_chunks_are_routed_to_the_bulk_queue(self) -> None:
+        from src.settings.config.celery import app
+
+        route = app.amqp.router.route({}, send_broadcast_chunk.name)
+        self.assertEqual(route["queue"].name, config.CELERY_BROADCAST_QUEUE)
+        route = app.amqp.router.route({}, finish_broadcast.name)
+        self.assertEqual(route["queue"].name, config.CELERY_DEFAULT_QUEUE)
+
+
+class SendHiToAllUsersTaskTests(TestCase):
+    def test_starts_a_sharded_broadcast(self) -> None:
+        with patch(
+            "apps.bot.tasks.notify.broadcast_to_all_users",
+            return_value={"run_id": "abc", "chunks": 1, "pending": 1},
+        ) as broadcast_mock:
+            result = send_hi_to_all_users()
+
+        broadcast_mock.assert_called_once_with("Hi 👋", lock="send_hi")
+        self.assertEqual(result["run_id"], "abc")
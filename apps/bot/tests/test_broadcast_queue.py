@@ -0,0 +1,216 @@
+import json
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.models.users import Users
+from apps.bot.services.broadcast_queue import BroadcastQueue
+from apps.bot.tasks.campaigns import queue_campaign
+from apps.bot.tasks.notify import send_hi_to_all_users
+from apps.bot.utils.locks import RedisLock
+
+
+METHOD = SendMessage(chat_id=1, text="Hi")
+
+
+def locked(acquired: bool = True) -> MagicMock:
+    lock = MagicMock()
+    lock.ttl = 3600
+    lock.acquire.return_value = acquired
+    return lock
+
+
+class BroadcastQueueJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in range(1, 5))
+        Users.objects.filter(chat_id=4).update(blocked=True)
+
+    def setUp(self) -> None:
+        self.queue = BroadcastQueue(concurrency=2)
+        self.bot = MagicMock()
+        self.bot.send_message = AsyncMock()
+
+    async def test_text_job_sends_to_recipients_on_the_given_bot(self) -> None:
+        result = await self.queue.run_job(self.bot, {"kind": "text", "text": "Hi", "lock": None})
+
+        chat_ids = sorted(call.kwargs["chat_id"] for call in self.bot.send_message.await_args_list)
+        self.assertEqual(chat_ids, [1, 2, 3])
+        self.assertEqual(result["sent"], 3)
+        self.assertEqual(self.queue.stats()["sent"], 3)
+        user = await Users.objects.aget(chat_id=1)
+        self.assertIsNotNone(user.last_delivered_at)
+
+    async def test_text_job_is_skipped_while_its_lock_is_held(self) -> None:
+        lock = locked(acquired=False)
+
+        with patch("apps.bot.services.broadcast_queue.RedisLock", return_value=lock):
+            result = await self.queue.run_text(self.bot, "Hi", lock="send_hi")
+
+        self.assertEqual(result, {"lock": "send_hi", "skipped": True})
+        self.bot.send_message.assert_not_awaited()
+        lock.release.assert_not_called()
+
+    async def test_lock_calls_stay_off_the_orm_thread(self) -> None:
+        orm_thread = await sync_to_async(threading.get_ident)()
+        threads = []
+        lock = locked()
+        lock.acquire.side_effect = lambda token: threads.append(threading.get_ident()) or True
+        lock.release.side_effect = lambda token: threads.append(threading.get_ident()) or True
+
+        with patch("apps.bot.services.broadcast_queue.RedisLock", return_value=lock):
+            await self.queue.run_text(self.bot, "Hi", lock="send_hi")
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(orm_thread, threads)
+
+    async def test_campaign_job_completes_the_campaign_and_releases_the_lock(self) -> None:
+        campaign = await Campaign.objects.acreate(name="Spring", text="Hello")
+        lock = locked()
+
+        async def send_message(chat_id: int, **kwargs) -> None:
+            if chat_id == 2:
+                raise TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")
+
+        self.bot.send_message.side_effect = send_message
+        with patch("apps.bot.services.broadcast_queue.campaign_lock", return_value=lock):
+            result = await self.queue.run_job(self.bot, {"kind": "campaign", "campaign_id": campaign.pk})
+
+        await campaign.arefresh_from_db()
+        self.assertEqual((result["sent"], result["failed"]), (2, 1))
+        self.assertEqual(campaign.status, Campaign.Status.COMPLETED)
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (2, 1))
+        lock.release.assert_called_once_with(lock.acquire.call_args.args[0])
+
+
+class BroadcastQueueConsumerTests(IsolatedAsyncioTestCase):
+    async def test_runs_popped_jobs_and_requeues_unfinished_campaigns_only(self) -> None:
+        queue = BroadcastQueue(key="test:queue")
+        campaign_job = json.dumps({"kind": "campaign", "campaign_id": 1}).encode()
+        text_job = json.dumps({"kind": "text", "text": "Hi", "lock": None}).encode()
+        client = MagicMock()
+        client.lmove = AsyncMock(side_effect=[campaign_job, text_job, None])
+        client.blmove = AsyncMock(side_effect=[None, campaign_job, asyncio.CancelledError])
+        client.lrem = AsyncMock()
+        client.close = AsyncMock()
+
+        with patch(
+            "apps.bot.services.broadcast_queue.create_async_redis",
+            return_value=client,
+        ), patch.object(queue, "run_job", AsyncMock(return_value={})) as run_job:
+            with self.assertRaises(asyncio.CancelledError):
+                await queue.consume(MagicMock())
+
+        client.lrem.assert_any_await("test:queue", 1, text_job)
+        client.lrem.assert_any_await("test:queue:processing", 1, campaign_job)
+        run_job.assert_awaited_once()
+        self.assertEqual(run_job.await_args.args[1], {"kind": "campaign", "campaign_id": 1})
+        client.close.assert_awaited_once()
+
+
+class BroadcastBackendRoutingTests(TestCase):
+    def test_enqueue_pushes_json_jobs(self) -> None:
+        client = MagicMock()
+        queue = BroadcastQueue(key="test:queue")
+
+        queue.enqueue_campaign(7, client=client)
+        queue.enqueue_text("Hi", lock="send_hi", client=client)
+
+        pushed = [json.loads(call.args[1]) for call in client.rpush.call_args_list]
+        self.assertEqual(pushed[0], {"kind": "campaign", "campaign_id": 7})
+        self.assertEqual({**pushed[1], "token": None}, {"kind": "text", "text": "Hi", "lock": "send_hi", "token": None})
+
+    def test_campaigns_go_to_the_bot_process_when_configured(self) -> None:
+        campaign = Campaign.objects.create(name="Spring", text="Hello")
+        lock = locked()
+        lock.owner.return_value = None
+
+        with patch("apps.bot.tasks.campaigns.config.BROADCAST_BACKEND", "bot"), patch(
+            "apps.bot.tasks.campaigns.broadcast_queue.enqueue_campaign",
+        ) as enqueue_mock, patch("apps.bot.tasks.campaigns.run_campaign.delay") as delay_mock, patch(
+            "apps.bot.tasks.campaigns.campaign_lock",
+            return_value=lock,
+        ):
+            queue_campaign(campaign.pk)
+
+        enqueue_mock.assert_called_once_with(campaign.pk)
+        delay_mock.assert_not_called()
+
+    def test_send_hi_is_queued_for_the_bot_process_when_configured(self) -> None:
+        with patch("apps.bot.tasks.notify.config.BROADCAST_BACKEND", "bot"), patch(
+            "apps.bot.tasks.notify.broadcast_queue.enqueue_text",
+        ) as enqueue_mock, patch("apps.bot.tasks.notify.broadcast_to_all_users") as broadcast_mock:
+            send_hi_to_all_users()
+
+        enqueue_mock.assert_called_once_with("Hi 👋", lock="send_hi")
+        broadcast_mock.assert_not_called()
+
+
+class FakeRedis:
+    """
+    Just enough of a synchronous Redis client for :class:`RedisLock` and
+    :meth:`BroadcastQueue.enqueue_text`.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.lists: dict[str, list[str]] = {}
+
+    def set(self, key: str, value: str, ex: int = 0, nx: bool = False) -> bool | None:
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    def eval(self, script: str, numkeys: int, *args) -> int:
+        keys, token = args[:numkeys], args[numkeys]
+        owned = [key for key in keys if self.values.get(key) == token]
+        if script == RedisLock.RELEASE_SCRIPT:
+            for key in owned:
+                del self.values[key]
+        return int(keys[0] in owned)
+
+    def rpush(self, key: str, value: str) -> None:
+        self.lists.setdefault(key, []).append(value)
+
+
+class ScheduledBroadcastDedupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in range(1, 4))
+
+    async def test_ticks_during_a_running_broadcast_are_not_queued(self) -> None:
+        redis = FakeRedis()
+        queue = BroadcastQueue(key="test:queue")
+        bot = MagicMock()
+        ticks = []
+
+        async def send_message(chat_id: int, **kwargs) -> None:
+            if chat_id == 1:
+                ticks.append(queue.enqueue_text("Hi", lock="send_hi"))
+                ticks.append(queue.enqueue_text("Hi", lock="send_hi"))
+
+        bot.send_message = AsyncMock(side_effect=send_message)
+        with patch("apps.bot.utils.locks.get_redis", return_value=redis), patch(
+            "apps.bot.services.broadcast_queue.get_redis",
+            return_value=redis,
+        ):
+            self.assertTrue(queue.enqueue_text("Hi", lock="send_hi"))
+            while redis.lists["test:queue"]:
+                await queue.run_job(bot, json.loads(redis.lists["test:queue"].pop(0)))
+
+            self.assertEqual(ticks, [False, False])
+            self.assertEqual(bot.send_message.await_count, 3)
+            self.assertTrue(queue.enqueue_text("Hi", lock="send_hi"))
@@ -0,0 +1,177 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from apps.bot.models.campaigns import Campaign
+from apps.bot.models.campaigns import CampaignDelivery
+from apps.bot.models.users import Users
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.campaigns import CampaignService
+from apps.bot.services.campaigns import CampaignDeliveryRecorder
+from apps.bot.tasks.campaigns import run_campaign
+from apps.bot.tasks.campaigns import queue_campaign
+from apps.bot.tasks.campaigns import finish_campaign
+from apps.bot.tasks.campaigns import send_campaign_chunk
+from src.settings.config.configs import config
+
+
+METHOD = SendMessage(chat_id=1, text="Hi")
+
+
+class CampaignServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in range(1, 6))
+        Users.objects.filter(chat_id=5).update(blocked=True)
+
+    def setUp(self) -> None:
+        self.campaign = Campaign.objects.create(name="Spring", text="Hello")
+
+    def statuses(self) -> dict[int, int]:
+        return dict(self.campaign.deliveries.values_list("chat_id", "status"))
+
+    def test_prepare_bulk_inserts_reachable_users_once(self) -> None:
+        with self.assertNumQueries(7):
+            self.assertEqual(CampaignService.prepare(self.campaign, batch_size=2), 4)
+
+        self.assertEqual(sorted(self.statuses()), [1, 2, 3, 4])
+        self.assertEqual(CampaignService.prepare(self.campaign), 4)
+        self.assertEqual(self.campaign.deliveries.count(), 4)
+
+    def test_plan_covers_pending_deliveries_only(self) -> None:
+        CampaignService.prepare(self.campaign)
+        self.campaign.deliveries.filter(chat_id=1).update(status=CampaignDelivery.Status.SENT)
+        ids = list(self.campaign.deliveries.order_by("id").values_list("id", flat=True))
+
+        chunks = CampaignService.plan_chunks(self.campaign.pk, chunk_size=2)
+
+        self.assertEqual(chunks, [(None, ids[2]), (ids[2], None)])
+
+    async def test_run_records_outcomes_and_completes(self) -> None:
+        await self.prepare_and_start()
+
+        async def send(chat_id: int) -> None:
+            if chat_id == 2:
+                raise TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")
+            if chat_id == 3:
+                raise TelegramBadRequest(METHOD, "Bad Request: message is too long")
+
+        report = await BroadcastEngine(
+            send,
+            recorder=CampaignDeliveryRecorder(self.campaign.pk, batch_size=2),
+        ).run(CampaignService.iter_pending_chat_ids(self.campaign.pk, page_size=2))
+
+        self.assertEqual((report.sent, report.failed), (2, 2))
+        await self.refresh_counts()
+        self.assertEqual(self.campaign.status, Campaign.Status.COMPLETED)
+        self.assertEqual((self.campaign.sent_count, self.campaign.failed_count), (2, 2))
+        delivery = await self.campaign.deliveries.aget(chat_id=1)
+        self.assertEqual((delivery.runs, delivery.error), (1, None))
+        self.assertIsNotNone(delivery.sent_at)
+
+    async def test_paused_campaign_stops_after_current_page(self) -> None:
+        await self.prepare_and_start()
+        chat_ids = CampaignService.iter_pending_chat_ids(self.campaign.pk, page_size=2)
+
+        first_page = [await anext(chat_ids), await anext(chat_ids)]
+        await Campaign.objects.filter(pk=self.campaign.pk).aupdate(status=Campaign.Status.PAUSED)
+        rest = [chat_id async for chat_id in chat_ids]
+
+        self.assertEqual(first_page, [1, 2])
+        self.assertEqual(rest, [])
+
+    def test_retry_failures_skips_blocked_users_and_exhausted_runs(self) -> None:
+        CampaignService.prepare(self.campaign)
+        self.campaign.deliveries.update(status=CampaignDelivery.Status.FAILED, runs=1)
+        self.campaign.deliveries.filter(chat_id=3).update(runs=3)
+        Users.objects.filter(chat_id=2).update(blocked=True)
+
+        self.assertEqual(CampaignService.retry_failures(self.campaign, max_runs=3), 2)
+        pending = self.campaign.deliveries.filter(status=CampaignDelivery.Status.PENDING)
+        self.assertEqual(sorted(pending.values_list("chat_id", flat=True)), [1, 4])
+
+    async def prepare_and_start(self) -> None:
+        await sync_to_async(CampaignService.prepare)(self.campaign)
+        await sync_to_async(CampaignService.start)(self.campaign)
+
+    async def refresh_counts(self) -> None:
+        await self.campaign.arefresh_from_db()
+        await sync_to_async(CampaignService.refresh_counts)(self.campaign)
+
+
+class RunCampaignTaskTests(TestCase):
+    def test_dispatches_chunks_under_a_lock(self) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in range(1, 4))
+        campaign = Campaign.objects.create(name="Spring", text="Hello")
+        lock = MagicMock()
+        lock.acquire.return_value = True
+
+        with patch("apps.bot.tasks.campaigns.campaign_lock", return_value=lock), patch(
+            "apps.bot.tasks.campaigns.chord",
+        ) as chord_mock:
+            result = run_campaign(campaign.pk, chunk_size=2)
+
+        campaign.refresh_from_db()
+        self.assertEqual(result, {"campaign_id": campaign.pk, "chunks": 2})
+        self.assertEqual(campaign.status, Campaign.Status.RUNNING)
+        self.assertEqual(campaign.total_count, 3)
+        self.assertEqual(len(list(chord_mock.call_args.args[0])), 2)
+
+    def test_running_campaign_is_not_started_twice(self) -> None:
+        campaign = Campaign.objects.create(name="Spring", text="Hello")
+        lock = MagicMock()
+        lock.acquire.return_value = False
+
+        with patch("apps.bot.tasks.campaigns.campaign_lock", return_value=lock), patch(
+            "apps.bot.tasks.campaigns.chord",
+        ) as chord_mock:
+            result = run_campaign(campaign.pk)
+
+        self.assertTrue(result["skipped"])
+        chord_mock.assert_not_called()
+
+    def test_run_and_chunks_are_routed_to_the_bulk_queue(self) -> None:
+        from src.settings.config.celery import app
+
+        for task in (run_campaign, send_campaign_chunk):
+            route = app.amqp.router.route({}, task.name)
+            self.assertEqual(route["queue"].name, config.CELERY_BROADCAST_QUEUE)
+        route = app.amqp.router.route({}, finish_campaign.name)
+        self.assertEqual(route["queue"].name, config.CELERY_DEFAULT_QUEUE)
+
+
+class QueueCampaignTests(TestCase):
+    def setUp(self) -> None:
+        self.campaign = Campaign.objects.create(name="Spring", text="Hello", status=Campaign.Status.PAUSED)
+        self.lock = MagicMock()
+        self.lock.owner.return_value = None
+        patcher = patch("apps.bot.tasks.campaigns.campaign_lock", return_value=self.lock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_queues_a_run(self) -> None:
+        with patch("apps.bot.tasks.campaigns.run_campaign.delay") as delay_mock:
+            self.assertTrue(queue_campaign(self.campaign.pk))
+
+        delay_mock.assert_called_once_with(self.campaign.pk)
+
+    def test_is_not_queued_while_a_previous_run_holds_the_lock(self) -> None:
+        self.lock.owner.return_value = "token"
+
+        with patch("apps.bot.tasks.campaigns.run_campaign.delay") as delay_mock:
+            self.assertFalse(queue_campaign(self.campaign.pk))
+
+        delay_mock.assert_not_called()
+
+    def test_finished_campaign_is_not_queued(self) -> None:
+        Campaign.objects.filter(pk=self.campaign.pk).update(status=Campaign.Status.COMPLETED)
+
+        with patch("apps.bot.tasks.campaigns.run_campaign.delay") as delay_mock:
+            self.assertFalse(queue_campaign(self.campaign.pk))
+
+        delay_mock.assert_not_called()
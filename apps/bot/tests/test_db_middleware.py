@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from asgiref.sync import sync_to_async
+from asgiref.sync import ThreadSensitiveContext
+
+from apps.bot.middlewares.db import request_orm_context
+from apps.bot.middlewares.db import DatabaseContextMiddleware
+
+
+class DatabaseContextMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_concurrent_updates_get_their_own_orm_thread(self) -> None:
+        def blocking_query() -> int:
+            time.sleep(0.1)
+            return threading.get_ident()
+
+        async def handler(event, data) -> int:
+            first = await sync_to_async(blocking_query)()
+            second = await sync_to_async(threading.get_ident)()
+            self.assertEqual(first, second)
+            return first
+
+        middleware = DatabaseContextMiddleware(threads=3)
+        started = time.monotonic()
+        thread_ids = await asyncio.gather(
+            *(middleware(handler, object(), {}) for _ in range(3))
+        )
+
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(len(set(thread_ids)), 3)
+
+    async def test_pool_size_bounds_parallel_updates_and_threads_are_reused(self) -> None:
+        def blocking_query() -> int:
+            time.sleep(0.05)
+            return threading.get_ident()
+
+        async def handler(event, data) -> int:
+            return await sync_to_async(blocking_query)()
+
+        middleware = DatabaseContextMiddleware(threads=2)
+        started = time.monotonic()
+        thread_ids = await asyncio.gather(
+            *(middleware(handler, object(), {}) for _ in range(4))
+        )
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(len(set(thread_ids)), 2)
+
+    async def test_returns_handler_result(self) -> None:
+        async def handler(event, data) -> str:
+            return "handled"
+
+        self.assertEqual(await DatabaseContextMiddleware()(handler, object(), {}), "handled")
+
+    async def test_inherited_thread_sensitive_context_does_not_bypass_the_pool(self) -> None:
+        async def handler(event, data) -> str:
+            return await sync_to_async(lambda: threading.current_thread().name)()
+
+        middleware = DatabaseContextMiddleware(threads=1)
+        async with ThreadSensitiveContext():
+            pooled = await middleware(handler, object(), {})
+            with request_orm_context():
+                in_request = await middleware(handler, object(), {})
+
+        self.assertTrue(pooled.startswith("bot-orm"))
+        self.assertFalse(in_request.startswith("bot-orm"))
@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import redis
+from aiogram import Bot
+from aiogram import Dispatcher
+from aiogram import Router
+from aiogram import types
+from aiogram.types import Update
+
+from apps.bot.middlewares.dedup import register_dedup
+from apps.bot.middlewares.dedup import UpdateDeduplicationMiddleware
+from apps.bot.services.updates import ChatEventIsolation
+
+
+BOT = SimpleNamespace(id=42)
+
+
+def make_update(update_id: int) -> Update:
+    return Update(update_id=update_id)
+
+
+class UpdateDeduplicationMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_drops_redelivered_updates(self) -> None:
+        handler = AsyncMock(return_value="handled")
+        middleware = UpdateDeduplicationMiddleware(window=100, ttl=60)
+
+        self.assertEqual(await middleware(handler, make_update(1), {"bot": BOT}), "handled")
+        self.assertIsNone(await middleware(handler, make_update(1), {"bot": BOT}))
+        await middleware(handler, make_update(2), {"bot": BOT})
+
+        self.assertEqual(handler.await_count, 2)
+        self.assertEqual(middleware.stats(), {"processed": 2, "duplicates": 1, "redis_duplicates": 0})
+
+    async def test_failed_update_is_processed_again(self) -> None:
+        handler = AsyncMock(side_effect=[RuntimeError("boom"), "handled"])
+        middleware = UpdateDeduplicationMiddleware(window=100, ttl=60)
+
+        with self.assertRaises(RuntimeError):
+            await middleware(handler, make_update(1), {"bot": BOT})
+
+        self.assertEqual(await middleware(handler, make_update(1), {"bot": BOT}), "handled")
+
+    async def test_drops_updates_claimed_by_another_replica(self) -> None:
+        client = MagicMock()
+        client.set = AsyncMock(return_value=None)
+        handler = AsyncMock()
+        middleware = UpdateDeduplicationMiddleware(window=100, ttl=60, use_redis=True)
+
+        with patch("apps.bot.middlewares.dedup.create_async_redis", return_value=client):
+            self.assertIsNone(await middleware(handler, make_update(7), {"bot": BOT}))
+
+        client.set.assert_awaited_once_with("updates:seen:42:7", 1, nx=True, ex=60)
+        handler.assert_not_awaited()
+        self.assertEqual(middleware.stats()["redis_duplicates"], 1)
+
+    async def test_processes_updates_when_redis_is_unavailable(self) -> None:
+        client = MagicMock()
+        client.set = AsyncMock(side_effect=redis.ConnectionError("refused"))
+        handler = AsyncMock(return_value="handled")
+        middleware = UpdateDeduplicationMiddleware(window=100, ttl=60, use_redis=True)
+
+        with patch("apps.bot.middlewares.dedup.create_async_redis", return_value=client):
+            self.assertEqual(await middleware(handler, make_update(7), {"bot": BOT}), "handled")
+
+    async def test_failed_update_releases_its_redis_claim(self) -> None:
+        client = MagicMock()
+        client.set = AsyncMock(return_value=True)
+        client.delete = AsyncMock()
+        handler = AsyncMock(side_effect=RuntimeError("boom"))
+        middleware = UpdateDeduplicationMiddleware(window=100, ttl=60, use_redis=True)
+
+        with patch("apps.bot.middlewares.dedup.create_async_redis", return_value=client):
+            with self.assertRaises(RuntimeError):
+                await middleware(handler, make_update(7), {"bot": BOT})
+
+        client.delete.assert_awaited_once_with("updates:seen:42:7")
+
+
+class RegisterDedupTests(IsolatedAsyncioTestCase):
+    async def test_duplicate_is_dropped_while_the_original_holds_the_chat_lock(self) -> None:
+        bot = Bot("123456:test")
+        release = asyncio.Event()
+        router = Router(name="dedup_test")
+
+        @router.message()
+        async def handle(message: types.Message) -> None:
+            await release.wait()
+
+        dp = Dispatcher(events_isolation=ChatEventIsolation())
+        middleware = register_dedup(dp, UpdateDeduplicationMiddleware(window=100, ttl=60))
+        dp.include_router(router)
+        update = types.Update.model_validate(
+            {
+                "update_id": 9,
+                "message": {
+                    "message_id": 1,
+                    "date": 1700000000,
+                    "chat": {"id": 5, "type": "private"},
+                    "from": {"id": 5, "is_bot": False, "first_name": "Ann"},
+                    "text": "hi",
+                },
+            },
+            context={"bot": bot},
+        )
+
+        original = asyncio.create_task(dp.feed_update(bot, update))
+        await asyncio.sleep(0)
+        try:
+            await asyncio.wait_for(dp.feed_update(bot, update), timeout=0.5)
+            self.assertEqual(middleware.stats()["duplicates"], 1)
+            self.assertFalse(original.done())
+        finally:
+            release.set()
+            await original
+            await bot.session.close()
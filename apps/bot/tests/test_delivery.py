@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+from django.test import TestCase
+
+from apps.bot.models.users import Users
+from apps.bot.services.broadcast import BroadcastEngine
+from apps.bot.services.delivery import DeliveryRecorder
+from apps.bot.services.delivery import is_unreachable
+from apps.bot.services.users import UserService
+from apps.bot.services.users import user_cache
+from apps.bot.tasks.notify import send_message
+from apps.bot.tasks.notify import safe_send_message
+from apps.bot.utils.telegram import close_worker_client
+
+
+METHOD = SendMessage(chat_id=1, text="Hi")
+
+
+class DeliveryRecorderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in (1, 2, 3, 4))
+
+    def test_unreachable_errors(self) -> None:
+        self.assertTrue(is_unreachable(TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")))
+        self.assertTrue(is_unreachable(TelegramBadRequest(METHOD, "Bad Request: chat not found")))
+        self.assertFalse(is_unreachable(TelegramBadRequest(METHOD, "Bad Request: message is too long")))
+
+    def test_flush_writes_outcomes_in_bulk(self) -> None:
+        recorder = DeliveryRecorder(batch_size=2)
+        recorder.delivered(1)
+        recorder.delivered(2)
+        recorder.failed(3, TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user"))
+        recorder.failed(4, "Bad Request: message is too long")
+
+        with self.assertNumQueries(3):
+            recorder.flush_sync()
+
+        users = {user.chat_id: user for user in Users.objects.all()}
+        self.assertIsNotNone(users[1].last_delivered_at)
+        self.assertTrue(users[3].blocked)
+        self.assertIn("blocked", users[3].last_error)
+        self.assertFalse(users[4].blocked)
+        self.assertEqual(users[4].last_error, "Bad Request: message is too long")
+        self.assertEqual(recorder.pending, 0)
+
+    def test_blocked_users_are_not_recipients_until_they_start_again(self) -> None:
+        UserService.save_user_sync(
+            SimpleNamespace(from_user=SimpleNamespace(id=3, username=None, first_name="Anonymous")),
+        )
+        recorder = DeliveryRecorder()
+        recorder.failed(3, "Forbidden: bot was blocked by the user")
+        recorder.flush_sync()
+
+        self.assertIsNone(user_cache.local.get(3))
+        self.assertEqual(list(Users.objects.recipients().stream_chat_ids()), [1, 2, 4])
+
+        UserService.save_user_sync(
+            SimpleNamespace(from_user=SimpleNamespace(id=3, username=None, first_name="Anonymous")),
+        )
+
+        self.assertFalse(Users.objects.get(chat_id=3).blocked)
+
+    async def test_engine_records_outcomes(self) -> None:
+        async def send(chat_id: int) -> None:
+            if chat_id == 2:
+                raise TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")
+
+        await BroadcastEngine(send, recorder=DeliveryRecorder()).run([1, 2])
+
+        self.assertTrue(await Users.objects.filter(chat_id=2, blocked=True).aexists())
+        self.assertTrue(
+            await Users.objects.filter(chat_id=1, last_delivered_at__isnull=False).aexists(),
+        )
+
+
+class SendMessageTests(TestCase):
+    async def test_forbidden_blocks_the_user_without_retrying(self) -> None:
+        await Users.objects.acreate(chat_id=10)
+        bot = MagicMock()
+        bot.send_message = AsyncMock(
+            side_effect=TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user"),
+        )
+
+        with patch("apps.bot.tasks.notify.get_worker_bot", return_value=bot):
+            self.assertFalse(await send_message(10, "Hi"))
+
+        bot.send_message.assert_awaited_once()
+        self.assertTrue((await Users.objects.aget(chat_id=10)).blocked)
+
+    def test_safe_send_message_reuses_the_worker_loop(self) -> None:
+        loops = []
+
+        async def fake_send(chat_id: int, text: str, max_attempts: int = 3) -> bool:
+            loops.append(asyncio.get_running_loop())
+            return True
+
+        with patch("apps.bot.tasks.notify.send_message", fake_send), patch(
+            "apps.bot.tasks.notify.config.BOT_TOKEN",
+            "token",
+        ):
+            self.assertTrue(safe_send_message(10, "Hi"))
+            self.assertTrue(safe_send_message(11, "Hi"))
+
+        self.assertIs(loops[0], loops[1])
+        close_worker_client()
+        self.assertTrue(loops[0].is_closed())
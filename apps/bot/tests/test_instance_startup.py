@@ -1,15 +1,29 @@
+import asyncio
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock
 from unittest.mock import AsyncMock
 from unittest.mock import patch
 
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+
 from apps.bot import instance
 
 
+def chat_ids(*values: int) -> Mock:
+    async def stream(limit: int = 0):
+        for value in values:
+            yield value
+
+    return Mock(side_effect=stream)
+
+
 class BotStartupNotificationTests(IsolatedAsyncioTestCase):
     async def test_notify_bot_started_sends_expected_message_to_all_users(self) -> None:
         with patch(
-            "apps.bot.instance._fetch_startup_chat_ids",
-            AsyncMock(return_value=[111, 222]),
+            "apps.bot.instance._iter_startup_chat_ids",
+            chat_ids(111, 222),
         ), patch("apps.bot.instance.bot.send_message", AsyncMock()) as send_message_mock:
             await instance.notify_bot_started()
 
@@ -19,18 +33,96 @@ class BotStartupNotificationTests(IsolatedAsyncioTestCase):
 
     async def test_notify_bot_started_skips_when_no_users(self) -> None:
         with patch(
-            "apps.bot.instance._fetch_startup_chat_ids",
-            AsyncMock(return_value=[]),
+            "apps.bot.instance._iter_startup_chat_ids",
+            chat_ids(),
         ), patch("apps.bot.instance.bot.send_message", AsyncMock()) as send_message_mock:
             await instance.notify_bot_started()
 
         send_message_mock.assert_not_awaited()
 
+    async def test_notify_bot_started_caps_recipients(self) -> None:
+        with patch.object(instance.config, "STARTUP_NOTIFY_MAX_RECIPIENTS", 5), patch(
+            "apps.bot.instance._iter_startup_chat_ids",
+            chat_ids(111),
+        ) as fetch_mock, patch("apps.bot.instance.bot.send_message", AsyncMock()):
+            await instance.notify_bot_started()
+
+        fetch_mock.assert_called_once_with(5)
+
     async def test_on_startup_in_polling_mode_triggers_startup_notification(self) -> None:
+        release = asyncio.Event()
+
+        async def slow_notification() -> None:
+            await release.wait()
+
         with patch.object(instance.config, "IS_POLLING", True), patch(
-            "apps.bot.instance.notify_bot_started",
+            "apps.bot.instance.check_storage",
             AsyncMock(),
+        ), patch(
+            "apps.bot.instance.notify_bot_started",
+            AsyncMock(side_effect=slow_notification),
         ) as notify_mock:
             await instance.on_startup()
 
+            self.assertEqual(len(instance._background_tasks), 1)
+            release.set()
+            await asyncio.gather(*instance._background_tasks)
+
         notify_mock.assert_awaited_once()
+
+    async def test_on_startup_skips_notification_when_disabled(self) -> None:
+        with patch.object(instance.config, "IS_POLLING", True), patch.object(
+            instance.config,
+            "STARTUP_NOTIFY_ENABLED",
+            False,
+        ), patch("apps.bot.instance.check_storage", AsyncMock()), patch(
+            "apps.bot.instance.notify_bot_started",
+            AsyncMock(),
+        ) as notify_mock:
+            await instance.on_startup()
+
+        self.assertEqual(instance._background_tasks, set())
+        notify_mock.assert_not_called()
+
+
+class FSMStorageTests(IsolatedAsyncioTestCase):
+    def test_redis_storage_uses_configured_pool_ttls_and_prefix(self) -> None:
+        storage = instance.build_storage()
+
+        self.assertIsInstance(storage, RedisStorage)
+        self.assertEqual(storage.state_ttl, instance.config.FSM_STATE_TTL)
+        self.assertEqual(storage.data_ttl, instance.config.FSM_DATA_TTL)
+        self.assertEqual(
+            storage.redis.connection_pool.max_connections,
+            instance.config.FSM_REDIS_MAX_CONNECTIONS,
+        )
+        key = storage.key_builder.build(StorageKey(bot_id=42, chat_id=1, user_id=2))
+        self.assertEqual(key, f"{instance.config.FSM_KEY_PREFIX}:42:1:2")
+
+    async def test_falls_back_to_memory_when_redis_is_unreachable(self) -> None:
+        storage = instance.build_storage()
+        storage.redis.ping = AsyncMock(side_effect=ConnectionError("refused"))
+
+        with patch.object(instance.dp.fsm, "storage", storage), patch.object(
+            instance,
+            "_storage_fallback",
+            False,
+        ):
+            await instance.check_storage()
+
+            self.assertIsInstance(instance.dp.storage, MemoryStorage)
+            self.assertEqual(instance.fsm_storage_stats(), {"backend": "memory", "fallback": True})
+
+    async def test_refuses_to_start_without_redis_when_fallback_is_disabled(self) -> None:
+        storage = instance.build_storage()
+        storage.redis.ping = AsyncMock(side_effect=ConnectionError("refused"))
+
+        with patch.object(instance.dp.fsm, "storage", storage), patch.object(
+            instance.config,
+            "FSM_STORAGE_FALLBACK",
+            False,
+        ):
+            with self.assertRaises(ConnectionError):
+                await instance.check_storage()
+
+            self.assertIs(instance.dp.storage, storage)
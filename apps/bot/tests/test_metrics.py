@@ -0,0 +1,175 @@
+import os
+from unittest import IsolatedAsyncioTestCase
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from aiogram import Bot
+from aiogram import Router
+from aiogram import Dispatcher
+from aiogram import types
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase as DjangoTestCase
+
+from apps.bot.handlers import all_routers
+from apps.bot.lifespan import on_web_startup
+from apps.bot.middlewares.metrics import register_metrics
+from apps.bot.middlewares.metrics import MetricsRequestMiddleware
+from apps.bot.models.users import Users
+from apps.bot.utils.metrics import Counter
+from apps.bot.utils.metrics import Histogram
+from apps.bot.utils.metrics import StatsGauge
+from apps.bot.utils.metrics import MetricsRegistry
+from apps.bot.utils.metrics import counting_queries
+from apps.bot.utils.metrics import handler_duration
+from apps.bot.utils.metrics import telegram_requests
+from apps.bot.utils.metrics import webhook_requests
+from apps.bot.utils.telegram import create_session
+from src.settings.config.configs import Config
+
+
+METHOD = SendMessage(chat_id=5, text="Hi")
+
+
+def value(metric, *labels) -> float:
+    return metric.labels(*labels).value
+
+
+class MetricsRegistryTests(TestCase):
+    def test_renders_counters_and_histograms(self) -> None:
+        registry = MetricsRegistry()
+        requests = Counter("requests_total", "Requests.", ("status",), registry=registry)
+        duration = Histogram("duration_seconds", "Duration.", buckets=(0.1, 1.0), registry=registry)
+
+        requests.labels(200).inc()
+        requests.labels(200).inc()
+        requests.labels('say "hi"').inc()
+        for seconds in (0.05, 0.5, 5.0):
+            duration.observe(seconds)
+
+        lines = registry.render().splitlines()
+
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{status="200"} 2', lines)
+        self.assertIn('requests_total{status="say \\"hi\\""} 1', lines)
+        self.assertIn('duration_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('duration_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("duration_seconds_sum 5.55", lines)
+        self.assertIn("duration_seconds_count 3", lines)
+
+    def test_stats_gauge_exports_numeric_values(self) -> None:
+        registry = MetricsRegistry()
+        StatsGauge(
+            "bot_fsm",
+            "FSM.",
+            lambda: {"backend": "memory", "fallback": True, "hits": 3},
+            registry=registry,
+        )
+
+        lines = registry.render().splitlines()
+
+        self.assertIn('bot_fsm{stat="fallback"} 1', lines)
+        self.assertIn('bot_fsm{stat="hits"} 3', lines)
+        self.assertFalse(any("backend" in line for line in lines))
+
+    def test_rejects_wrong_label_count(self) -> None:
+        counter = Counter("things_total", "Things.", ("kind",), registry=MetricsRegistry())
+
+        with self.assertRaises(ValueError):
+            counter.labels("a", "b")
+
+
+class UpdateMetricsTests(DjangoTestCase):
+    async def test_counts_queries_run_in_orm_threads(self) -> None:
+        with counting_queries() as queries:
+            await Users.objects.filter(chat_id=1).aexists()
+            await sync_to_async(lambda: list(Users.objects.all()))()
+
+        self.assertEqual(queries[0], 2)
+
+    async def test_records_handler_duration_by_router(self) -> None:
+        bot = Bot("123456:test", session=create_session(rate_limited=False))
+        router = Router(name="metrics_test")
+
+        @router.message()
+        async def handle(message: types.Message) -> None:
+            return None
+
+        dp = Dispatcher()
+        register_metrics(dp)
+        dp.include_router(router)
+        update = types.Update.model_validate(
+            {
+                "update_id": 1,
+                "message": {
+                    "message_id": 1,
+                    "date": 1700000000,
+                    "chat": {"id": 5, "type": "private"},
+                    "text": "hi",
+                },
+            },
+            context={"bot": bot},
+        )
+
+        await dp.feed_update(bot, update)
+        await bot.session.close()
+
+        child = handler_duration.labels("metrics_test", "message")
+        self.assertEqual(sum(child.counts), 1)
+        self.assertIn('router="metrics_test"', "\n".join(handler_duration.render()))
+
+    def test_bot_routers_are_labelled_by_name(self) -> None:
+        self.assertEqual([router.name for router in all_routers], ["start", "text_commands"])
+
+    def test_webhook_requests_are_counted_by_status(self) -> None:
+        before = value(webhook_requests, 400)
+
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""):
+            self.client.post("/bot/webhook/", data="{not-json", content_type="application/json", secure=True)
+        response = self.client.get("/bot/metrics/", secure=True)
+
+        self.assertEqual(value(webhook_requests, 400), before + 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'bot_webhook_requests_total{status="400"}', response.content)
+
+    def test_metrics_endpoint_can_be_turned_off(self) -> None:
+        with patch("apps.bot.views.metrics.config.WEB_METRICS", False):
+            response = self.client.get("/bot/metrics/", secure=True)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_web_metrics_default_follows_the_worker_count(self) -> None:
+        environ = {key: item for key, item in os.environ.items() if key != "WEB_METRICS"}
+        with patch.dict(os.environ, {**environ, "WEB_CONCURRENCY": "4"}, clear=True):
+            self.assertFalse(Config().WEB_METRICS)
+        with patch.dict(os.environ, {**environ, "WEB_CONCURRENCY": "1"}, clear=True):
+            self.assertTrue(Config().WEB_METRICS)
+
+    async def test_web_startup_refuses_metrics_with_several_workers(self) -> None:
+        with patch("apps.bot.lifespan.config.WEB_METRICS", True), patch(
+            "apps.bot.lifespan.config.WEB_CONCURRENCY", 4,
+        ), patch("apps.bot.lifespan.check_storage", AsyncMock()) as check_mock:
+            with self.assertRaises(ImproperlyConfigured):
+                await on_web_startup()
+
+        check_mock.assert_not_awaited()
+
+
+class MetricsRequestMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_counts_results_by_method(self) -> None:
+        middleware = MetricsRequestMiddleware()
+        ok_before = value(telegram_requests, "sendMessage", "ok")
+        flood_before = value(telegram_requests, "sendMessage", "retry_after")
+        flood = TelegramRetryAfter(method=METHOD, message="Flood", retry_after=1)
+
+        await middleware(AsyncMock(return_value="response"), Mock(), METHOD)
+        with self.assertRaises(TelegramRetryAfter):
+            await middleware(AsyncMock(side_effect=flood), Mock(), METHOD)
+
+        self.assertEqual(value(telegram_requests, "sendMessage", "ok"), ok_before + 1)
+        self.assertEqual(value(telegram_requests, "sendMessage", "retry_after"), flood_before + 1)
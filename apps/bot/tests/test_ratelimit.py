@@ -0,0 +1,179 @@
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import Mock
+
+import redis
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates
+from aiogram.methods import SendMessage
+
+from apps.bot.middlewares.metrics import MetricsRequestMiddleware
+from apps.bot.middlewares.ratelimit import RateLimitRequestMiddleware
+from apps.bot.middlewares.ratelimit import RetryAfterRequestMiddleware
+from apps.bot.utils.ratelimit import RateLimiter
+from apps.bot.utils.telegram import create_session
+from apps.bot.utils.telegram import session_stats
+from src.settings.config.configs import config
+
+
+METHOD = SendMessage(chat_id=5, text="Hi")
+
+
+def flood(retry_after: int) -> TelegramRetryAfter:
+    return TelegramRetryAfter(method=METHOD, message="Flood", retry_after=retry_after)
+
+
+class RateLimiterTests(TestCase):
+    def test_global_limit_spaces_calls_after_burst(self) -> None:
+        limiter = RateLimiter(rate=10, burst=3, per_chat_interval=0)
+
+        waits = [limiter.reserve() for _ in range(5)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.1, delta=0.01)
+        self.assertAlmostEqual(waits[4], 0.2, delta=0.01)
+
+    def test_per_chat_limit_only_delays_the_same_chat(self) -> None:
+        limiter = RateLimiter(rate=1000, burst=10, per_chat_interval=0.5)
+
+        self.assertEqual(limiter.reserve(1), 0.0)
+        self.assertEqual(limiter.reserve(2), 0.0)
+        self.assertAlmostEqual(limiter.reserve(1), 0.5, delta=0.01)
+
+    def test_acquire_sync_blocks_until_due(self) -> None:
+        limiter = RateLimiter(rate=20, per_chat_interval=0)
+
+        started = time.monotonic()
+        for _ in range(3):
+            limiter.acquire_sync()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_uses_shared_state_when_redis_is_configured(self) -> None:
+        script = Mock(return_value=b"0.250000")
+        client = MagicMock()
+        client.register_script.return_value = script
+        limiter = RateLimiter(rate=30, per_chat_interval=1.0, client=client, prefix="rl")
+
+        self.assertEqual(limiter.reserve(42), 0.25)
+        script.assert_called_once_with(keys=["rl:global", "rl:chat:42"], args=[1 / 30, 0.0, 1.0, 0.0])
+
+    def test_penalty_holds_back_the_chat(self) -> None:
+        limiter = RateLimiter(rate=1000, burst=10, per_chat_interval=0.1)
+
+        limiter.penalize_sync(1, 2.0)
+
+        self.assertAlmostEqual(limiter.reserve(1), 2.0, delta=0.01)
+        self.assertEqual(limiter.reserve(2), 0.0)
+
+    def test_falls_back_to_local_state_when_redis_fails(self) -> None:
+        script = Mock(side_effect=redis.ConnectionError("refused"))
+        client = MagicMock()
+        client.register_script.return_value = script
+        limiter = RateLimiter(rate=10, per_chat_interval=0, client=client, fallback_interval=60)
+
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1, delta=0.01)
+        script.assert_called_once()
+
+
+class RateLimitMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_async_acquire_waits_for_the_chat_limit(self) -> None:
+        limiter = RateLimiter(rate=1000, per_chat_interval=0.1)
+
+        started = time.monotonic()
+        await limiter.acquire(1)
+        await limiter.acquire(1)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    async def test_paces_calls_by_chat(self) -> None:
+        limiter = Mock(acquire=AsyncMock(return_value=0.0))
+        make_request = AsyncMock(return_value="response")
+        middleware = RateLimitRequestMiddleware(limiter)
+
+        response = await middleware(make_request, Mock(), METHOD)
+
+        self.assertEqual(response, "response")
+        limiter.acquire.assert_awaited_once_with(5)
+
+    async def test_counts_throttled_calls(self) -> None:
+        middleware = RateLimitRequestMiddleware(RateLimiter(rate=1000, per_chat_interval=0.05))
+
+        for _ in range(2):
+            await middleware(AsyncMock(), Mock(), METHOD)
+
+        self.assertEqual(middleware.stats()["calls"], 2)
+        self.assertEqual(middleware.stats()["throttled"], 1)
+
+    async def test_get_updates_is_not_limited(self) -> None:
+        limiter = Mock(acquire=AsyncMock())
+        make_request = AsyncMock()
+
+        await RateLimitRequestMiddleware(limiter)(make_request, Mock(), GetUpdates())
+
+        limiter.acquire.assert_not_awaited()
+        make_request.assert_awaited_once()
+
+    def test_sessions_are_rate_limited_by_default(self) -> None:
+        limited = create_session()
+        unlimited = create_session(rate_limited=False)
+
+        self.assertEqual(
+            [type(m) for m in limited.middleware],
+            [RetryAfterRequestMiddleware, RateLimitRequestMiddleware, MetricsRequestMiddleware],
+        )
+        self.assertEqual([type(m) for m in unlimited.middleware], [MetricsRequestMiddleware])
+        self.assertEqual(
+            session_stats(limited),
+            {"retried": 0, "gave_up": 0, "calls": 0, "throttled": 0, "throttled_seconds": 0.0},
+        )
+
+    async def test_session_connector_keeps_the_pool_settings(self) -> None:
+        session = create_session(limit=7, rate_limited=False)
+        client = await session.create_session()
+        try:
+            self.assertEqual(client.connector.limit, 7)
+            self.assertEqual(client.connector._keepalive_timeout, config.TELEGRAM_KEEPALIVE_TIMEOUT)
+            self.assertIs(await session.create_session(), client)
+        finally:
+            await session.close()
+
+        self.assertTrue(client.closed)
+        self.assertIsNot(await session.create_session(), client)
+        await session.close()
+
+
+class RetryAfterMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_retries_flood_limited_calls(self) -> None:
+        limiter = Mock(penalize=AsyncMock())
+        make_request = AsyncMock(side_effect=[flood(0), flood(0), "response"])
+        middleware = RetryAfterRequestMiddleware(limiter, max_retries=3)
+
+        self.assertEqual(await middleware(make_request, Mock(), METHOD), "response")
+
+        self.assertEqual(make_request.await_count, 3)
+        limiter.penalize.assert_awaited_with(5, 0)
+        self.assertEqual(middleware.stats(), {"retried": 2, "gave_up": 0})
+
+    async def test_gives_up_after_max_retries(self) -> None:
+        make_request = AsyncMock(side_effect=flood(0))
+        middleware = RetryAfterRequestMiddleware(Mock(penalize=AsyncMock()), max_retries=2)
+
+        with self.assertRaises(TelegramRetryAfter):
+            await middleware(make_request, Mock(), METHOD)
+
+        self.assertEqual(make_request.await_count, 3)
+        self.assertEqual(middleware.stats(), {"retried": 2, "gave_up": 1})
+
+    async def test_does_not_wait_out_long_delays(self) -> None:
+        make_request = AsyncMock(side_effect=flood(120))
+        middleware = RetryAfterRequestMiddleware(Mock(penalize=AsyncMock()), max_delay=60)
+
+        with self.assertRaises(TelegramRetryAfter):
+            await middleware(make_request, Mock(), METHOD)
+
+        make_request.assert_awaited_once()
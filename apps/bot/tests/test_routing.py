@@ -0,0 +1,63 @@
+from unittest import IsolatedAsyncioTestCase
+
+from aiogram import Bot
+from aiogram import Dispatcher
+from aiogram import types
+from aiogram.dispatcher.event.bases import UNHANDLED
+
+from apps.bot.utils.routing import TextCommandIndex
+from apps.bot.utils.routing import text_commands
+from apps.bot.utils.telegram import create_session
+
+
+def make_update(bot: Bot, text: str) -> types.Update:
+    return types.Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 1700000000,
+                "chat": {"id": 5, "type": "private"},
+                "from": {"id": 5, "is_bot": False, "first_name": "Alice"},
+                "text": text,
+            },
+        },
+        context={"bot": bot},
+    )
+
+
+class TextCommandIndexTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.bot = Bot("123456:test", session=create_session(rate_limited=False))
+
+    async def asyncTearDown(self) -> None:
+        await self.bot.session.close()
+
+    def test_menu_commands_are_registered(self) -> None:
+        for text in ("Booking", "Stop", "Notify"):
+            self.assertIsNotNone(text_commands.lookup(text))
+        self.assertIsNone(text_commands.lookup("hello"))
+
+    def test_rejects_duplicate_commands(self) -> None:
+        index = TextCommandIndex()
+        index.register(lambda message: None, "menu")
+
+        with self.assertRaises(ValueError):
+            index.register(lambda message: None, "MENU")
+
+    async def test_dispatches_case_insensitively_with_handler_data(self) -> None:
+        index = TextCommandIndex()
+        calls = []
+
+        @index.command("booking", "book")
+        async def booking(message: types.Message, state) -> str:
+            calls.append((message.text, state is not None))
+            return "booked"
+
+        dp = Dispatcher()
+        dp.include_router(index.router)
+
+        self.assertEqual(await dp.feed_update(self.bot, make_update(self.bot, "BOOKING")), "booked")
+        self.assertEqual(await dp.feed_update(self.bot, make_update(self.bot, "Book")), "booked")
+        self.assertIs(await dp.feed_update(self.bot, make_update(self.bot, "bookings")), UNHANDLED)
+        self.assertEqual(calls, [("BOOKING", True), ("Book", True)])
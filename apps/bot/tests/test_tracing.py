@@ -0,0 +1,116 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from unittest.mock import Mock
+
+from aiogram import types
+from aiogram.methods import SendMessage
+from django.test import TestCase as DjangoTestCase
+
+from apps.bot.middlewares.ratelimit import RateLimitRequestMiddleware
+from apps.bot.middlewares.tracing import TracingRequestMiddleware
+from apps.bot.middlewares.tracing import UpdateTracingMiddleware
+from apps.bot.models.users import Users
+from apps.bot.utils.ratelimit import RateLimiter
+from apps.bot.utils.tracing import span
+from apps.bot.utils.tracing import start_trace
+
+
+UPDATE = types.Update.model_validate(
+    {
+        "update_id": 7,
+        "message": {
+            "message_id": 1,
+            "date": 1700000000,
+            "chat": {"id": 5, "type": "private"},
+            "text": "hi",
+        },
+    }
+)
+
+
+class TraceTests(TestCase):
+    def test_spans_are_noop_outside_a_trace(self) -> None:
+        with span("db", "SELECT 1") as current:
+            self.assertIsNone(current)
+
+    def test_records_nested_spans_and_breakdown(self) -> None:
+        with start_trace("message id=1") as trace:
+            with span("handler", "booking"):
+                with span("api", "sendMessage"):
+                    with span("api", "inner"):
+                        pass
+                with span("db", "SELECT 1"):
+                    pass
+
+        handler = trace.root.children[0]
+        self.assertEqual([child.kind for child in handler.children], ["api", "db"])
+        self.assertEqual(set(trace.breakdown()), {"update", "handler", "api", "db"})
+        self.assertLessEqual(trace.breakdown()["api"], handler.children[0].duration + 1e-4)
+        self.assertIn("  handler booking", trace.format())
+
+    def test_caps_the_number_of_spans(self) -> None:
+        with start_trace("message id=1", max_spans=3) as trace:
+            for _ in range(5):
+                with span("db", "SELECT 1"):
+                    pass
+
+        self.assertEqual(len(trace.root.children), 2)
+        self.assertEqual(trace.dropped, 3)
+        self.assertIn("3 more spans dropped", trace.format())
+
+
+class QueryTracingTests(DjangoTestCase):
+    async def test_records_queries_run_in_orm_threads(self) -> None:
+        with start_trace("message id=1") as trace:
+            await Users.objects.filter(chat_id=1).aexists()
+
+        self.assertEqual([child.kind for child in trace.root.children], ["db"])
+        self.assertIn("SELECT", trace.root.children[0].name)
+
+
+class UpdateTracingMiddlewareTests(IsolatedAsyncioTestCase):
+    async def test_logs_slow_updates_with_their_spans(self) -> None:
+        middleware = UpdateTracingMiddleware(slow_threshold=0.01, slow_sample_rate=1.0, profile_rate=0)
+
+        async def handler(event, data):
+            with span("db", "SELECT 1"):
+                await asyncio.sleep(0.02)
+            return "done"
+
+        with self.assertLogs("apps.bot.utils.logging", "WARNING") as logs:
+            self.assertEqual(await middleware(handler, UPDATE, {}), "done")
+
+        self.assertIn("Slow update message id=7", logs.output[0])
+        self.assertIn("db SELECT 1", logs.output[0])
+        self.assertEqual(middleware.stats(), {"traced": 1, "slow": 1, "profiled": 0})
+
+    async def test_fast_updates_are_not_logged(self) -> None:
+        middleware = UpdateTracingMiddleware(slow_threshold=10, profile_rate=0)
+
+        with self.assertNoLogs("apps.bot.utils.logging", "INFO"):
+            await middleware(AsyncMock(return_value=None), UPDATE, {})
+
+    async def test_profiles_sampled_updates(self) -> None:
+        middleware = UpdateTracingMiddleware(slow_threshold=10, profile_rate=1.0, profiler="cprofile")
+
+        with self.assertLogs("apps.bot.utils.logging", "INFO") as logs:
+            await middleware(AsyncMock(return_value=None), UPDATE, {})
+
+        self.assertIn("Profiled update message id=7", logs.output[0])
+        self.assertIn("function calls", logs.output[0])
+        self.assertEqual(middleware.stats()["profiled"], 1)
+
+    async def test_api_spans_include_rate_limit_waits(self) -> None:
+        tracing = TracingRequestMiddleware()
+        limiting = RateLimitRequestMiddleware(RateLimiter(rate=1000, per_chat_interval=0))
+        method = SendMessage(chat_id=5, text="Hi")
+        make_request = AsyncMock(return_value="response")
+
+        with start_trace("message id=1") as trace:
+            await tracing(lambda bot, m: limiting(make_request, bot, m), Mock(), method)
+
+        api = trace.root.children[0]
+        self.assertEqual((api.kind, api.name), ("api", "sendMessage"))
+        self.assertEqual([child.kind for child in api.children], ["rate_limit"])
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+from aiogram import types
+from aiogram.fsm.storage.base import StorageKey
+from asgiref.sync import sync_to_async
+from asgiref.sync import ThreadSensitiveContext
+
+from apps.bot.middlewares.db import DatabaseContextMiddleware
+from apps.bot.services.updates import UpdateQueue
+from apps.bot.services.updates import ChatEventIsolation
+
+
+def make_update(update_id: int) -> types.Update:
+    return types.Update(update_id=update_id)
+
+
+def make_chat_update(update_id: int, chat_id: int) -> types.Update:
+    return types.Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "hi",
+            },
+        }
+    )
+
+
+class UpdateQueueTests(IsolatedAsyncioTestCase):
+    async def test_consumers_process_queued_updates(self) -> None:
+        handled: list[int] = []
+
+        async def handler(update: types.Update) -> None:
+            handled.append(update.update_id)
+
+        queue = UpdateQueue(handler, maxsize=10, workers=2)
+        for update_id in range(5):
+            self.assertTrue(await queue.put(make_update(update_id)))
+
+        await queue.drain(timeout=1)
+
+        self.assertEqual(sorted(handled), [0, 1, 2, 3, 4])
+        self.assertEqual(queue.stats()["processed"], 5)
+        self.assertEqual(queue.stats()["depth"], 0)
+
+    async def test_put_rejects_when_queue_stays_full(self) -> None:
+        release = asyncio.Event()
+
+        async def handler(update: types.Update) -> None:
+            await release.wait()
+
+        queue = UpdateQueue(handler, maxsize=1, workers=1, put_timeout=0.01)
+        self.assertTrue(await queue.put(make_update(1)))
+        await asyncio.sleep(0)
+        self.assertTrue(await queue.put(make_update(2)))
+
+        self.assertFalse(await queue.put(make_update(3)))
+        self.assertEqual(queue.stats()["rejected"], 1)
+
+        release.set()
+        await queue.drain(timeout=1)
+        self.assertEqual(queue.stats()["processed"], 2)
+
+    async def test_failed_updates_are_counted_and_do_not_stop_consumers(self) -> None:
+        async def handler(update: types.Update) -> None:
+            if update.update_id == 1:
+                raise RuntimeError("boom")
+
+        queue = UpdateQueue(handler, maxsize=10, workers=1)
+        await queue.put(make_update(1))
+        await queue.put(make_update(2))
+        await queue.drain(timeout=1)
+
+        self.assertEqual(queue.stats()["failed"], 1)
+        self.assertEqual(queue.stats()["processed"], 1)
+
+    async def test_burst_from_one_chat_does_not_hold_every_consumer(self) -> None:
+        release = asyncio.Event()
+        handled: list[int] = []
+
+        async def handler(update: types.Update) -> None:
+            if update.message.chat.id == 1:
+                await release.wait()
+            handled.append(update.update_id)
+
+        queue = UpdateQueue(handler, maxsize=10, workers=2)
+        for update_id in range(1, 5):
+            await queue.put(make_chat_update(update_id, chat_id=1))
+        await queue.put(make_chat_update(5, chat_id=2))
+
+        for _ in range(20):
+            await asyncio.sleep(0)
+        self.assertEqual(handled, [5])
+        self.assertEqual(queue.stats()["busy_chats"], 1)
+        self.assertEqual(queue.stats()["deferred"], 3)
+        self.assertEqual(queue.depth, 3)
+
+        release.set()
+        await queue.drain(timeout=1)
+
+        self.assertEqual(handled, [5, 1, 2, 3, 4])
+        self.assertEqual(queue.stats()["processed"], 5)
+        self.assertEqual(queue.stats()["busy_chats"], 0)
+
+    async def test_put_after_drain_is_rejected(self) -> None:
+        queue = UpdateQueue(lambda update: asyncio.sleep(0), maxsize=10, workers=1)
+        await queue.drain(timeout=1)
+
+        self.assertFalse(await queue.put(make_update(1)))
+
+    async def test_consumers_run_orm_work_on_the_pooled_threads_after_the_request(self) -> None:
+        middleware = DatabaseContextMiddleware(threads=2)
+        threads: list[str] = []
+
+        async def orm_work(event, data) -> None:
+            threads.append(await sync_to_async(lambda: threading.current_thread().name)())
+
+        queue = UpdateQueue(lambda update: middleware(orm_work, update, {}), maxsize=10, workers=2)
+        async with ThreadSensitiveContext():
+            self.assertTrue(await queue.put(make_update(1)))
+        for update_id in range(2, 5):
+            self.assertTrue(await queue.put(make_update(update_id)))
+        await queue.drain(timeout=1)
+
+        self.assertEqual(len(threads), 4)
+        self.assertTrue(all(name.startswith("bot-orm") for name in threads), threads)
+
+
+def chat_key(chat_id: int, user_id: int = 1) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=chat_id, user_id=user_id)
+
+
+class ChatEventIsolationTests(IsolatedAsyncioTestCase):
+    async def test_orders_updates_per_chat_and_runs_chats_in_parallel(self) -> None:
+        isolation = ChatEventIsolation(use_redis=False)
+        events: list[str] = []
+
+        async def handle(name: str, key: StorageKey) -> None:
+            async with isolation.lock(key):
+                events.append(f"{name}:start")
+                await asyncio.sleep(0.02)
+                events.append(f"{name}:end")
+
+        await asyncio.gather(
+            handle("a1", chat_key(1, user_id=1)),
+            handle("a2", chat_key(1, user_id=2)),
+            handle("b1", chat_key(2)),
+        )
+
+        self.assertLess(events.index("a1:end"), events.index("a2:start"))
+        self.assertLess(events.index("b1:start"), events.index("a1:end"))
+        self.assertEqual(isolation.stats()["contended"], 1)
+        self.assertEqual(isolation.stats()["active_chats"], 0)
+
+    async def test_takes_a_redis_lock_per_chat(self) -> None:
+        lock = MagicMock(acquire=AsyncMock(return_value=True), release=AsyncMock())
+        isolation = ChatEventIsolation(use_redis=True, ttl=60, timeout=5)
+        isolation.redis = MagicMock(lock=MagicMock(return_value=lock))
+
+        async with isolation.lock(chat_key(7)):
+            lock.release.assert_not_awaited()
+
+        self.assertEqual(isolation.redis.lock.call_args.args, ("chat-order:42:7",))
+        self.assertFalse(isolation.redis.lock.call_args.kwargs["thread_local"])
+        lock.release.assert_awaited_once()
+
+    async def test_runs_unordered_when_the_redis_lock_times_out(self) -> None:
+        lock = MagicMock(acquire=AsyncMock(return_value=False), release=AsyncMock())
+        isolation = ChatEventIsolation(use_redis=True)
+        isolation.redis = MagicMock(lock=MagicMock(return_value=lock))
+        handled = False
+
+        async with isolation.lock(chat_key(7)):
+            handled = True
+
+        self.assertTrue(handled)
+        lock.release.assert_not_awaited()
+        self.assertEqual(isolation.stats()["timeouts"], 1)
@@ -0,0 +1,184 @@
+import time
+import asyncio
+from types import SimpleNamespace
+from unittest import TestCase as SimpleTestCase
+
+from django.test import TestCase
+
+from apps.bot.models.users import Users
+from apps.bot.services.users import UserService
+from apps.bot.services.users import UserWriteBuffer
+from apps.bot.services.users import user_cache
+from apps.bot.utils.cache import TTLCache
+
+
+def make_message(chat_id: int, username: str = "alice", first_name: str = "Alice"):
+    return SimpleNamespace(
+        from_user=SimpleNamespace(id=chat_id, username=username, first_name=first_name),
+    )
+
+
+class TTLCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used_entry(self) -> None:
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        self.assertEqual(cache.get(1), "a")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), "c")
+
+    def test_entries_expire_after_ttl(self) -> None:
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set(1, "a")
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(len(cache), 0)
+
+    def test_add_only_stores_missing_or_expired_keys(self) -> None:
+        cache = TTLCache(maxsize=10, ttl=0.01)
+
+        self.assertTrue(cache.add(1, "a"))
+        self.assertFalse(cache.add(1, "b"))
+        self.assertEqual(cache.get(1), "a")
+        time.sleep(0.02)
+        self.assertTrue(cache.add(1, "c"))
+
+
+class UserServiceCacheTests(TestCase):
+    def setUp(self) -> None:
+        user_cache.local.clear()
+        user_cache.local_hits = user_cache.redis_hits = user_cache.misses = 0
+
+    def test_known_user_costs_one_conditional_update(self) -> None:
+        created = UserService.save_user_sync(make_message(100))
+
+        with self.assertNumQueries(1):
+            cached = UserService.save_user_sync(make_message(100))
+        with self.assertNumQueries(0):
+            user_id = UserService.get_user_id_sync(100)
+
+        self.assertEqual(cached.pk, created.pk)
+        self.assertEqual(cached.username, "alice")
+        self.assertEqual(user_id, created.pk)
+        self.assertEqual(user_cache.stats()["misses"], 1)
+        self.assertEqual(user_cache.stats()["hits"], 2)
+
+    async def test_async_lookups_are_served_from_local_cache(self) -> None:
+        created = await UserService.save_user_async(make_message(200))
+
+        cached = await UserService.save_user_async(make_message(200))
+
+        self.assertEqual(cached.pk, created.pk)
+        self.assertEqual(await UserService.get_user_id_async(200), created.pk)
+        self.assertEqual(user_cache.stats()["local_hits"], 2)
+
+    def test_unknown_user_id_is_not_cached(self) -> None:
+        self.assertIsNone(UserService.get_user_id_sync(300))
+        self.assertIsNone(user_cache.local.get(300))
+
+    def test_editing_a_user_invalidates_its_entry(self) -> None:
+        user = UserService.save_user_sync(make_message(400))
+        user = Users.objects.get(pk=user.pk)
+        user.chat_id = 401
+        user.save()
+
+        self.assertIsNone(user_cache.local.get(400))
+        self.assertIsNone(user_cache.local.get(401))
+
+    def test_saving_profile_fields_does_not_reread_the_chat_id(self) -> None:
+        user = Users.objects.get(pk=UserService.save_user_sync(make_message(450)).pk)
+        user.first_name = "Renamed"
+
+        with self.assertNumQueries(1):
+            user.save(update_fields=["first_name"])
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_deleting_a_user_invalidates_its_entry(self) -> None:
+        UserService.save_user_sync(make_message(500))
+        Users.objects.filter(chat_id=500).delete()
+
+        self.assertIsNone(user_cache.local.get(500))
+        self.assertIsNone(UserService.get_user_id_sync(500))
+
+
+class UserProfileUpdateTests(TestCase):
+    def setUp(self) -> None:
+        user_cache.local.clear()
+
+    def test_changed_profile_is_written_back(self) -> None:
+        UserService.save_user_sync(make_message(600))
+        user_cache.local.clear()
+
+        UserService.save_user_sync(make_message(600, username="alice2", first_name="Al"))
+
+        user = Users.objects.get(chat_id=600)
+        self.assertEqual((user.username, user.first_name), ("alice2", "Al"))
+        self.assertEqual(user_cache.local.get(600)["username"], "alice2")
+
+    async def test_start_unblocks_a_user_still_cached_in_this_process(self) -> None:
+        await UserService.save_user_async(make_message(650))
+        await Users.objects.filter(chat_id=650).aupdate(blocked=True)
+        self.assertIsNotNone(user_cache.local.get(650))
+
+        await UserService.save_user_async(make_message(650))
+
+        self.assertFalse((await Users.objects.aget(chat_id=650)).blocked)
+
+    async def test_changed_profile_bypasses_cache_hit(self) -> None:
+        await UserService.save_user_async(make_message(700))
+
+        await UserService.save_user_async(make_message(700, username="bob"))
+
+        user = await Users.objects.aget(chat_id=700)
+        self.assertEqual(user.username, "bob")
+
+
+class UserWriteBufferTests(TestCase):
+    def setUp(self) -> None:
+        user_cache.local.clear()
+        self.buffer = UserWriteBuffer(enabled=True, interval=0.01, max_rows=100)
+
+    async def test_concurrent_saves_are_written_in_one_batch(self) -> None:
+        await Users.objects.acreate(chat_id=800, username="old", first_name="Old")
+
+        users = await asyncio.gather(
+            self.buffer.save(800, "new", "New"),
+            self.buffer.save(801, "carol", "Carol"),
+            self.buffer.save(802, "dave", "Dave"),
+        )
+
+        self.assertEqual([user.chat_id for user in users], [800, 801, 802])
+        self.assertEqual(self.buffer.stats()["flushes"], 1)
+        self.assertEqual(await Users.objects.acount(), 3)
+        updated = await Users.objects.aget(chat_id=800)
+        self.assertEqual((updated.username, updated.first_name), ("new", "New"))
+        self.assertEqual(user_cache.local.get(801)["id"], users[1].pk)
+
+    async def test_reaching_max_rows_flushes_immediately(self) -> None:
+        self.buffer.interval = 60
+        self.buffer.max_rows = 2
+
+        await asyncio.wait_for(
+            asyncio.gather(
+                self.buffer.save(900, "a", "A"),
+                self.buffer.save(901, "b", "B"),
+            ),
+            timeout=5,
+        )
+
+        self.assertEqual(self.buffer.stats()["rows_written"], 2)
+
+    async def test_close_writes_pending_users(self) -> None:
+        self.buffer.interval = 60
+        pending = asyncio.ensure_future(self.buffer.save(1000, "e", "E"))
+        await asyncio.sleep(0)
+
+        await self.buffer.close()
+
+        self.assertEqual((await pending).chat_id, 1000)
+        self.assertTrue(await Users.objects.filter(chat_id=1000).aexists())
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.bot.models.users import Users
+
+
+class UsersRecipientStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Users.objects.bulk_create(Users(chat_id=chat_id) for chat_id in (50, 10, 40, 20, 30))
+
+    def test_streams_every_chat_id_in_id_order_across_pages(self) -> None:
+        with self.assertNumQueries(3):
+            chat_ids = list(Users.objects.recipients().stream_chat_ids(page_size=2))
+
+        self.assertEqual(chat_ids, [50, 10, 40, 20, 30])
+
+    def test_limit_stops_early(self) -> None:
+        chat_ids = list(Users.objects.recipients().stream_chat_ids(page_size=2, limit=3))
+
+        self.assertEqual(chat_ids, [50, 10, 40])
+
+    def test_filters_are_applied_to_every_page(self) -> None:
+        chat_ids = Users.objects.filter(chat_id__gt=15).stream_chat_ids(page_size=1)
+
+        self.assertEqual(list(chat_ids), [50, 40, 20, 30])
+
+    def test_created_after_and_active_since(self) -> None:
+        moment = timezone.now() - timedelta(minutes=1)
+        Users.objects.filter(chat_id=10).update(
+            created_at=moment - timedelta(days=1),
+            updated_at=moment - timedelta(days=1),
+        )
+
+        self.assertNotIn(10, list(Users.objects.created_after(moment).stream_chat_ids()))
+        self.assertNotIn(10, list(Users.objects.active_since(moment).stream_chat_ids()))
+        self.assertEqual(Users.objects.created_after(moment).count(), 4)
+
+    async def test_async_stream_matches_sync_stream(self) -> None:
+        chat_ids = [
+            chat_id async for chat_id in Users.objects.recipients().astream_chat_ids(page_size=2)
+        ]
+
+        self.assertEqual(chat_ids, [50, 10, 40, 20, 30])
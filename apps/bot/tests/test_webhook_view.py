@@ -1,8 +1,11 @@
 import json
-from unittest.mock import MagicMock, patch
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
 
 from django.test import TestCase
 
+from src.asgi import application
+
 
 class TelegramWebhookViewTests(TestCase):
     def test_rejects_request_when_secret_header_is_missing(self) -> None:
@@ -50,12 +53,12 @@ class TelegramWebhookViewTests(TestCase):
             "apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET",
             "expected-secret",
         ), patch(
-            "apps.bot.views.webhook.types.Update.model_validate",
+            "apps.bot.views.webhook.types.Update.model_validate_json",
             return_value=object(),
-        ), patch("apps.bot.views.webhook.async_to_sync") as async_to_sync_mock:
-            handler_mock = MagicMock()
-            async_to_sync_mock.return_value = handler_mock
-
+        ), patch(
+            "apps.bot.views.webhook.dp.feed_update",
+            AsyncMock(),
+        ) as feed_update_mock:
             response = self.client.post(
                 "/bot/webhook/",
                 data=json.dumps({"update_id": 1}),
@@ -65,5 +68,167 @@ class TelegramWebhookViewTests(TestCase):
             )
 
         self.assertEqual(response.status_code, 200)
-        async_to_sync_mock.assert_called_once()
-        handler_mock.assert_called_once()
+        feed_update_mock.assert_awaited_once()
+
+    def test_returns_500_when_update_processing_fails(self) -> None:
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""), patch(
+            "apps.bot.views.webhook.types.Update.model_validate_json",
+            return_value=object(),
+        ), patch(
+            "apps.bot.views.webhook.dp.feed_update",
+            AsyncMock(side_effect=RuntimeError("boom")),
+        ):
+            response = self.client.post(
+                "/bot/webhook/",
+                data=json.dumps({"update_id": 1}),
+                content_type="application/json",
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 500)
+
+    def test_fast_ack_mode_enqueues_update_without_processing_it(self) -> None:
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""), patch(
+            "apps.bot.views.webhook.config.WEBHOOK_FAST_ACK",
+            True,
+        ), patch(
+            "apps.bot.views.webhook.update_queue.put",
+            AsyncMock(return_value=True),
+        ) as put_mock, patch(
+            "apps.bot.views.webhook.dp.feed_update",
+            AsyncMock(),
+        ) as feed_update_mock:
+            response = self.client.post(
+                "/bot/webhook/",
+                data=json.dumps({"update_id": 1}),
+                content_type="application/json",
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        put_mock.assert_awaited_once()
+        feed_update_mock.assert_not_awaited()
+
+    def test_fast_ack_mode_returns_503_when_queue_is_full(self) -> None:
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""), patch(
+            "apps.bot.views.webhook.config.WEBHOOK_FAST_ACK",
+            True,
+        ), patch(
+            "apps.bot.views.webhook.update_queue.put",
+            AsyncMock(return_value=False),
+        ):
+            response = self.client.post(
+                "/bot/webhook/",
+                data=json.dumps({"update_id": 1}),
+                content_type="application/json",
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_rejects_oversized_body(self) -> None:
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""), patch(
+            "apps.bot.views.webhook.config.WEBHOOK_MAX_BODY_SIZE",
+            64,
+        ), patch(
+            "apps.bot.views.webhook.dp.feed_update",
+            AsyncMock(),
+        ) as feed_update_mock:
+            response = self.client.post(
+                "/bot/webhook/",
+                data=json.dumps({"update_id": 1, "padding": "x" * 100}),
+                content_type="application/json",
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 413)
+        feed_update_mock.assert_not_awaited()
+
+    def test_parses_update_bound_to_the_bot(self) -> None:
+        payload = {
+            "update_id": 10,
+            "message": {
+                "message_id": 1,
+                "date": 1700000000,
+                "chat": {"id": 5, "type": "private"},
+                "from": {"id": 5, "is_bot": False, "first_name": "Alice"},
+                "text": "/start",
+            },
+        }
+        with patch("apps.bot.views.webhook.config.TELEGRAM_WEBHOOK_SECRET", ""), patch(
+            "apps.bot.views.webhook.dp.feed_update",
+            AsyncMock(),
+        ) as feed_update_mock:
+            response = self.client.post(
+                "/bot/webhook/",
+                data=json.dumps(payload),
+                content_type="application/json",
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        bot, update = feed_update_mock.await_args.args
+        self.assertEqual(update.message.text, "/start")
+        self.assertIs(update.bot, bot)
+        self.assertIs(update.message.bot, bot)
+
+    def test_health_check_returns_200(self) -> None:
+        response = self.client.get("/bot/webhook/", secure=True)
+
+        self.assertEqual(response.status_code, 200)
+
+
+def webhook_scope(headers: list[tuple[bytes, bytes]]) -> dict:
+    return {"type": "http", "method": "POST", "path": "/bot/webhook/", "headers": headers}
+
+
+class WebhookBodyLimitTests(IsolatedAsyncioTestCase):
+    async def call(self, scope: dict, messages: list[dict]) -> tuple[list[dict], AsyncMock]:
+        sent: list[dict] = []
+
+        async def receive() -> dict:
+            return messages.pop(0)
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        with patch("src.asgi.config.WEBHOOK_MAX_BODY_SIZE", 64), patch(
+            "src.asgi.django_application",
+            AsyncMock(),
+        ) as django_mock:
+            await application(scope, receive, send)
+        return sent, django_mock
+
+    async def test_rejects_by_content_length_before_reading_the_body(self) -> None:
+        messages = [{"type": "http.request", "body": b"x" * 100}]
+
+        sent, django_mock = await self.call(webhook_scope([(b"content-length", b"100")]), messages)
+
+        self.assertEqual(sent[0]["status"], 413)
+        self.assertEqual(len(messages), 1)
+        django_mock.assert_not_awaited()
+
+    async def test_rejects_a_chunked_body_once_it_passes_the_limit(self) -> None:
+        chunks = [
+            {"type": "http.request", "body": b"x" * 40, "more_body": True},
+            {"type": "http.request", "body": b"x" * 40, "more_body": True},
+            {"type": "http.request", "body": b"x" * 40, "more_body": False},
+        ]
+
+        sent, django_mock = await self.call(webhook_scope([]), chunks)
+
+        self.assertEqual(sent[0]["status"], 413)
+        django_mock.assert_not_awaited()
+
+    async def test_replays_an_accepted_body_to_django(self) -> None:
+        chunks = [
+            {"type": "http.request", "body": b"{}", "more_body": True},
+            {"type": "http.request", "body": b"", "more_body": False},
+        ]
+
+        sent, django_mock = await self.call(webhook_scope([]), list(chunks))
+
+        self.assertEqual(sent, [])
+        replay = django_mock.await_args.args[1]
+        self.assertEqual(await replay(), chunks[0])
+        self.assertEqual(await replay(), chunks[1])
@@ -1,6 +1,8 @@
 from django.urls import path
+from apps.bot.views.metrics import MetricsView
 from apps.bot.views.webhook import TelegramWebhookView
 
 urlpatterns = [
     path("webhook/", TelegramWebhookView.as_view(), name="telegram-webhook"),
+    path("metrics/", MetricsView.as_view(), name="bot-metrics"),
 ]
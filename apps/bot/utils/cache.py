@@ -0,0 +1,121 @@
+import time
+import threading
+from typing import Any
+from typing import Hashable
+from typing import Optional
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+
+    Entries expire ``ttl`` seconds after they were written; when the cache is
+    full the least recently used entry is evicted. It is shared between the
+    event loop and ``sync_to_async`` worker threads, hence the lock.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0) -> None:
+        """
+        :param maxsize: Maximum number of entries.
+        :type maxsize: int
+        :param ttl: Seconds an entry stays valid.
+        :type ttl: float
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for ``key`` or ``None`` if missing or expired.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :return: Cached value.
+        :rtype: Optional[Any]
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store ``value`` under ``key``, evicting the least recently used entry if full.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :param value: Value to cache.
+        :type value: Any
+        :return: None
+        :rtype: None
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def add(self, key: Hashable, value: Any = True) -> bool:
+        """
+        Store ``value`` under ``key`` unless a live entry already exists.
+
+        The check and the write happen under one lock, so of several
+        concurrent callers adding the same key exactly one succeeds.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :param value: Value to cache.
+        :type value: Any
+        :return: Whether the entry was added.
+        :rtype: bool
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove ``key`` from the cache if present.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self._data.clear()
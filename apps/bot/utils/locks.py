@@ -0,0 +1,112 @@
+from typing import Any
+from typing import Optional
+
+from apps.bot.utils.redis import get_redis
+
+
+class RedisLock:
+    """
+    Named lock in Redis, owned by a token and bounded by a TTL.
+
+    Unlike a context-manager lock it may be acquired by one Celery task and
+    released by another (e.g. a chord callback), as long as both use the
+    same token. The TTL releases the lock if its owner dies; long-running
+    owners call :meth:`extend` to keep it.
+
+    With ``owner_ttl`` the owner's token is also remembered after the lock
+    expires, until :meth:`release`, so the next caller can find an owner
+    that died without finishing (:meth:`last_owner`) and resume its work.
+    """
+
+    RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+    def __init__(self, name: str, ttl: int, client: Any = None, owner_ttl: int = 0) -> None:
+        """
+        :param name: Lock name; the Redis key is ``lock:<name>``.
+        :type name: str
+        :param ttl: Seconds until the lock expires unless extended.
+        :type ttl: int
+        :param client: Synchronous Redis client. Defaults to the shared client.
+        :type client: redis.Redis
+        :param owner_ttl: Seconds to remember the last owner (``0``: not remembered).
+        :type owner_ttl: int
+        """
+        self.key = f"lock:{name}"
+        self.owner_key = f"lock:{name}:owner"
+        self.ttl = ttl
+        self.owner_ttl = owner_ttl
+        self.client = client or get_redis()
+
+    def acquire(self, token: str) -> bool:
+        """
+        Take the lock for ``token``.
+
+        Acquiring a lock already held by the same token succeeds and refreshes
+        its TTL, so a restarted owner can resume.
+
+        :param token: Owner identifier.
+        :type token: str
+        :return: Whether ``token`` now holds the lock.
+        :rtype: bool
+        """
+        acquired = bool(self.client.set(self.key, token, ex=self.ttl, nx=True)) or self.extend(token)
+        if acquired and self.owner_ttl:
+            self.client.set(self.owner_key, token, ex=self.owner_ttl)
+        return acquired
+
+    def extend(self, token: str) -> bool:
+        """
+        Reset the TTL if ``token`` still holds the lock.
+
+        :param token: Owner identifier.
+        :type token: str
+        :return: Whether the lock is still held by ``token``.
+        :rtype: bool
+        """
+        return bool(self.client.eval(self.EXTEND_SCRIPT, 1, self.key, token, self.ttl))
+
+    def release(self, token: str) -> bool:
+        """
+        Release the lock if ``token`` holds it, and forget ``token`` as its
+        last owner.
+
+        :param token: Owner identifier.
+        :type token: str
+        :return: Whether the lock was released.
+        :rtype: bool
+        """
+        return bool(self.client.eval(self.RELEASE_SCRIPT, 2, self.key, self.owner_key, token))
+
+    def owner(self) -> Optional[str]:
+        """
+        :return: Token currently holding the lock, if any.
+        :rtype: Optional[str]
+        """
+        return self._get(self.key)
+
+    def last_owner(self) -> Optional[str]:
+        """
+        :return: Token that last acquired the lock and has not released it,
+            even if the lock has expired since. Only kept with ``owner_ttl``.
+        :rtype: Optional[str]
+        """
+        return self._get(self.owner_key)
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,468 @@
+import abc
+import math
+import bisect
+import threading
+from typing import Any
+from typing import Iterator
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from contextvars import ContextVar
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from apps.bot.utils.logging import logger
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}" if pairs else ""
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered in the Prometheus text format.
+
+    Every process (web worker, polling bot, Celery worker) keeps its own
+    values and is scraped separately; nothing is shared between processes,
+    which is why the web endpoint requires a single worker.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        """
+        Add ``metric``, replacing a metric of the same name.
+
+        :param metric: Metric to add.
+        :type metric: Metric
+        :return: None
+        :rtype: None
+        """
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["Metric"]:
+        """
+        :param name: Metric name.
+        :type name: str
+        :return: Registered metric, if any.
+        :rtype: Optional[Metric]
+        """
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        :rtype: str
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class Metric(abc.ABC):
+    """
+    Base class of the metrics kept by a :class:`MetricsRegistry`.
+
+    A metric has a fixed set of label names; :meth:`labels` returns the
+    child holding the values of one label combination. Children are created
+    once and then updated under a lock, so recording a value costs a dict
+    lookup and a few additions. Metrics are shared by the event loop and the
+    ORM and Celery worker threads.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: MetricsRegistry = registry,
+    ) -> None:
+        """
+        :param name: Metric name, e.g. ``bot_updates_total``.
+        :type name: str
+        :param documentation: ``HELP`` text.
+        :type documentation: str
+        :param labelnames: Names of the labels.
+        :type labelnames: Iterable[str]
+        :param registry: Registry to add the metric to.
+        :type registry: MetricsRegistry
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        """
+        :return: Child holding the values of one label combination.
+        :rtype: Any
+        """
+
+    def labels(self, *values: Any) -> Any:
+        """
+        :param values: One value per label name, in order.
+        :type values: Any
+        :return: Child metric for these label values.
+        :rtype: Any
+        :raises ValueError: If the number of values does not match the label names.
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}.")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def samples(self) -> list[tuple[str, str, float]]:
+        """
+        :return: ``(name suffix, labels, value)`` rows in exposition order.
+        :rtype: list[tuple[str, str, float]]
+        """
+
+    def render(self) -> list[str]:
+        """
+        :return: Lines of the text exposition format for this metric.
+        :rtype: list[str]
+        """
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {_format_value(value)}"
+            for suffix, labels, value in self.samples()
+        )
+        return lines
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count, e.g. requests by status code.
+    """
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increment the counter of a metric without labels.
+
+        :param amount: Increment.
+        :type amount: float
+        :return: None
+        :rtype: None
+        """
+        self.labels().inc(amount)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        return [
+            ("", _labels(self.labelnames, key), child.value)
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values (durations, sizes) over fixed buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        registry: MetricsRegistry = registry,
+    ) -> None:
+        """
+        :param name: Metric name, e.g. ``bot_update_duration_seconds``.
+        :type name: str
+        :param documentation: ``HELP`` text.
+        :type documentation: str
+        :param labelnames: Names of the labels.
+        :type labelnames: Iterable[str]
+        :param buckets: Upper bounds of the buckets, ascending; ``+Inf`` is implied.
+        :type buckets: Iterable[float]
+        :param registry: Registry to add the metric to.
+        :type registry: MetricsRegistry
+        """
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """
+        Record ``value`` on a histogram without labels.
+
+        :param value: Observed value.
+        :type value: float
+        :return: None
+        :rtype: None
+        """
+        self.labels().observe(value)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        rows = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                rows.append(("_bucket", _labels(self.labelnames + ("le",), key + (_format_value(bound),)), cumulative))
+            labels = _labels(self.labelnames, key)
+            rows.append(("_sum", labels, total))
+            rows.append(("_count", labels, cumulative))
+        return rows
+
+
+class StatsGauge(Metric):
+    """
+    Gauge reading the numeric values of a component's ``stats()`` dict at
+    scrape time, one sample per key (``stat`` label).
+
+    Non-numeric values (such as the FSM backend name) are skipped; booleans
+    are exported as ``0``/``1``.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], dict[str, Any]],
+        registry: MetricsRegistry = registry,
+    ) -> None:
+        """
+        :param name: Metric name, e.g. ``bot_update_queue``.
+        :type name: str
+        :param documentation: ``HELP`` text.
+        :type documentation: str
+        :param collect: Callable returning the current stats.
+        :type collect: Callable[[], dict[str, Any]]
+        :param registry: Registry to add the metric to.
+        :type registry: MetricsRegistry
+        """
+        self.collect = collect
+        super().__init__(name, documentation, ("stat",), registry)
+
+    def _new_child(self) -> Any:
+        raise TypeError(f"{self.name} is read from collect(); it has no children to update.")
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        try:
+            stats = self.collect()
+        except Exception:
+            logger.exception("Failed to collect %s.", self.name)
+            return []
+        return [
+            ("", _labels(self.labelnames, (key,)), float(value))
+            for key, value in sorted(stats.items())
+            if isinstance(value, (int, float))
+        ]
+
+
+webhook_requests = Counter(
+    "bot_webhook_requests_total",
+    "Webhook requests by HTTP status code.",
+    ("status",),
+)
+webhook_duration = Histogram(
+    "bot_webhook_request_duration_seconds",
+    "Time spent answering a webhook request.",
+)
+update_duration = Histogram(
+    "bot_update_duration_seconds",
+    "Time spent processing an update, by update type.",
+    ("type",),
+)
+handler_duration = Histogram(
+    "bot_handler_duration_seconds",
+    "Time spent in handlers, by router and event type.",
+    ("router", "event"),
+)
+handler_errors = Counter(
+    "bot_handler_errors_total",
+    "Handlers that raised, by router and event type.",
+    ("router", "event"),
+)
+update_queries = Histogram(
+    "bot_update_db_queries",
+    "Database queries run while processing an update.",
+    buckets=QUERY_BUCKETS,
+)
+db_queries = Counter(
+    "bot_db_queries_total",
+    "Database queries run while processing updates.",
+)
+telegram_requests = Counter(
+    "bot_telegram_requests_total",
+    "Bot API calls by method and result (ok, retry_after, error).",
+    ("method", "result"),
+)
+telegram_duration = Histogram(
+    "bot_telegram_request_duration_seconds",
+    "Bot API call latency by method, excluding rate limit waits.",
+    ("method",),
+)
+
+
+_update_queries: ContextVar[Optional[list[int]]] = ContextVar("update_queries", default=None)
+
+
+def count_queries(execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+    """
+    Database execute wrapper counting the queries of the current update.
+
+    Installed on every connection by :mod:`apps.bot.signals.metrics`. The
+    counter lives in a context variable set by
+    :class:`apps.bot.middlewares.metrics.UpdateMetricsMiddleware`, which
+    ``sync_to_async`` carries over to the ORM threads; queries run outside
+    an update are not counted.
+    """
+    counter = _update_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def counting_queries() -> Iterator[list[int]]:
+    """
+    Count the database queries run inside the block, including those run by
+    ``sync_to_async`` calls made from it.
+
+    :return: Context manager yielding a one-item list holding the count.
+    :rtype: Iterator[list[int]]
+    """
+    counter = [0]
+    token = _update_queries.set(counter)
+    try:
+        yield counter
+    finally:
+        _update_queries.reset(token)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = registry
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return None
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve :data:`registry` on ``http://addr:port/metrics`` from a daemon thread.
+
+    Used by processes without Django's HTTP stack (the polling bot and the
+    Celery workers); web workers expose the ``/bot/metrics/`` view instead.
+    Calling it again in the same process returns the running server.
+
+    :param port: TCP port; ``0`` disables the server.
+    :type port: int
+    :param addr: Address to bind.
+    :type addr: str
+    :return: Running server, or ``None`` when disabled or the port is taken.
+    :rtype: Optional[ThreadingHTTPServer]
+    """
+    global _server
+
+    if not port:
+        return None
+    if _server is not None:
+        return _server
+
+    try:
+        server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    except OSError as exc:
+        logger.warning("Metrics server not started on port %s: %s", port, exc)
+        return None
+
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics on %s:%s", addr, port)
+    _server = server
+    return server
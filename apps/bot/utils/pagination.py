@@ -0,0 +1,56 @@
+import json
+from typing import Any
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from src.settings.config.configs import config
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of large querysets from the
+    PostgreSQL planner instead of ``SELECT COUNT(*)``.
+
+    Counting millions of rows scans the whole table (or index) on every
+    changelist page. The planner's estimate of the same query is read from
+    ``EXPLAIN`` and costs one statistics lookup; it is only used when it is
+    at least ``exact_limit`` rows, so small and narrowly filtered lists keep
+    exact counts. Other databases always count.
+    """
+
+    def __init__(self, *args: Any, exact_limit: int = config.ADMIN_EXACT_COUNT_LIMIT, **kwargs: Any) -> None:
+        """
+        :param exact_limit: Estimated rows below which the exact count is used.
+        :type exact_limit: int
+        """
+        super().__init__(*args, **kwargs)
+        self.exact_limit = exact_limit
+
+    @staticmethod
+    def estimate(queryset: QuerySet) -> int:
+        """
+        :param queryset: Queryset to estimate.
+        :type queryset: QuerySet
+        :return: Rows the PostgreSQL planner expects the queryset to return.
+        :rtype: int
+        """
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @cached_property
+    def count(self) -> int:
+        """
+        :return: Estimated number of objects for large querysets, exact otherwise.
+        :rtype: int
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != "postgresql":
+            return super().count
+
+        estimate = self.estimate(queryset)
+        if estimate < self.exact_limit:
+            return super().count
+        return estimate
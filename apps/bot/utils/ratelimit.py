@@ -0,0 +1,245 @@
+import time
+import asyncio
+import threading
+from typing import Any
+from typing import Union
+from typing import Optional
+from functools import lru_cache
+
+import redis
+from asgiref.sync import sync_to_async
+
+from apps.bot.utils.logging import logger
+from apps.bot.utils.redis import get_redis
+from src.settings.config.configs import config
+
+
+ChatKey = Union[int, str]
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter with a global and a per-chat limit.
+
+    Every call reserves the earliest moment at which both the global limit
+    (``rate`` calls per second, bursts of up to ``burst``) and the chat's
+    limit (one call per ``per_chat_interval`` seconds) allow it, and returns
+    how long the caller has to wait for it. Reservations never fail, so
+    concurrent callers queue up behind each other instead of polling, and a
+    call held back by its chat's limit does not delay calls to other chats.
+
+    With a Redis ``client`` the state is shared by every process using the
+    same ``prefix`` (the bot process and all Celery workers) and computed
+    atomically from the Redis clock. Without one, or while Redis is
+    unreachable, an in-process state with the same semantics is used.
+    """
+
+    SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local at = now
+local tats = {}
+for i, key in ipairs(KEYS) do
+    tats[i] = tonumber(redis.call('GET', key)) or now
+    at = math.max(at, tats[i] - tonumber(ARGV[i * 2]))
+end
+for i, key in ipairs(KEYS) do
+    local tat = math.max(tats[i], now) + tonumber(ARGV[i * 2 - 1])
+    redis.call('SET', key, string.format('%.6f', tat), 'PX', math.ceil((tat - now) * 1000) + 1000)
+end
+return string.format('%.6f', at - now)
+"""
+
+    PENALTY_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now + tonumber(ARGV[1]))
+redis.call('SET', KEYS[1], string.format('%.6f', tat), 'PX', math.ceil((tat - now) * 1000) + 1000)
+return 1
+"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        per_chat_interval: float = 1.0,
+        client: Optional[redis.Redis] = None,
+        prefix: str = "ratelimit:telegram",
+        max_local_entries: int = 100_000,
+        fallback_interval: float = 5.0,
+    ) -> None:
+        """
+        :param rate: Calls per second allowed across all chats.
+        :type rate: float
+        :param burst: Calls allowed at once before ``rate`` applies.
+        :type burst: int
+        :param per_chat_interval: Minimum seconds between calls to one chat
+            (``0`` disables the per-chat limit).
+        :type per_chat_interval: float
+        :param client: Synchronous Redis client; ``None`` keeps state in-process.
+        :type client: Optional[redis.Redis]
+        :param prefix: Redis key prefix shared by all cooperating processes.
+        :type prefix: str
+        :param max_local_entries: Tracked chats before expired in-process
+            entries are purged.
+        :type max_local_entries: int
+        :param fallback_interval: Seconds to limit in-process after a Redis
+            error before the shared state is tried again.
+        :type fallback_interval: float
+        """
+        self.interval = 1.0 / rate
+        self.tolerance = self.interval * (max(1, burst) - 1)
+        self.per_chat_interval = per_chat_interval
+        self.client = client
+        self.prefix = prefix
+        self.max_local_entries = max_local_entries
+        self.fallback_interval = fallback_interval
+
+        self._script = client.register_script(self.SCRIPT) if client is not None else None
+        self._penalty_script = client.register_script(self.PENALTY_SCRIPT) if client is not None else None
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._fallback_until = 0.0
+
+    def _limits(self, chat_id: Optional[ChatKey]) -> tuple[list[str], list[float]]:
+        keys = [f"{self.prefix}:global"]
+        args = [self.interval, self.tolerance]
+        if chat_id is not None and self.per_chat_interval > 0:
+            keys.append(f"{self.prefix}:chat:{chat_id}")
+            args += [self.per_chat_interval, 0.0]
+        return keys, args
+
+    def _reserve_local(self, keys: list[str], args: list[float]) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if len(self._tats) >= self.max_local_entries:
+                self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+
+            tats = [self._tats.get(key, now) for key in keys]
+            at = max([now] + [tat - args[index * 2 + 1] for index, tat in enumerate(tats)])
+            for index, key in enumerate(keys):
+                self._tats[key] = max(tats[index], now) + args[index * 2]
+            return at - now
+
+    def reserve(self, chat_id: Optional[ChatKey] = None) -> float:
+        """
+        Reserve a slot for one call and return the delay until it is due.
+
+        Performs blocking Redis I/O when shared; call it from sync code only.
+
+        :param chat_id: Target chat, or ``None`` for the global limit only.
+        :type chat_id: Optional[int | str]
+        :return: Seconds to wait before making the call.
+        :rtype: float
+        """
+        keys, args = self._limits(chat_id)
+        if self._script is not None and time.monotonic() >= self._fallback_until:
+            try:
+                return float(self._script(keys=keys, args=args))
+            except redis.RedisError as exc:
+                self._fallback_until = time.monotonic() + self.fallback_interval
+                logger.warning("Shared rate limiter unavailable, limiting locally: %s", exc)
+        return self._reserve_local(keys, args)
+
+    def acquire_sync(self, chat_id: Optional[ChatKey] = None) -> float:
+        """
+        Block until a call to ``chat_id`` is allowed.
+
+        :param chat_id: Target chat, or ``None`` for the global limit only.
+        :type chat_id: Optional[int | str]
+        :return: Seconds waited.
+        :rtype: float
+        """
+        wait = self.reserve(chat_id)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire(self, chat_id: Optional[ChatKey] = None) -> float:
+        """
+        Wait until a call to ``chat_id`` is allowed.
+
+        The Redis round-trip runs in a non thread-sensitive executor, so the
+        limiter works on any event loop (the bot's or a Celery worker's)
+        without loop-bound connections.
+
+        :param chat_id: Target chat, or ``None`` for the global limit only.
+        :type chat_id: Optional[int | str]
+        :return: Seconds waited.
+        :rtype: float
+        """
+        if self._script is not None:
+            wait = await sync_to_async(self.reserve, thread_sensitive=False)(chat_id)
+        else:
+            wait = self.reserve(chat_id)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _penalty_key(self, chat_id: Optional[ChatKey]) -> str:
+        if chat_id is not None and self.per_chat_interval > 0:
+            return f"{self.prefix}:chat:{chat_id}"
+        return f"{self.prefix}:global"
+
+    def penalize_sync(self, chat_id: Optional[ChatKey], seconds: float) -> None:
+        """
+        Hold back calls to ``chat_id`` (or all calls) for ``seconds``.
+
+        Used when Telegram answers ``429 Too Many Requests``, so every process
+        sharing the limiter honours the requested ``retry_after``.
+
+        :param chat_id: Chat that was flood limited, or ``None`` for all calls.
+        :type chat_id: Optional[int | str]
+        :param seconds: Seconds requested by Telegram.
+        :type seconds: float
+        :return: None
+        :rtype: None
+        """
+        key = self._penalty_key(chat_id)
+        if self._penalty_script is not None and time.monotonic() >= self._fallback_until:
+            try:
+                self._penalty_script(keys=[key], args=[seconds])
+                return
+            except redis.RedisError as exc:
+                self._fallback_until = time.monotonic() + self.fallback_interval
+                logger.warning("Shared rate limiter unavailable, limiting locally: %s", exc)
+
+        with self._lock:
+            now = time.monotonic()
+            self._tats[key] = max(self._tats.get(key, now), now + seconds)
+
+    async def penalize(self, chat_id: Optional[ChatKey], seconds: float) -> None:
+        """
+        Async variant of :meth:`penalize_sync`.
+
+        :param chat_id: Chat that was flood limited, or ``None`` for all calls.
+        :type chat_id: Optional[int | str]
+        :param seconds: Seconds requested by Telegram.
+        :type seconds: float
+        :return: None
+        :rtype: None
+        """
+        if self._penalty_script is not None:
+            await sync_to_async(self.penalize_sync, thread_sensitive=False)(chat_id, seconds)
+        else:
+            self.penalize_sync(chat_id, seconds)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide Telegram rate limiter configured by ``config``.
+
+    ``RATE_LIMIT_BACKEND=redis`` shares it through ``config.REDIS_URL``;
+    ``memory`` limits each process on its own (tests, single-process setups).
+
+    :return: Shared rate limiter.
+    :rtype: RateLimiter
+    """
+    client: Any = get_redis() if config.RATE_LIMIT_BACKEND == "redis" else None
+    return RateLimiter(
+        rate=config.TELEGRAM_RATE_LIMIT,
+        burst=config.TELEGRAM_RATE_BURST,
+        per_chat_interval=config.TELEGRAM_PER_CHAT_INTERVAL,
+        client=client,
+    )
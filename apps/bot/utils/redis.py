@@ -0,0 +1,33 @@
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from src.settings.config.configs import config
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """
+    Return the process-wide synchronous Redis client for ``config.REDIS_URL``.
+
+    The client keeps its own connection pool, so it is safe to share between
+    threads and Celery tasks.
+
+    :return: Shared Redis client.
+    :rtype: redis.Redis
+    """
+    return redis.Redis.from_url(config.REDIS_URL)
+
+
+def create_async_redis() -> aioredis.Redis:
+    """
+    Create an asyncio Redis client for ``config.REDIS_URL``.
+
+    Asyncio connections are bound to the event loop that opened them, so the
+    caller owns the client and must close it before its loop finishes.
+
+    :return: New asyncio Redis client.
+    :rtype: redis.asyncio.Redis
+    """
+    return aioredis.Redis.from_url(config.REDIS_URL)
@@ -0,0 +1,137 @@
+from typing import Any
+from typing import Union
+from typing import Callable
+from typing import Optional
+from typing import Awaitable
+
+from aiogram import Router
+from aiogram import types
+from aiogram.filters import Filter
+from aiogram.dispatcher.event.handler import CallableObject
+
+
+TextHandler = Callable[..., Awaitable[Any]]
+
+
+class TextCommandFilter(Filter):
+    """
+    Matches messages whose normalized text is a command of a :class:`TextCommandIndex`.
+
+    The matched handler is passed on as ``text_command``.
+    """
+
+    def __init__(self, index: "TextCommandIndex") -> None:
+        """
+        :param index: Index to look the text up in.
+        :type index: TextCommandIndex
+        """
+        self.index = index
+
+    async def __call__(self, message: types.Message) -> Union[bool, dict[str, Any]]:
+        handler = self.index.lookup(message.text)
+        if handler is None:
+            return False
+        return {"text_command": handler}
+
+
+class TextCommandIndex:
+    """
+    Dispatch table of case-insensitive text commands (menu buttons).
+
+    Instead of one router per command, each testing the message with its own
+    ``F.text.lower() == "..."`` filter in turn, all commands share a single
+    router whose filter normalizes the text once and looks the handler up in
+    a dict, so the cost of routing a text message does not grow with the
+    number of commands.
+
+    Handlers are called like regular aiogram handlers: they receive the
+    message plus whichever of the middleware and filter data they declare
+    (``state``, ``bot``, ...).
+    """
+
+    def __init__(self, name: str = "text_commands") -> None:
+        """
+        :param name: Name of the router created by :attr:`router`.
+        :type name: str
+        """
+        self.name = name
+        self._handlers: dict[str, CallableObject] = {}
+        self._router: Optional[Router] = None
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        :param text: Message text.
+        :type text: str
+        :return: Lookup key for ``text``.
+        :rtype: str
+        """
+        return text.lower()
+
+    def command(self, *texts: str) -> Callable[[TextHandler], TextHandler]:
+        """
+        Decorator registering a handler for one or more command texts.
+
+        :param texts: Texts triggering the handler, in any case.
+        :type texts: str
+        :return: Decorator returning the handler unchanged.
+        :rtype: Callable[[TextHandler], TextHandler]
+        """
+        def decorator(handler: TextHandler) -> TextHandler:
+            self.register(handler, *texts)
+            return handler
+
+        return decorator
+
+    def register(self, handler: TextHandler, *texts: str) -> None:
+        """
+        Register ``handler`` for ``texts``.
+
+        :param handler: Coroutine function handling the message.
+        :type handler: Callable[..., Awaitable[Any]]
+        :param texts: Texts triggering the handler, in any case.
+        :type texts: str
+        :return: None
+        :rtype: None
+        :raises ValueError: If a text is already registered.
+        """
+        callable_object = CallableObject(handler)
+        for text in texts:
+            key = self.normalize(text)
+            if key in self._handlers:
+                raise ValueError(f"Text command {text!r} is already registered.")
+            self._handlers[key] = callable_object
+
+    def lookup(self, text: Optional[str]) -> Optional[CallableObject]:
+        """
+        :param text: Message text, if any.
+        :type text: Optional[str]
+        :return: Handler registered for ``text``, if any.
+        :rtype: Optional[CallableObject]
+        """
+        if not text:
+            return None
+        return self._handlers.get(self.normalize(text))
+
+    @property
+    def router(self) -> Router:
+        """
+        Router with the single message handler dispatching through the index.
+
+        :return: Router to include in the dispatcher.
+        :rtype: aiogram.Router
+        """
+        if self._router is None:
+            self._router = Router(name=self.name)
+            self._router.message.register(_dispatch_text_command, TextCommandFilter(self))
+        return self._router
+
+
+async def _dispatch_text_command(message: types.Message, text_command: CallableObject, **kwargs: Any) -> Any:
+    return await text_command.call(message, **kwargs)
+
+
+text_commands = TextCommandIndex()
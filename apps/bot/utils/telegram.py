@@ -0,0 +1,205 @@
+import ssl
+import asyncio
+import threading
+from typing import Any
+from typing import Optional
+from typing import Coroutine
+
+import certifi
+from aiohttp import ClientSession
+from aiohttp import TCPConnector
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram import Bot
+from aiogram import __version__ as aiogram_version
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from apps.bot.middlewares.metrics import MetricsRequestMiddleware
+from apps.bot.middlewares.ratelimit import RateLimitRequestMiddleware
+from apps.bot.middlewares.ratelimit import RetryAfterRequestMiddleware
+from apps.bot.middlewares.tracing import TracingRequestMiddleware
+from apps.bot.utils.logging import logger
+from src.settings.config.configs import config
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """
+    Aiogram session that builds its own connection pool.
+
+    ``AiohttpSession`` takes the pool size and caches DNS for an hour, but
+    has no argument for the keep-alive timeout, so this session creates the
+    ``aiohttp.ClientSession`` itself with a :class:`aiohttp.TCPConnector`
+    configured the same way plus ``keepalive_timeout``. Requests go through
+    :meth:`create_session` as usual. ``ssl`` is passed to the connector and
+    may be replaced before first use, e.g. with ``False`` for a test server.
+    """
+
+    def __init__(self, limit: int, keepalive_timeout: float, **kwargs: Any) -> None:
+        """
+        :param limit: Maximum number of simultaneous connections.
+        :type limit: int
+        :param keepalive_timeout: Seconds an idle connection is kept open.
+        :type keepalive_timeout: float
+        :param kwargs: Arguments of ``AiohttpSession``, e.g. ``api``.
+        """
+        super().__init__(limit=limit, **kwargs)
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.ssl: Any = ssl.create_default_context(cafile=certifi.where())
+        self._client: Optional[ClientSession] = None
+
+    async def create_session(self) -> ClientSession:
+        """
+        Return the pooled client session, creating it on first use.
+
+        :return: Client session bound to the running event loop.
+        :rtype: aiohttp.ClientSession
+        """
+        if self._client is None or self._client.closed:
+            self._client = ClientSession(
+                connector=TCPConnector(
+                    ssl=self.ssl,
+                    limit=self.limit,
+                    ttl_dns_cache=3600,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{aiogram_version}"},
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """
+        Close the pooled client session, if open.
+
+        :return: None
+        :rtype: None
+        """
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+            # Let the underlying TLS connections shut down, as aiogram does.
+            await asyncio.sleep(0.25)
+
+
+def create_session(limit: int = config.TELEGRAM_POOL_SIZE, rate_limited: bool = True) -> PooledAiohttpSession:
+    """
+    Create an aiogram session tuned for sending many messages.
+
+    All Bot API calls go to a single host, so the whole pool may be used for
+    it; idle connections are kept alive long enough to be reused between
+    bursts, which saves the TCP and TLS handshakes, and DNS answers are
+    cached. ``config.TELEGRAM_API_URL`` points the session at a local Bot API
+    server (or a test double) instead of ``api.telegram.org``.
+
+    Calls are paced by the shared :class:`RateLimitRequestMiddleware`, so
+    every process sending through such a session stays within one budget,
+    and ``429`` answers are retried by :class:`RetryAfterRequestMiddleware`
+    for every bot method. :class:`MetricsRequestMiddleware`, registered last
+    and so closest to the network, records the latency and result of every
+    call. With ``TRACE_UPDATES`` on, :class:`TracingRequestMiddleware` goes
+    first and records each call in the trace of the current update.
+
+    :param limit: Maximum number of simultaneous connections.
+    :type limit: int
+    :param rate_limited: Whether to register the rate limit and retry middlewares.
+    :type rate_limited: bool
+    :return: New session; the underlying ``aiohttp.ClientSession`` is created
+        on first use in the running event loop.
+    :rtype: PooledAiohttpSession
+    """
+    kwargs: dict[str, Any] = {}
+    if config.TELEGRAM_API_URL:
+        kwargs["api"] = TelegramAPIServer.from_base(config.TELEGRAM_API_URL)
+
+    session = PooledAiohttpSession(limit, config.TELEGRAM_KEEPALIVE_TIMEOUT, **kwargs)
+    if config.TRACE_UPDATES:
+        session.middleware(TracingRequestMiddleware())
+    if rate_limited:
+        session.middleware(RetryAfterRequestMiddleware())
+        session.middleware(RateLimitRequestMiddleware())
+    session.middleware(MetricsRequestMiddleware())
+    return session
+
+
+def session_stats(session: BaseSession) -> dict[str, Any]:
+    """
+    Collect the counters of the request middlewares registered on ``session``.
+
+    :param session: Bot session, usually ``bot.session``.
+    :type session: aiogram.client.session.base.BaseSession
+    :return: Throttled and retried call counters.
+    :rtype: dict[str, Any]
+    """
+    stats: dict[str, Any] = {}
+    for middleware in session.middleware:
+        if hasattr(middleware, "stats"):
+            stats.update(middleware.stats())
+    return stats
+
+
+_worker = threading.local()
+
+
+def _worker_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_worker, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _worker.loop = loop
+    return loop
+
+
+def run_in_worker_loop(coro: Coroutine) -> Any:
+    """
+    Run ``coro`` to completion on the calling thread's persistent event loop.
+
+    Unlike ``asyncio.run``, the loop survives between calls, so connections
+    opened by :func:`get_worker_bot` during one Celery task are reused by the
+    next one executed by the same worker thread.
+
+    :param coro: Coroutine to run.
+    :type coro: Coroutine
+    :return: Result of the coroutine.
+    :rtype: Any
+    """
+    return _worker_loop().run_until_complete(coro)
+
+
+def get_worker_bot() -> Bot:
+    """
+    Return the calling thread's shared bot, bound to its worker loop.
+
+    Only use it from coroutines run by :func:`run_in_worker_loop`; never
+    close its session there, it is closed by :func:`close_worker_client`.
+
+    :return: Bot with a pooled :func:`create_session` session.
+    :rtype: aiogram.Bot
+    """
+    bot = getattr(_worker, "bot", None)
+    if bot is None:
+        bot = Bot(config.BOT_TOKEN, session=create_session())
+        _worker.bot = bot
+    return bot
+
+
+def close_worker_client() -> None:
+    """
+    Close the calling thread's shared bot session and worker loop.
+
+    :return: None
+    :rtype: None
+    """
+    loop = getattr(_worker, "loop", None)
+    bot = getattr(_worker, "bot", None)
+    _worker.bot = None
+    _worker.loop = None
+    if loop is None or loop.is_closed():
+        return
+
+    try:
+        if bot is not None:
+            loop.run_until_complete(bot.session.close())
+    except Exception:
+        logger.exception("Failed to close the Telegram worker session.")
+    finally:
+        loop.close()
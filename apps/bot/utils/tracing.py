@@ -0,0 +1,179 @@
+import time
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from contextvars import ContextVar
+from contextlib import contextmanager
+from dataclasses import field
+from dataclasses import dataclass
+
+
+MAX_SPANS = 500
+
+
+@dataclass
+class Span:
+    """
+    Timed step of an update: the dispatch, a handler, a database query,
+    a Bot API call.
+    """
+
+    kind: str
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    duration: Optional[float] = None
+    children: list["Span"] = field(default_factory=list)
+    trace: Optional["Trace"] = field(default=None, repr=False)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    @property
+    def elapsed(self) -> float:
+        """
+        :return: Duration in seconds, or the time since start if still open.
+        :rtype: float
+        """
+        if self.duration is not None:
+            return self.duration
+        return time.perf_counter() - self.started
+
+    def format(self, depth: int = 0) -> list[str]:
+        """
+        :param depth: Indentation level.
+        :type depth: int
+        :return: One line per span of the subtree, children indented.
+        :rtype: list[str]
+        """
+        label = f"{self.kind} {self.name}" if self.name else self.kind
+        lines = [f"{'  ' * depth}{label} {self.elapsed * 1000:.1f} ms"]
+        for child in list(self.children):
+            lines.extend(child.format(depth + 1))
+        return lines
+
+
+class Trace:
+    """
+    Span tree recorded for one update.
+
+    Spans are opened with :func:`span`; those of the ORM threads reach the
+    tree because ``sync_to_async`` copies the context holding the current
+    span. At most ``max_spans`` spans are kept, so a handler looping over
+    thousands of queries does not hold them all in memory.
+    """
+
+    def __init__(self, name: str, max_spans: int = MAX_SPANS) -> None:
+        """
+        :param name: Name of the root span, e.g. ``update 42``.
+        :type name: str
+        :param max_spans: Maximum number of spans kept.
+        :type max_spans: int
+        """
+        self.root = Span("update", name, trace=self)
+        self.max_spans = max_spans
+        self.spans = 1
+        self.dropped = 0
+
+    def breakdown(self) -> dict[str, float]:
+        """
+        Total seconds spent per span kind (``db``, ``api``, ...), not
+        counting spans nested in a span of the same kind twice.
+
+        :return: Seconds by kind, the root included as ``update``.
+        :rtype: dict[str, float]
+        """
+        totals: dict[str, float] = {}
+
+        def visit(node: Span, outer: frozenset) -> None:
+            if node.kind not in outer:
+                totals[node.kind] = totals.get(node.kind, 0.0) + node.elapsed
+            for child in list(node.children):
+                visit(child, outer | {node.kind})
+
+        visit(self.root, frozenset())
+        return {kind: round(seconds, 4) for kind, seconds in totals.items()}
+
+    def format(self) -> str:
+        """
+        :return: Indented span tree, one span per line.
+        :rtype: str
+        """
+        lines = self.root.format()
+        if self.dropped:
+            lines.append(f"... {self.dropped} more spans dropped")
+        return "\n".join(lines)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def start_trace(name: str, max_spans: int = MAX_SPANS) -> Iterator[Trace]:
+    """
+    Record a trace of the block; spans opened inside it become its children.
+
+    :param name: Name of the root span.
+    :type name: str
+    :param max_spans: Maximum number of spans kept.
+    :type max_spans: int
+    :return: Context manager yielding the trace.
+    :rtype: Iterator[Trace]
+    """
+    trace = Trace(name, max_spans)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str = "") -> Iterator[Optional[Span]]:
+    """
+    Time the block as a child of the current span.
+
+    Outside a traced update this only reads a context variable, so
+    instrumented code paths cost next to nothing while tracing is off.
+
+    :param kind: Span kind used for the breakdown, e.g. ``db`` or ``api``.
+    :type kind: str
+    :param name: Span detail, e.g. the SQL statement or Bot API method.
+    :type name: str
+    :return: Context manager yielding the span, or ``None`` when not tracing.
+    :rtype: Iterator[Optional[Span]]
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    trace = parent.trace
+    if trace.spans >= trace.max_spans:
+        trace.dropped += 1
+        yield None
+        return
+
+    trace.spans += 1
+    child = Span(kind, name, trace=trace)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def trace_queries(execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+    """
+    Database execute wrapper recording each query of a traced update as a
+    ``db`` span.
+
+    Installed on every connection by :mod:`apps.bot.signals.tracing`.
+    """
+    if _current_span.get() is None:
+        return execute(sql, params, many, context)
+    with span("db", " ".join(sql.split())[:80]):
+        return execute(sql, params, many, context)
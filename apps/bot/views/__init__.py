@@ -1 +1,2 @@
+from .metrics import * # noqa
 from .webhook import * # noqa
@@ -0,0 +1,38 @@
+from typing import Any
+
+from django.views import View
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponse
+
+from apps.bot.utils.metrics import registry
+from apps.bot.utils.metrics import CONTENT_TYPE
+from src.settings.config.configs import config
+
+
+class MetricsView(View):
+    """
+    Exposes the metrics of the web process in the Prometheus text format.
+
+    Values live in the process that recorded them, so the endpoint is only
+    served with ``WEB_METRICS=True``, which is the default only with a single
+    worker (``WEB_CONCURRENCY``); web startup fails when it is turned on
+    for several workers. The endpoint
+    is meant for the internal network; nginx does not proxy it.
+    """
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        """
+        Handles GET requests from the metrics scraper.
+
+        :param request: Django HTTP GET request.
+        :type request: django.http.HttpRequest
+        :param args: Additional positional arguments.
+        :param kwargs: Additional keyword arguments.
+        :return: Current metrics.
+        :rtype: django.http.HttpResponse
+        :raises Http404: If ``WEB_METRICS`` is off.
+        """
+        if not config.WEB_METRICS:
+            raise Http404
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -1,10 +1,10 @@
-import json
+import time
 from hmac import compare_digest
 
 from typing import Any
 
 from aiogram import types
-from asgiref.sync import async_to_sync
+from pydantic import ValidationError
 
 from django.views import View
 from django.http import HttpRequest
@@ -12,8 +12,11 @@ from django.http import HttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 
-from apps.bot.instance import bot, dp
+from apps.bot.instance import bot, dp, update_queue
+from apps.bot.middlewares.db import request_orm_context
 from apps.bot.utils.logging import logger
+from apps.bot.utils.metrics import webhook_duration
+from apps.bot.utils.metrics import webhook_requests
 from src.settings.config.configs import config
 
 
@@ -24,9 +27,28 @@ class TelegramWebhookView(View):
 
     This Django class-based view receives webhook updates from Telegram
     and passes them to the Aiogram dispatcher for asynchronous processing.
+
+    Both handlers are coroutines, so under ASGI the update is awaited directly
+    on the server event loop instead of holding a worker thread and spinning
+    up a nested event loop per request.
+
+    With ``WEBHOOK_FAST_ACK`` enabled the update is handed to the background
+    update queue and acknowledged right away; a full queue answers 503 so
+    Telegram retries the delivery later.
+
+    The raw body is validated by pydantic's JSON parser in one pass, without
+    an intermediate ``dict``, and with the bot in the validation context, so
+    the dispatcher does not have to re-mount the update on it. Bodies larger
+    than ``WEBHOOK_MAX_BODY_SIZE`` are rejected with 413. Under ASGI Django
+    has buffered the body before the view runs, so ``src.asgi`` enforces the
+    limit while reading it and nginx's ``client_max_body_size`` caps it at the
+    edge; the check here covers other servers.
+
+    Every request is counted by status code and timed in the
+    ``bot_webhook_*`` metrics.
     """
 
-    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+    async def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         """
         Handles POST requests sent by Telegram's webhook.
 
@@ -34,7 +56,23 @@ class TelegramWebhookView(View):
         :type request: django.http.HttpRequest
         :param args: Additional positional arguments.
         :param kwargs: Additional keyword arguments.
-        :return: HTTP 200 on success, 500 on failure.
+        :return: HTTP 200 on success, 400 for invalid JSON, 413 for an
+            oversized body, 503 when the update queue is full, 500 on failure.
+        :rtype: django.http.HttpResponse
+        """
+        started = time.perf_counter()
+        response = await self.handle_update(request)
+        webhook_duration.observe(time.perf_counter() - started)
+        webhook_requests.labels(response.status_code).inc()
+        return response
+
+    async def handle_update(self, request: HttpRequest) -> HttpResponse:
+        """
+        Check, parse and dispatch (or enqueue) the update of a webhook request.
+
+        :param request: Django HTTP request containing the webhook payload.
+        :type request: django.http.HttpRequest
+        :return: Response to send back to Telegram.
         :rtype: django.http.HttpResponse
         """
         if config.TELEGRAM_WEBHOOK_SECRET:
@@ -47,20 +85,41 @@ class TelegramWebhookView(View):
                 return HttpResponse(status=403)
 
         try:
-            data: dict[str, Any] = json.loads(request.body)
-        except json.JSONDecodeError:
-            logger.warning("Rejected webhook request with invalid JSON payload.")
-            return HttpResponse(status=400)
+            content_length = int(request.headers.get("Content-Length") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > config.WEBHOOK_MAX_BODY_SIZE:
+            logger.warning("Rejected webhook request with a %s byte body.", content_length)
+            return HttpResponse(status=413)
+
+        body = request.body
+        if len(body) > config.WEBHOOK_MAX_BODY_SIZE:
+            logger.warning("Rejected webhook request with a %s byte body.", len(body))
+            return HttpResponse(status=413)
+
+        try:
+            update: types.Update = types.Update.model_validate_json(body, context={"bot": bot})
+        except ValidationError as exc:
+            if any(error["type"] == "json_invalid" for error in exc.errors()):
+                logger.warning("Rejected webhook request with invalid JSON payload.")
+                return HttpResponse(status=400)
+            logger.exception("Webhook processing failed.")
+            return HttpResponse(status=500)
 
         try:
-            update: types.Update = types.Update.model_validate(data)
-            async_to_sync(dp.feed_update)(bot, update)
+            if config.WEBHOOK_FAST_ACK:
+                if not await update_queue.put(update):
+                    return HttpResponse(status=503)
+                return HttpResponse(status=200)
+
+            with request_orm_context():
+                await dp.feed_update(bot, update)
             return HttpResponse(status=200)
         except Exception:
             logger.exception("Webhook processing failed.")
             return HttpResponse(status=500)
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         """
         Handles GET requests (used for webhook health checks).
 
@@ -0,0 +1,6 @@
+"""
+Standalone performance benchmarks.
+
+Every module is runnable with ``python -m benchmarks.<name>`` from the
+project root and uses the same environment variables as ``manage.py``.
+"""
@@ -0,0 +1,152 @@
+"""
+Compare the two broadcast backends against the local fake Bot API.
+
+- ``celery``: what ``send_hi_to_all_users`` does with ``BROADCAST_BACKEND=celery``.
+  Recipients are planned into ``--chunk-size`` keyset chunks, and
+  ``--workers`` threads (the broadcast worker's thread pool) each send
+  chunks the way ``send_broadcast_chunk`` does: on the thread's own event
+  loop and pooled worker bot session, ``BROADCAST_CONCURRENCY`` sends at a
+  time per thread. Broker round trips, the chord and the Redis checkpoints
+  are not included, so this is a lower bound on the Celery path's cost.
+- ``bot``: the job that ``send_hi_to_all_users`` queues with
+  ``BROADCAST_BACKEND=bot``, run by
+  :class:`apps.bot.services.broadcast_queue.BroadcastQueue` on this
+  process's event loop and the bot's own session, ``--concurrency`` sends
+  at a time (by default as many as all Celery threads together).
+
+Both send to the same ``--recipients`` users. Every row reports messages/sec,
+p50/p99 ``sendMessage`` round trip, ``429`` answers, the TCP connections the
+fake server saw, the threads used and the process's peak RSS. The shared
+rate limiter is replaced by an in-memory one (``--rate-limit``, ``0``:
+unlimited), as in ``benchmarks/load.py``.
+
+Both paths message every recipient in the database, so run it against an
+empty migrated database; the users it creates are deleted afterwards.
+
+Usage:
+    python -m benchmarks.broadcast_paths --recipients 5000 --latency-ms 30
+    python -m benchmarks.broadcast_paths --recipients 20000 --workers 8 --chunk-size 1000
+"""
+import time
+import asyncio
+import argparse
+import resource
+import threading
+from typing import Any
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import print_table
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+from benchmarks.fake_bot_api import FakeBotAPI
+
+setup_django()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+
+from apps.bot.instance import bot  # noqa: E402
+from apps.bot.models.users import Users  # noqa: E402
+from apps.bot.services.broadcast_queue import BroadcastQueue  # noqa: E402
+from apps.bot.tasks.notify import broadcast_text  # noqa: E402
+from apps.bot.tasks.notify import plan_chat_id_chunks  # noqa: E402
+from apps.bot.utils.telegram import get_worker_bot  # noqa: E402
+from apps.bot.utils.telegram import run_in_worker_loop  # noqa: E402
+from apps.bot.utils.telegram import close_worker_client  # noqa: E402
+from benchmarks.load import cleanup  # noqa: E402
+from benchmarks.load import point_at  # noqa: E402
+from benchmarks.load import create_users  # noqa: E402
+from benchmarks.load import TimingRequestMiddleware  # noqa: E402
+from src.settings.config.configs import config  # noqa: E402
+
+
+PATHS = ("celery", "bot")
+
+
+def run_celery(args: argparse.Namespace, timing: TimingRequestMiddleware) -> dict[str, Any]:
+    started = time.perf_counter()
+    chunks = plan_chat_id_chunks(args.chunk_size)
+    timed = threading.local()
+
+    def send_chunk(lower: Optional[int], upper: Optional[int]) -> dict[str, Any]:
+        if not getattr(timed, "done", False):
+            get_worker_bot().session.middleware(timing)
+            timed.done = True
+        return run_in_worker_loop(broadcast_text(args.text, lower, upper)).as_dict()
+
+    barrier = threading.Barrier(args.workers)
+
+    def close() -> None:
+        barrier.wait()
+        close_worker_client()
+
+    with ThreadPoolExecutor(args.workers) as pool:
+        reports = list(pool.map(lambda chunk: send_chunk(*chunk), chunks))
+        elapsed = time.perf_counter() - started
+        list(pool.map(lambda _: close(), range(args.workers)))
+
+    return summarize(
+        "celery",
+        timing.latencies,
+        elapsed,
+        errors=sum(report["failed"] for report in reports),
+        chunks=len(chunks),
+        threads=args.workers,
+    )
+
+
+async def run_bot(args: argparse.Namespace, timing: TimingRequestMiddleware) -> dict[str, Any]:
+    bot.session.middleware(timing)
+    queue = BroadcastQueue(concurrency=args.concurrency or args.workers * config.BROADCAST_CONCURRENCY)
+    started = time.perf_counter()
+    result = await queue.run_job(bot, {"kind": "text", "text": args.text, "lock": None})
+    elapsed = time.perf_counter() - started
+    return summarize("bot", timing.latencies, elapsed, errors=result["failed"], chunks=1, threads=1)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if await Users.objects.recipients().aexists():
+        raise SystemExit("Both paths message every recipient; run against an empty database.")
+
+    server = FakeBotAPI(
+        latency_ms=args.latency_ms,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+    ).start()
+    point_at(server, args.rate_limit)
+    await sync_to_async(create_users)(args.base_chat_id, args.recipients)
+
+    rows = []
+    try:
+        for name in args.path or PATHS:
+            server.reset()
+            timing = TimingRequestMiddleware()
+            if name == "celery":
+                row = await asyncio.to_thread(run_celery, args, timing)
+            else:
+                row = await run_bot(args, timing)
+            row["floods"] = server.floods
+            row["connections"] = len(server.connections)
+            row["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            rows.append(row)
+    finally:
+        await sync_to_async(cleanup)(args.base_chat_id, args.recipients)
+        await bot.session.close()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", choices=PATHS, action="append")
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--concurrency", type=int, default=0)
+    parser.add_argument("--text", default="Hi 👋")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--base-chat-id", type=int, default=8_000_000_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+import os
+import asyncio
+import statistics
+from typing import Any
+from typing import Iterable
+
+
+def setup_django() -> None:
+    """
+    Configure Django so benchmarks can import project modules.
+
+    :return: None
+    :rtype: None
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
+
+    import django
+
+    django.setup()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Return the ``pct`` percentile of ``samples`` using nearest-rank.
+
+    :param samples: Measured values.
+    :type samples: list[float]
+    :param pct: Percentile in the ``0..100`` range.
+    :type pct: float
+    :return: The percentile value, or ``0.0`` for an empty sample set.
+    :rtype: float
+    """
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list[float], elapsed: float, **extra: Any) -> dict[str, Any]:
+    """
+    Build a result row from per-operation latencies (in seconds).
+
+    :param name: Scenario name.
+    :type name: str
+    :param latencies: Per-operation latencies in seconds.
+    :type latencies: list[float]
+    :param elapsed: Wall-clock duration of the whole run in seconds.
+    :type elapsed: float
+    :return: Result row with throughput and latency percentiles in milliseconds.
+    :rtype: dict[str, Any]
+    """
+    return {
+        "scenario": name,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        **extra,
+    }
+
+
+def print_table(rows: Iterable[dict[str, Any]]) -> None:
+    """
+    Print result rows as an aligned plain-text table.
+
+    :param rows: Result rows sharing the same keys.
+    :type rows: Iterable[dict[str, Any]]
+    :return: None
+    :rtype: None
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    columns = list(rows[0].keys())
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
+
+
+async def run_concurrently(
+    operation: Any,
+    total: int,
+    concurrency: int,
+) -> tuple[list[float], float]:
+    """
+    Run ``operation(index)`` ``total`` times with at most ``concurrency`` in flight.
+
+    :param operation: Coroutine function receiving the operation index.
+    :type operation: Callable[[int], Awaitable[Any]]
+    :param total: Number of operations.
+    :type total: int
+    :param concurrency: Maximum number of concurrent operations.
+    :type concurrency: int
+    :return: Per-operation latencies and total elapsed time, in seconds.
+    :rtype: tuple[list[float], float]
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def timed(index: int) -> None:
+        async with semaphore:
+            started = loop.time()
+            await operation(index)
+            latencies.append(loop.time() - started)
+
+    started = loop.time()
+    await asyncio.gather(*(timed(index) for index in range(total)))
+    return latencies, loop.time() - started
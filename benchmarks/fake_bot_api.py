@@ -0,0 +1,253 @@
+"""
+Local stand-in for the Telegram Bot API, for benchmarks and load tests.
+
+The server answers ``getMe``, ``sendMessage``, ``setWebhook``,
+``deleteWebhook``, ``getWebhookInfo`` and ``getUpdates`` (serving the
+updates queued with :meth:`FakeBotAPI.push_updates`) for any bot token. It
+can add ``--latency-ms`` to every answer and answer a ``--flood-rate``
+fraction of ``sendMessage`` calls with ``429`` and ``retry_after``. It counts
+calls per method, TCP connections and the delay between handing an update
+out through ``getUpdates`` and receiving the reply to its chat.
+
+The benchmarks start it in-process on a background thread. To point a real
+bot process or Celery worker at it, run it on its own and set
+``TELEGRAM_API_URL`` (read by :func:`apps.bot.utils.telegram.create_session`,
+so it covers ``instance.bot`` and the ``tasks/notify.py`` worker bots):
+
+    python -m benchmarks.fake_bot_api --port 8081 --latency-ms 30 --flood-rate 0.01
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python manage.py run_bot
+"""
+import ssl
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Any
+from pathlib import Path
+from collections import Counter
+
+from aiohttp import web
+
+
+class FakeBotAPI:
+    """
+    Minimal Bot API server running on its own thread and event loop.
+    """
+
+    def __init__(
+        self,
+        tls: bool = False,
+        latency_ms: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        port: int = 0,
+    ) -> None:
+        """
+        :param tls: Serve HTTPS with a throwaway self-signed certificate (needs ``openssl``).
+        :type tls: bool
+        :param latency_ms: Delay added to every answer.
+        :type latency_ms: float
+        :param flood_rate: Fraction of ``sendMessage`` calls answered with ``429``.
+        :type flood_rate: float
+        :param retry_after: ``retry_after`` seconds of the ``429`` answers.
+        :type retry_after: int
+        :param port: Port to listen on; ``0`` picks a free one.
+        :type port: int
+        """
+        self.tls = tls
+        self.latency = latency_ms / 1000
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.port = port
+        self.connections: set[Any] = set()
+        self.calls: Counter = Counter()
+        self.floods = 0
+        self.webhook_url = ""
+        self.reply_latencies: list[float] = []
+        self._updates: list[dict[str, Any]] = []
+        self._delivered_at: dict[int, float] = {}
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{self.port}"
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        cert = Path(self._tmpdir.name) / "cert.pem"
+        key = Path(self._tmpdir.name) / "key.pem"
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", str(key), "-out", str(cert), "-days", "1", "-subj", "/CN=127.0.0.1",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        return context
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        return dict(await request.post())
+
+    def _send_message(self, data: dict[str, Any]) -> web.Response:
+        if self.flood_rate and random.random() < self.flood_rate:
+            self.floods += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                },
+                status=429,
+            )
+
+        chat_id = int(data["chat_id"])
+        delivered_at = self._delivered_at.pop(chat_id, None)
+        if delivered_at is not None:
+            self.reply_latencies.append(time.perf_counter() - delivered_at)
+        return self._ok({
+            "message_id": 1,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": data.get("text", ""),
+        })
+
+    async def _get_updates(self, data: dict[str, Any]) -> web.Response:
+        offset = int(data.get("offset") or 0)
+        limit = int(data.get("limit") or 100)
+        timeout = min(float(data.get("timeout") or 0), 0.5)
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates and timeout:
+            await asyncio.sleep(timeout)
+
+        batch = self._updates[:limit]
+        now = time.perf_counter()
+        for update in batch:
+            self._delivered_at.setdefault(update["message"]["chat"]["id"], now)
+        return self._ok(batch)
+
+    @staticmethod
+    def _ok(result: Any) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        data = await self._params(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "sendMessage":
+            return self._send_message(data)
+        if method == "getUpdates":
+            return await self._get_updates(data)
+        if method == "getMe":
+            return self._ok({"id": 123456, "is_bot": True, "first_name": "Fake", "username": "fake"})
+        if method == "setWebhook":
+            self.webhook_url = data.get("url", "")
+            return self._ok(True)
+        if method == "deleteWebhook":
+            self.webhook_url = ""
+            return self._ok(True)
+        if method == "getWebhookInfo":
+            return self._ok({
+                "url": self.webhook_url,
+                "has_custom_certificate": False,
+                "pending_update_count": 0,
+            })
+        return web.json_response(
+            {"ok": False, "error_code": 404, "description": f"Not Found: method {method} not faked"},
+            status=404,
+        )
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        return app
+
+    async def _serve(self) -> None:
+        runner = web.AppRunner(self.build_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(
+            runner,
+            "127.0.0.1",
+            self.port,
+            ssl_context=self._ssl_context() if self.tls else None,
+            backlog=1024,
+        )
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+    def start(self) -> "FakeBotAPI":
+        def run() -> None:
+            self._loop.run_until_complete(self._serve())
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def push_updates(self, updates: list[dict[str, Any]]) -> None:
+        """
+        Queue updates for ``getUpdates``; thread-safe.
+
+        :param updates: Update payloads with increasing ``update_id``.
+        :type updates: list[dict[str, Any]]
+        :return: None
+        :rtype: None
+        """
+        self._loop.call_soon_threadsafe(self._updates.extend, updates)
+
+    def reset(self) -> None:
+        self.connections = set()
+        self.calls = Counter()
+        self.floods = 0
+        self.reply_latencies = []
+        self._delivered_at = {}
+
+    def stats(self) -> dict[str, Any]:
+        """
+        :return: Calls per method, ``429`` answers and TCP connections so far.
+        :rtype: dict[str, Any]
+        """
+        return {"calls": dict(self.calls), "floods": self.floods, "connections": len(self.connections)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeBotAPI(
+        latency_ms=args.latency_ms,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+        port=args.port,
+    ).start()
+    print(f"Fake Bot API on {server.base_url}; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(10)
+            print(server.stats())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
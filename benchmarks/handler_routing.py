@@ -0,0 +1,123 @@
+"""
+Compare routing text messages through one router per command with the
+:class:`~apps.bot.utils.routing.TextCommandIndex` used by the handlers.
+
+For every ``--commands`` size a dispatcher is built both ways:
+
+- ``linear``: the previous layout, one router per command, each with its own
+  ``F.text.lower() == "..."`` filter, tried in turn;
+- ``index``: a single router looking the normalized text up in a dict.
+
+Each dispatcher is fed ``--updates`` text messages through
+``Dispatcher.feed_update``, alternating the first command, the last command
+and an unknown text, with updates already bound to the bot as the webhook
+view builds them.
+
+Usage:
+    python -m benchmarks.handler_routing --updates 5000 --commands 4 50 200
+"""
+import time
+import asyncio
+import logging
+import argparse
+from typing import Any
+
+from benchmarks.common import print_table
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+
+setup_django()
+
+from aiogram import F  # noqa: E402
+from aiogram import Bot  # noqa: E402
+from aiogram import Router  # noqa: E402
+from aiogram import Dispatcher  # noqa: E402
+from aiogram import types  # noqa: E402
+
+from apps.bot.utils.routing import TextCommandIndex  # noqa: E402
+from apps.bot.utils.telegram import create_session  # noqa: E402
+
+
+async def handle(message: types.Message) -> None:
+    return None
+
+
+def command_names(count: int) -> list[str]:
+    return [f"Command {i}" for i in range(count)]
+
+
+def linear_dispatcher(count: int) -> Dispatcher:
+    dp = Dispatcher()
+    for name in command_names(count):
+        router = Router(name=name)
+        router.message.register(handle, F.text.lower() == name.lower())
+        dp.include_router(router)
+    return dp
+
+
+def index_dispatcher(count: int) -> Dispatcher:
+    index = TextCommandIndex(name=f"bench_{count}")
+    for name in command_names(count):
+        index.register(handle, name)
+    dp = Dispatcher()
+    dp.include_router(index.router)
+    return dp
+
+
+def make_updates(bot: Bot, count: int, total: int) -> list[types.Update]:
+    names = command_names(count)
+    texts = [names[0].upper(), names[-1], "something else"]
+    return [
+        types.Update.model_validate(
+            {
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": 1700000000,
+                    "chat": {"id": 1000 + update_id % 50, "type": "private"},
+                    "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "Bench"},
+                    "text": texts[update_id % len(texts)],
+                },
+            },
+            context={"bot": bot},
+        )
+        for update_id in range(total)
+    ]
+
+
+async def run_scenario(name: str, dp: Dispatcher, bot: Bot, updates: list[types.Update], **extra: Any) -> dict[str, Any]:
+    for update in updates[:3]:
+        await dp.feed_update(bot, update)
+
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for update in updates:
+        fed_at = time.perf_counter()
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter() - fed_at)
+    elapsed = time.perf_counter() - started
+    return summarize(name, latencies, elapsed, **extra)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--commands", type=int, nargs="+", default=[4, 50, 200])
+    args = parser.parse_args()
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+
+    bot = Bot("123456:benchmark", session=create_session(rate_limited=False))
+    rows = []
+    try:
+        for count in args.commands:
+            updates = make_updates(bot, count, args.updates)
+            rows.append(await run_scenario("linear", linear_dispatcher(count), bot, updates, commands=count))
+            rows.append(await run_scenario("index", index_dispatcher(count), bot, updates, commands=count))
+    finally:
+        await bot.session.close()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
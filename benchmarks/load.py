@@ -0,0 +1,253 @@
+"""
+Load-test the bot end to end against the local fake Bot API.
+
+Everything the bot sends goes to :class:`benchmarks.fake_bot_api.FakeBotAPI`
+instead of ``api.telegram.org``: ``instance.bot``'s session and the worker
+bots of ``tasks/notify.py`` (through ``config.TELEGRAM_API_URL``). The
+scenarios are:
+
+- ``webhook``: ``--updates`` synthetic ``/start`` updates (one new user
+  each) POSTed at ``/bot/webhook/`` through Django's ASGI handler, with
+  ``--concurrency`` requests in flight; the handlers run for real (user
+  upsert, reply). Latency is the webhook response time.
+- ``polling``: the same kind of updates handed out by the fake server's
+  ``getUpdates`` to ``dp.start_polling``. Latency runs from handing an
+  update out to receiving the reply to its chat.
+- ``broadcast``: ``--recipients`` users are created and messaged through
+  ``tasks.notify.broadcast_to``. Latency is per ``sendMessage`` round trip.
+
+``--latency-ms``, ``--flood-rate`` and ``--retry-after`` shape the fake
+server's answers. The shared rate limiter is replaced by an in-memory one
+allowing ``--rate-limit`` calls per second (``0``: unlimited), so the
+numbers measure the bot rather than Telegram's limits. Every row reports
+throughput, p50/p99 latency, errors, ``429`` answers and the process's peak
+RSS (and, with ``--trace-memory``, the peak of Python allocations during
+the scenario, which slows the run down).
+
+Run it against a migrated database (PostgreSQL for representative numbers);
+users created by the run (chat IDs from ``--base-chat-id``) are deleted
+afterwards.
+
+Usage:
+    python -m benchmarks.load --updates 2000 --concurrency 100 --recipients 5000 --latency-ms 30
+    python -m benchmarks.load --scenario polling --flood-rate 0.01
+"""
+import time
+import asyncio
+import argparse
+import resource
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Awaitable
+
+from benchmarks.common import print_table
+from benchmarks.common import run_concurrently
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+from benchmarks.fake_bot_api import FakeBotAPI
+
+setup_django()
+
+import json  # noqa: E402
+
+from aiogram import Bot  # noqa: E402
+from aiogram.methods import Response  # noqa: E402
+from aiogram.methods import TelegramMethod  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+from apps.bot.instance import bot  # noqa: E402
+from apps.bot.instance import dp  # noqa: E402
+from apps.bot.instance import check_storage  # noqa: E402
+from apps.bot.models.users import Users  # noqa: E402
+from apps.bot.services.delivery import DeliveryRecorder  # noqa: E402
+from apps.bot.tasks.notify import broadcast_to  # noqa: E402
+from apps.bot.tasks.notify import iter_recipient_chat_ids  # noqa: E402
+from apps.bot.utils.ratelimit import get_rate_limiter  # noqa: E402
+from apps.bot.utils.telegram import get_worker_bot  # noqa: E402
+from benchmarks.webhook_view import post_asgi  # noqa: E402
+from src.settings.config.configs import config  # noqa: E402
+
+
+SCENARIOS = ("webhook", "polling", "broadcast")
+
+
+def point_at(server: FakeBotAPI, rate_limit: float) -> None:
+    """
+    Send every Bot API call of this process to ``server``, paced by an
+    in-memory limiter of ``rate_limit`` calls per second (``0``: unlimited).
+    """
+    config.TELEGRAM_API_URL = server.base_url
+    bot.session.api = TelegramAPIServer.from_base(server.base_url)
+
+    config.RATE_LIMIT_BACKEND = "memory"
+    config.TELEGRAM_RATE_LIMIT = rate_limit or 1e9
+    config.TELEGRAM_RATE_BURST = max(1, int(config.TELEGRAM_RATE_LIMIT))
+    get_rate_limiter.cache_clear()
+    for middleware in bot.session.middleware:
+        if hasattr(middleware, "limiter"):
+            middleware.limiter = get_rate_limiter()
+
+
+def build_update(update_id: int, chat_id: int, text: str) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load", "username": "load"},
+            "text": text,
+        },
+    }
+
+
+def cleanup(first_chat_id: int, count: int) -> None:
+    Users.objects.filter(chat_id__gte=first_chat_id, chat_id__lt=first_chat_id + count).delete()
+
+
+def create_users(first_chat_id: int, count: int) -> None:
+    Users.objects.bulk_create(
+        Users(chat_id=first_chat_id + index, first_name="Load")
+        for index in range(count)
+    )
+
+
+class TimingRequestMiddleware:
+    """
+    Session middleware collecting the round trip of every Bot API call.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+
+    async def __call__(
+        self,
+        make_request: Callable[[Bot, TelegramMethod], Awaitable[Response]],
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+
+async def run_webhook(server: FakeBotAPI, args: argparse.Namespace, first_chat_id: int) -> dict[str, Any]:
+    application = get_asgi_application()
+    statuses: list[int] = []
+
+    async def operation(index: int) -> None:
+        body = json.dumps(build_update(first_chat_id + index, first_chat_id + index, args.text)).encode()
+        statuses.append(await post_asgi(application, "/bot/webhook/", body))
+
+    latencies, elapsed = await run_concurrently(operation, args.updates, args.concurrency)
+    return summarize(
+        "webhook",
+        latencies,
+        elapsed,
+        errors=sum(1 for status in statuses if status != 200),
+    )
+
+
+async def run_polling(server: FakeBotAPI, args: argparse.Namespace, first_chat_id: int) -> dict[str, Any]:
+    server.push_updates([
+        build_update(first_chat_id + index, first_chat_id + index, args.text)
+        for index in range(args.updates)
+    ])
+    started = time.perf_counter()
+    polling = asyncio.create_task(
+        dp.start_polling(bot, polling_timeout=1, handle_signals=False, close_bot_session=False),
+    )
+    deadline = started + args.timeout
+    while len(server.reply_latencies) < args.updates and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    await dp.stop_polling()
+    await polling
+    latencies = list(server.reply_latencies)
+    return summarize("polling", latencies, elapsed, errors=args.updates - len(latencies))
+
+
+async def run_broadcast(server: FakeBotAPI, args: argparse.Namespace, first_chat_id: int) -> dict[str, Any]:
+    await sync_to_async(create_users)(first_chat_id, args.recipients)
+    worker = get_worker_bot()
+    timing = TimingRequestMiddleware()
+    worker.session.middleware(timing)
+    try:
+        report = await broadcast_to(
+            "Load test",
+            iter_recipient_chat_ids(first_chat_id - 1, first_chat_id + args.recipients - 1),
+            DeliveryRecorder(),
+        )
+    finally:
+        await worker.session.close()
+    return summarize("broadcast", timing.latencies, report.elapsed, errors=report.failed)
+
+
+async def run(
+    name: str,
+    scenario: Callable[[FakeBotAPI, argparse.Namespace, int], Awaitable[dict[str, Any]]],
+    server: FakeBotAPI,
+    args: argparse.Namespace,
+    first_chat_id: int,
+) -> dict[str, Any]:
+    server.reset()
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        row = await scenario(server, args, first_chat_id)
+    finally:
+        count = max(args.updates, args.recipients)
+        await sync_to_async(cleanup)(first_chat_id, count)
+
+    row["api_calls"] = sum(server.calls.values())
+    row["floods"] = server.floods
+    row["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    if args.trace_memory:
+        row["alloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    return row
+
+
+async def main(args: argparse.Namespace) -> None:
+    server = FakeBotAPI(
+        latency_ms=args.latency_ms,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+    ).start()
+    point_at(server, args.rate_limit)
+    await check_storage()
+
+    scenarios = {"webhook": run_webhook, "polling": run_polling, "broadcast": run_broadcast}
+    span = max(args.updates, args.recipients)
+    rows = []
+    try:
+        for index, name in enumerate(args.scenario or SCENARIOS):
+            first_chat_id = args.base_chat_id + index * span
+            rows.append(await run(name, scenarios[name], server, args, first_chat_id))
+    finally:
+        await bot.session.close()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--base-chat-id", type=int, default=8_000_000_000)
+    parser.add_argument("--trace-memory", action="store_true")
+    asyncio.run(main(parser.parse_args()))
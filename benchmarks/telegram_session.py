@@ -0,0 +1,159 @@
+"""
+Measure connection setup cost per Telegram message for the HTTP clients used
+to send messages.
+
+A local fake Bot API server (:mod:`benchmarks.fake_bot_api`) answers
+``sendMessage`` and counts the TCP connections it accepts. The scenarios are:
+
+- ``requests.post``: no session, a new connection per message;
+- ``requests session``: the module-level ``requests.Session`` the Celery
+  tasks used before (urllib3 pool of 10, serial sends);
+- ``aiogram per chunk``: a new ``Bot``/session for every ``--chunk-size``
+  messages, as the Celery broadcast chunks did before;
+- ``aiogram pooled``: one shared :func:`apps.bot.utils.telegram.create_session`
+  session, with ``--concurrency`` sends in flight.
+
+With ``--tls`` (needs the ``openssl`` binary) the server uses a throwaway
+self-signed certificate, so every new connection pays a TLS handshake as it
+does against ``api.telegram.org``.
+
+Usage:
+    python -m benchmarks.telegram_session --messages 2000 --concurrency 50 --tls
+"""
+import time
+import asyncio
+import argparse
+from typing import Any
+
+from benchmarks.common import print_table
+from benchmarks.common import run_concurrently
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+from benchmarks.fake_bot_api import FakeBotAPI
+
+setup_django()
+
+import requests  # noqa: E402
+import urllib3  # noqa: E402
+from aiogram import Bot  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from requests.adapters import HTTPAdapter  # noqa: E402
+
+from apps.bot.utils.telegram import create_session  # noqa: E402
+
+
+TOKEN = "123456:benchmark"
+
+
+def build_legacy_session() -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter())
+    return session
+
+
+def bench_requests(server: FakeBotAPI, messages: int, post: Any) -> tuple[list[float], float]:
+    url = f"{server.base_url}/bot{TOKEN}/sendMessage"
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for index in range(messages):
+        sent_at = time.perf_counter()
+        response = post(url, json={"chat_id": index, "text": "Hi"}, timeout=10, verify=False)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - sent_at)
+    return latencies, time.perf_counter() - started
+
+
+def make_bot(server: FakeBotAPI) -> Bot:
+    session = create_session(rate_limited=False)
+    session.api = TelegramAPIServer.from_base(server.base_url)
+    session.ssl = False
+    return Bot(TOKEN, session=session)
+
+
+async def bench_aiogram_per_chunk(
+    server: FakeBotAPI,
+    messages: int,
+    concurrency: int,
+    chunk_size: int,
+) -> tuple[list[float], float]:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for offset in range(0, messages, chunk_size):
+        bot = make_bot(server)
+        try:
+            chunk_latencies, _ = await run_concurrently(
+                lambda index: bot.send_message(chat_id=offset + index, text="Hi"),
+                min(chunk_size, messages - offset),
+                concurrency,
+            )
+        finally:
+            await bot.session.close()
+        latencies.extend(chunk_latencies)
+    return latencies, time.perf_counter() - started
+
+
+async def bench_aiogram_pooled(
+    server: FakeBotAPI,
+    messages: int,
+    concurrency: int,
+) -> tuple[list[float], float]:
+    bot = make_bot(server)
+    try:
+        return await run_concurrently(
+            lambda index: bot.send_message(chat_id=index, text="Hi"),
+            messages,
+            concurrency,
+        )
+    finally:
+        await bot.session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    urllib3.disable_warnings()
+    server = FakeBotAPI(tls=args.tls)
+    server.start()
+
+    rows = []
+    scenarios = [
+        ("requests.post", lambda: bench_requests(server, args.messages, requests.post)),
+        (
+            "requests session",
+            lambda: bench_requests(server, args.messages, build_legacy_session().post),
+        ),
+        (
+            "aiogram per chunk",
+            lambda: asyncio.run(
+                bench_aiogram_per_chunk(server, args.messages, args.concurrency, args.chunk_size),
+            ),
+        ),
+        (
+            "aiogram pooled",
+            lambda: asyncio.run(bench_aiogram_pooled(server, args.messages, args.concurrency)),
+        ),
+    ]
+    for name, scenario in scenarios:
+        server.reset()
+        latencies, elapsed = scenario()
+        connections = len(server.connections)
+        rows.append(
+            summarize(
+                name,
+                latencies,
+                elapsed,
+                connections=connections,
+                msgs_per_conn=round(len(latencies) / connections, 1) if connections else 0,
+            ),
+        )
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
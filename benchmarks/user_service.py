@@ -0,0 +1,140 @@
+"""
+Compare the old and new UserService async paths under concurrent /start load.
+
+- ``sync_to_async``: the previous implementation, ``get_or_create`` wrapped in
+  ``sync_to_async`` with every update sharing one ORM thread (polling mode
+  and background consumers, i.e. no per-update thread-sensitive context).
+- ``async ORM``: ``UserService.save_user_async`` (``aget_or_create``) inside
+  ``DatabaseContextMiddleware``, cold user cache (first ``/start``).
+- ``... (existing)``: the same updates for users that are already stored,
+  with the user cache cleared, so both paths only read.
+- ``async ORM (cached)``: the same updates again, answered by the user cache.
+
+SQLite allows a single writer, so there the parallel path only helps reads;
+use PostgreSQL to measure concurrent inserts.
+
+Run it against a migrated database (PostgreSQL for representative numbers);
+it creates and finally deletes users with chat IDs from ``--base-chat-id``.
+
+Usage:
+    python -m benchmarks.user_service --updates 2000 --concurrency 100
+"""
+import asyncio
+import argparse
+from typing import Any
+
+from benchmarks.common import print_table
+from benchmarks.common import run_concurrently
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+
+setup_django()
+
+from aiogram import types  # noqa: E402
+from asgiref.sync import sync_to_async  # noqa: E402
+
+from apps.bot.middlewares.db import DatabaseContextMiddleware  # noqa: E402
+from apps.bot.models.users import Users  # noqa: E402
+from apps.bot.services.users import UserService  # noqa: E402
+from apps.bot.services.users import user_cache  # noqa: E402
+
+
+def build_message(chat_id: int) -> types.Message:
+    return types.Message.model_validate(
+        {
+            "message_id": 1,
+            "date": 1700000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load", "username": "load"},
+            "text": "/start",
+        }
+    )
+
+
+@sync_to_async
+def legacy_save_user(message: types.Message) -> Users:
+    tg_user = message.from_user
+    user, _ = Users.objects.get_or_create(
+        chat_id=tg_user.id,
+        defaults={"username": tg_user.username, "first_name": tg_user.first_name},
+    )
+    return user
+
+
+@sync_to_async
+def cleanup(first_chat_id: int, count: int) -> None:
+    Users.objects.filter(chat_id__gte=first_chat_id, chat_id__lt=first_chat_id + count).delete()
+
+
+async def run_scenario(
+    name: str,
+    first_chat_id: int,
+    args: argparse.Namespace,
+    save: Any,
+    middleware: Any = None,
+) -> dict[str, Any]:
+    messages = [build_message(first_chat_id + index) for index in range(args.updates)]
+
+    async def handle(event: types.Message, data: dict[str, Any]) -> None:
+        await save(event)
+
+    async def operation(index: int) -> None:
+        if middleware is None:
+            await handle(messages[index], {})
+        else:
+            await middleware(handle, messages[index], {})
+
+    latencies, elapsed = await run_concurrently(operation, args.updates, args.concurrency)
+    return summarize(name, latencies, elapsed)
+
+
+async def main(args: argparse.Namespace) -> None:
+    legacy_base = args.base_chat_id
+    async_base = args.base_chat_id + args.updates
+    middleware = DatabaseContextMiddleware()
+    user_cache.local.clear()
+
+    try:
+        rows = [
+            await run_scenario("sync_to_async (new)", legacy_base, args, legacy_save_user),
+            await run_scenario(
+                "async ORM (new)",
+                async_base,
+                args,
+                UserService.save_user_async,
+                middleware,
+            ),
+            await run_scenario("sync_to_async (existing)", legacy_base, args, legacy_save_user),
+        ]
+        user_cache.local.clear()
+        rows.append(
+            await run_scenario(
+                "async ORM (existing)",
+                legacy_base,
+                args,
+                UserService.save_user_async,
+                middleware,
+            )
+        )
+        rows.append(
+            await run_scenario(
+                "async ORM (cached)",
+                legacy_base,
+                args,
+                UserService.save_user_async,
+                middleware,
+            )
+        )
+    finally:
+        await cleanup(legacy_base, args.updates * 2)
+
+    print_table(rows)
+    print("user cache:", user_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--base-chat-id", type=int, default=9_000_000_000)
+    asyncio.run(main(parser.parse_args()))
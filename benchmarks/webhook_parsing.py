@@ -0,0 +1,104 @@
+"""
+Compare ways of turning a webhook body into an aiogram ``Update``.
+
+Every scenario parses each payload of ``benchmarks/payloads/updates.json``
+(private and group messages, commands, a photo, a callback query, an inline
+query, an edit, a chat member change, a forwarded post) ``--rounds`` times:
+
+- ``json.loads + validate + remount``: the previous webhook view; the update
+  was validated without the bot, so ``Dispatcher.feed_update`` dumped and
+  validated it again to mount it on the bot;
+- ``json.loads + validate(bot)``: the intermediate ``dict`` only;
+- ``orjson.loads + validate(bot)``: the same with orjson, when installed;
+- ``model_validate_json(bot)``: the current view, one pass over the raw bytes.
+
+Usage:
+    python -m benchmarks.webhook_parsing --rounds 2000
+"""
+import json
+import time
+import argparse
+from typing import Any
+from typing import Callable
+from pathlib import Path
+
+from benchmarks.common import print_table
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+
+setup_django()
+
+from aiogram import Bot  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+from apps.bot.utils.telegram import create_session  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CORPUS = Path(__file__).parent / "payloads" / "updates.json"
+
+
+def load_corpus() -> list[bytes]:
+    return [json.dumps(update).encode() for update in json.loads(CORPUS.read_bytes())]
+
+
+def legacy(body: bytes, bot: Bot) -> Update:
+    update = Update.model_validate(json.loads(body))
+    return Update.model_validate(update.model_dump(), context={"bot": bot})
+
+
+def run_scenario(
+    name: str,
+    parse: Callable[[bytes, Bot], Update],
+    payloads: list[bytes],
+    bot: Bot,
+    rounds: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for body in payloads:
+            parsed_at = time.perf_counter()
+            parse(body, bot)
+            latencies.append(time.perf_counter() - parsed_at)
+    elapsed = time.perf_counter() - started
+    return summarize(name, latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = load_corpus()
+    bot = Bot("123456:benchmark", session=create_session(rate_limited=False))
+
+    scenarios: list[tuple[str, Callable[[bytes, Bot], Update]]] = [
+        ("json.loads + validate + remount", legacy),
+        (
+            "json.loads + validate(bot)",
+            lambda body, bot: Update.model_validate(json.loads(body), context={"bot": bot}),
+        ),
+    ]
+    if orjson is not None:
+        scenarios.append((
+            "orjson.loads + validate(bot)",
+            lambda body, bot: Update.model_validate(orjson.loads(body), context={"bot": bot}),
+        ))
+    scenarios.append((
+        "model_validate_json(bot)",
+        lambda body, bot: Update.model_validate_json(body, context={"bot": bot}),
+    ))
+
+    for name, parse in scenarios:
+        parse(payloads[0], bot)
+    print(f"{len(payloads)} payloads, {sum(map(len, payloads)) // len(payloads)} bytes on average")
+    print_table(run_scenario(name, parse, payloads, bot, args.rounds) for name, parse in scenarios)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Compare the async webhook view with the previous sync implementation.
+
+Both views are served through Django's real ASGI handler, the same way
+``gunicorn -k uvicorn.workers.UvicornWorker`` serves ``src.asgi:application``.
+``dp.feed_update`` is replaced with a coroutine that sleeps ``--handler-ms``
+to stand in for handler I/O (DB writes, outbound Telegram calls).
+
+Usage:
+    python -m benchmarks.webhook_view --requests 2000 --concurrency 200 --handler-ms 20
+"""
+import json
+import asyncio
+import argparse
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.common import print_table
+from benchmarks.common import run_concurrently
+from benchmarks.common import setup_django
+from benchmarks.common import summarize
+
+setup_django()
+
+from aiogram import types  # noqa: E402
+from asgiref.sync import async_to_sync  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.http import HttpRequest  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.urls import path  # noqa: E402
+from django.utils.decorators import method_decorator  # noqa: E402
+from django.views import View  # noqa: E402
+from django.views.decorators.csrf import csrf_exempt  # noqa: E402
+
+from apps.bot.instance import bot  # noqa: E402
+from apps.bot.instance import dp  # noqa: E402
+from apps.bot.views.webhook import TelegramWebhookView  # noqa: E402
+from src.settings.config.configs import config  # noqa: E402
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class LegacyTelegramWebhookView(View):
+    """
+    The sync view as it shipped before the async rewrite.
+    """
+
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        data = json.loads(request.body)
+        update = types.Update.model_validate(data)
+        async_to_sync(dp.feed_update)(bot, update)
+        return HttpResponse(status=200)
+
+
+urlpatterns = [
+    path("legacy/", LegacyTelegramWebhookView.as_view()),
+    path("async/", TelegramWebhookView.as_view()),
+]
+
+
+def build_payload(update_id: int) -> bytes:
+    return json.dumps(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": 1000 + update_id, "type": "private"},
+                "from": {"id": 1000 + update_id, "is_bot": False, "first_name": "Load"},
+                "text": "booking",
+            },
+        }
+    ).encode()
+
+
+async def post_asgi(application: Any, url: str, body: bytes) -> int:
+    """
+    Send a single POST through an ASGI application and return the status code.
+    """
+    headers = [
+        (b"host", b"localhost"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if config.TELEGRAM_WEBHOOK_SECRET:
+        headers.append(
+            (b"x-telegram-bot-api-secret-token", config.TELEGRAM_WEBHOOK_SECRET.encode())
+        )
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": url,
+        "raw_path": url.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 443),
+    }
+    body_sent = False
+    never = asyncio.Event()
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await never.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    return status
+
+
+async def run_scenario(name: str, url: str, args: argparse.Namespace) -> dict[str, Any]:
+    application = get_asgi_application()
+    statuses: list[int] = []
+
+    async def operation(index: int) -> None:
+        statuses.append(await post_asgi(application, url, build_payload(index)))
+
+    latencies, elapsed = await run_concurrently(operation, args.requests, args.concurrency)
+    errors = sum(1 for status in statuses if status != 200)
+    return summarize(name, latencies, elapsed, errors=errors)
+
+
+async def main(args: argparse.Namespace) -> None:
+    async def simulated_feed_update(*_: Any, **__: Any) -> None:
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    settings.ROOT_URLCONF = __name__
+    with patch.object(dp, "feed_update", simulated_feed_update):
+        rows = [
+            await run_scenario("sync view (async_to_sync)", "/legacy/", args),
+            await run_scenario("async view (await)", "/async/", args),
+        ]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--handler-ms", type=float, default=20.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,3 +1,8 @@
 #!/bin/bash
 
-celery -A src.settings.config.celery worker -l info --pool=solo
+# Latency-sensitive tasks (broadcast coordination, single messages).
+celery -A src.settings.config.celery worker -l info \
+    --pool=threads \
+    --concurrency="${CELERY_WORKER_CONCURRENCY:-8}" \
+    --queues="${CELERY_DEFAULT_QUEUE:-default}" \
+    --hostname="default@%h"
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Bulk broadcast chunks. Each thread runs its own event loop with a pooled
+# Telegram session, and chunks are acknowledged only after they finish.
+celery -A src.settings.config.celery worker -l info \
+    --pool=threads \
+    --concurrency="${CELERY_BROADCAST_WORKER_CONCURRENCY:-4}" \
+    --queues="${CELERY_BROADCAST_QUEUE:-broadcasts}" \
+    --hostname="broadcasts@%h"
@@ -1,11 +1,111 @@
 """
 ASGI config for src project.
+
+Django does not implement the ASGI lifespan protocol, so the Django
+application is wrapped to run bot startup/shutdown hooks (for example,
+draining the webhook update queue on graceful shutdown).
+
+The wrapper also reads webhook bodies itself and answers 413 once they grow
+past ``WEBHOOK_MAX_BODY_SIZE``, since Django's ASGI handler buffers the whole
+body before any view runs.
 """
 
 import os
+from collections import deque
 
 from django.core.asgi import get_asgi_application
+from django.urls import reverse
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.bot.lifespan import on_web_startup  # noqa: E402
+from apps.bot.lifespan import on_web_shutdown  # noqa: E402
+from apps.bot.utils.logging import logger  # noqa: E402
+from apps.bot.utils.metrics import webhook_requests  # noqa: E402
+from src.settings.config.configs import config  # noqa: E402
+
+WEBHOOK_PATH = reverse("telegram-webhook")
+
+
+async def reject_oversized_body(send, size):
+    logger.warning("Rejected webhook request with a body of at least %s bytes.", size)
+    webhook_requests.labels(413).inc()
+    await send({"type": "http.response.start", "status": 413, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def read_webhook_body(scope, receive, send):
+    """
+    Read a webhook request body up to ``WEBHOOK_MAX_BODY_SIZE`` bytes.
+
+    :param scope: ASGI connection scope.
+    :type scope: dict
+    :param receive: ASGI receive callable.
+    :type receive: Callable
+    :param send: ASGI send callable.
+    :type send: Callable
+    :return: A ``receive`` callable replaying the body to Django, or ``None``
+        if the request was answered with 413.
+    :rtype: Optional[Callable]
+    """
+    limit = config.WEBHOOK_MAX_BODY_SIZE
+    headers = dict(scope["headers"])
+    try:
+        content_length = int(headers.get(b"content-length") or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > limit:
+        await reject_oversized_body(send, content_length)
+        return None
+
+    messages = deque()
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if size > limit:
+            await reject_oversized_body(send, size)
+            return None
+        if not message.get("more_body", False):
+            break
+
+    async def replay():
+        if messages:
+            return messages.popleft()
+        return await receive()
+
+    return replay
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == WEBHOOK_PATH:
+        receive = await read_webhook_body(scope, receive, send)
+        if receive is None:
+            return
+
+    if scope["type"] != "lifespan":
+        await django_application(scope, receive, send)
+        return
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await on_web_startup()
+            except Exception as exc:
+                logger.exception("Web startup hook failed.")
+                await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                await on_web_shutdown()
+            except Exception:
+                logger.exception("Web shutdown hook failed.")
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -117,6 +117,13 @@ CELERY_BROKER_URL = config.CELERY_BROKER_URL
 CELERY_RESULT_BACKEND = config.CELERY_RESULT_BACKEND
 CELERY_BEAT_SCHEDULER = config.CELERY_BEAT_SCHEDULER
 CELERY_TIMEZONE = config.CELERY_TIMEZONE
+CELERY_TASK_DEFAULT_QUEUE = config.CELERY_DEFAULT_QUEUE
+CELERY_TASK_ROUTES = {
+    "apps.bot.tasks.notify.send_broadcast_chunk": {"queue": config.CELERY_BROADCAST_QUEUE},
+    "apps.bot.tasks.campaigns.run_campaign": {"queue": config.CELERY_BROADCAST_QUEUE},
+    "apps.bot.tasks.campaigns.send_campaign_chunk": {"queue": config.CELERY_BROADCAST_QUEUE},
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
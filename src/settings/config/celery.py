@@ -18,6 +18,10 @@ app.conf.beat_schedule = {
         "task": "apps.bot.tasks.notify.send_hi_to_all_users",
         "schedule": timedelta(minutes=config.CELERY_NOTIFY_INTERVAL),
     },
+    "campaigns": {
+        "task": "apps.bot.tasks.campaigns.dispatch_scheduled_campaigns",
+        "schedule": timedelta(minutes=1),
+    },
 }
 
 
@@ -16,7 +16,38 @@ class Config:
         self.IS_POLLING = env.bool("IS_POLLING", True)
         self.WEBHOOK_BASE_URL = env.str("WEBHOOK_BASE_URL", "").rstrip("/")
         self.TELEGRAM_WEBHOOK_SECRET = env.str("TELEGRAM_WEBHOOK_SECRET", "")
+        self.TELEGRAM_API_URL = env.str("TELEGRAM_API_URL", "").rstrip("/")
+        self.TELEGRAM_POOL_SIZE = env.int("TELEGRAM_POOL_SIZE", 100)
+        self.TELEGRAM_KEEPALIVE_TIMEOUT = env.float("TELEGRAM_KEEPALIVE_TIMEOUT", 60.0)
+        self.TELEGRAM_RATE_LIMIT = env.float("TELEGRAM_RATE_LIMIT", 30.0)
+        self.TELEGRAM_RATE_BURST = env.int("TELEGRAM_RATE_BURST", 10)
+        self.TELEGRAM_PER_CHAT_INTERVAL = env.float("TELEGRAM_PER_CHAT_INTERVAL", 1.0)
+        self.RATE_LIMIT_BACKEND = env.str("RATE_LIMIT_BACKEND", "redis")
+        self.TELEGRAM_RETRY_ATTEMPTS = env.int("TELEGRAM_RETRY_ATTEMPTS", 3)
+        self.TELEGRAM_MAX_RETRY_AFTER = env.float("TELEGRAM_MAX_RETRY_AFTER", 60.0)
         self.USE_NGROK = env.bool("USE_NGROK", False)
+        self.STARTUP_NOTIFY_ENABLED = env.bool("STARTUP_NOTIFY_ENABLED", True)
+        self.STARTUP_NOTIFY_MAX_RECIPIENTS = env.int("STARTUP_NOTIFY_MAX_RECIPIENTS", 0)
+        self.WEBHOOK_FAST_ACK = env.bool("WEBHOOK_FAST_ACK", False)
+        self.WEBHOOK_QUEUE_SIZE = env.int("WEBHOOK_QUEUE_SIZE", 1000)
+        self.WEBHOOK_QUEUE_WORKERS = env.int("WEBHOOK_QUEUE_WORKERS", 16)
+        self.WEBHOOK_QUEUE_PUT_TIMEOUT = env.float("WEBHOOK_QUEUE_PUT_TIMEOUT", 1.0)
+        self.WEBHOOK_QUEUE_DRAIN_TIMEOUT = env.float("WEBHOOK_QUEUE_DRAIN_TIMEOUT", 25.0)
+        self.WEBHOOK_MAX_BODY_SIZE = env.int("WEBHOOK_MAX_BODY_SIZE", 1024 * 1024)
+        self.UPDATE_DEDUP_WINDOW = env.int("UPDATE_DEDUP_WINDOW", 10_000)
+        self.UPDATE_DEDUP_TTL = env.int("UPDATE_DEDUP_TTL", 3600)
+        self.UPDATE_DEDUP_REDIS = env.bool("UPDATE_DEDUP_REDIS", False)
+        self.CHAT_ORDERING_REDIS = env.bool("CHAT_ORDERING_REDIS", False)
+        self.CHAT_LOCK_TTL = env.float("CHAT_LOCK_TTL", 60.0)
+        self.CHAT_LOCK_TIMEOUT = env.float("CHAT_LOCK_TIMEOUT", 30.0)
+        self.METRICS_PORT = env.int("METRICS_PORT", 0)
+        self.WEB_CONCURRENCY = env.int("WEB_CONCURRENCY", 1)
+        self.WEB_METRICS = env.bool("WEB_METRICS", self.WEB_CONCURRENCY <= 1)
+        self.TRACE_UPDATES = env.bool("TRACE_UPDATES", False)
+        self.TRACE_SLOW_THRESHOLD = env.float("TRACE_SLOW_THRESHOLD", 1.0)
+        self.TRACE_SLOW_SAMPLE_RATE = env.float("TRACE_SLOW_SAMPLE_RATE", 1.0)
+        self.TRACE_PROFILE_RATE = env.float("TRACE_PROFILE_RATE", 0.0)
+        self.TRACE_PROFILER = env.str("TRACE_PROFILER", "cprofile")
 
         self.DB_ENGINE = env.str("DB_ENGINE", "django.db.backends.postgresql")
         self.DB_NAME = env.str("DB_NAME", "djangogram_db")
@@ -25,6 +56,8 @@ class Config:
         self.DB_HOST = env.str("DB_HOST", "db")
         self.DB_PORT = env.int("DB_PORT", 5432)
         self.DB_URL = env.str("DB_URL", "")
+        self.BOT_DB_THREADS = env.int("BOT_DB_THREADS", 8)
+        self.ADMIN_EXACT_COUNT_LIMIT = env.int("ADMIN_EXACT_COUNT_LIMIT", 10_000)
 
         self.CELERY_BROKER_URL = env.str("CELERY_BROKER_URL", "redis://redis:6379/0")
         self.CELERY_RESULT_BACKEND = env.str("CELERY_RESULT_BACKEND", self.CELERY_BROKER_URL)
@@ -34,12 +67,40 @@ class Config:
         )
         self.CELERY_TIMEZONE = env.str("CELERY_TIMEZONE", self.TIME_ZONE)
         self.CELERY_NOTIFY_INTERVAL = env.int("CELERY_NOTIFY_INTERVAL", 1)
+        self.CELERY_DEFAULT_QUEUE = env.str("CELERY_DEFAULT_QUEUE", "default")
+        self.CELERY_BROADCAST_QUEUE = env.str("CELERY_BROADCAST_QUEUE", "broadcasts")
+
+        self.BROADCAST_CONCURRENCY = env.int("BROADCAST_CONCURRENCY", 20)
+        self.BROADCAST_MAX_ATTEMPTS = env.int("BROADCAST_MAX_ATTEMPTS", 3)
+        self.BROADCAST_CHUNK_SIZE = env.int("BROADCAST_CHUNK_SIZE", 1000)
+        self.RECIPIENT_PAGE_SIZE = env.int("RECIPIENT_PAGE_SIZE", 2000)
+        self.DELIVERY_RECORD_BATCH_SIZE = env.int("DELIVERY_RECORD_BATCH_SIZE", 500)
+        self.BROADCAST_CHECKPOINT_TTL = env.int("BROADCAST_CHECKPOINT_TTL", 7 * 24 * 3600)
+        self.BROADCAST_LOCK_TTL = env.int("BROADCAST_LOCK_TTL", 3600)
+        self.BROADCAST_BACKEND = env.str("BROADCAST_BACKEND", "celery")
+        self.BROADCAST_QUEUE_KEY = env.str("BROADCAST_QUEUE_KEY", "broadcasts:queue")
 
         self.REDIS_URL = env.str("REDIS_URL", self.CELERY_BROKER_URL)
         self.REDIS_HOST = env.str("REDIS_HOST", "redis")
         self.REDIS_PORT = env.int("REDIS_PORT", 6379)
         self.REDIS_DB = env.int("REDIS_DB", 0)
 
+        self.FSM_KEY_PREFIX = env.str("FSM_KEY_PREFIX", "fsm")
+        self.FSM_STATE_TTL = env.int("FSM_STATE_TTL", 7 * 24 * 3600)
+        self.FSM_DATA_TTL = env.int("FSM_DATA_TTL", 7 * 24 * 3600)
+        self.FSM_REDIS_MAX_CONNECTIONS = env.int("FSM_REDIS_MAX_CONNECTIONS", 50)
+        self.FSM_REDIS_TIMEOUT = env.float("FSM_REDIS_TIMEOUT", 5.0)
+        self.FSM_STORAGE_FALLBACK = env.bool("FSM_STORAGE_FALLBACK", True)
+
+        self.USER_CACHE_TTL = env.float("USER_CACHE_TTL", 300.0)
+        self.USER_CACHE_MAX_SIZE = env.int("USER_CACHE_MAX_SIZE", 10_000)
+        self.USER_CACHE_REDIS = env.bool("USER_CACHE_REDIS", False)
+        self.USER_CACHE_REDIS_TTL = env.int("USER_CACHE_REDIS_TTL", 3600)
+
+        self.USER_WRITE_BUFFER = env.bool("USER_WRITE_BUFFER", False)
+        self.USER_WRITE_BUFFER_INTERVAL = env.float("USER_WRITE_BUFFER_INTERVAL", 0.05)
+        self.USER_WRITE_BUFFER_MAX_ROWS = env.int("USER_WRITE_BUFFER_MAX_ROWS", 500)
+
         if not self.DB_URL:
             self.DB_URL = self.generate_db_url()
         if not self.REDIS_URL: